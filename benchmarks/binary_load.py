@@ -0,0 +1,54 @@
+"""
+Время загрузки скомпилированной программы: компиляция из исходного текста против загрузки файла
+в двоичном формате (load_binary) - только открытие и чтение заголовка, первой команды и всех команд.
+
+Запуск: python -m benchmarks.binary_load [количество операторов ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from syntactical_analysis import dump_binary, load_binary
+from .vm_throughput import compile_commands
+
+SIZES = [1000, 10000, 100000]
+
+HEAD = 'start_prog\nblock_var_def\nint a\nint b\nint c\nbool p\nbool q\nendblock_var_def\n'
+STATEMENTS = ['b = a * 3 + c / 2\n', 'p = (a < b) and not p or q\n', 'c = (a + b) * (c - 1)\n']
+TAIL = 'end_prog'
+
+
+def make_source(size):
+    return HEAD + ''.join(STATEMENTS[i % len(STATEMENTS)] for i in range(size)) + TAIL
+
+
+def measure(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main(sizes):
+    print(f'{"операторов":>10} {"команд":>8} {"компиляция, с":>14} {"открытие, мкс":>14} '
+          f'{"1 команда, мкс":>15} {"все команды, с":>15}')
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            source = make_source(size)
+            commands, compile_seconds = measure(lambda: compile_commands(source))
+            path = os.path.join(directory, f'{size}.tac')
+            dump_binary(commands, path)
+
+            loaded, open_seconds = measure(lambda: load_binary(path))
+            _, first_seconds = measure(lambda: loaded[0])
+            all_commands, all_seconds = measure(lambda: list(loaded))
+            assert list(map(str, all_commands)) == list(map(str, commands))
+            loaded.close()
+            print(
+                f'{size:>10} {len(commands):>8} {compile_seconds:>14.3f} {open_seconds * 1e6:>14.1f} '
+                f'{first_seconds * 1e6:>15.1f} {all_seconds:>15.3f}'
+            )
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
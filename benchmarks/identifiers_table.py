@@ -0,0 +1,39 @@
+"""
+Замер времени лексического анализа в зависимости от количества различных идентификаторов.
+При хэш-индексе в таблице идентификаторов время на один идентификатор не должно расти.
+
+Запуск: python -m benchmarks.identifiers_table [количество ...]
+"""
+import io
+import sys
+import time
+
+from lexical_analysis import iter_tokens
+
+SIZES = [100, 1000, 10000, 100000, 1000000]
+
+
+def make_source(size, prefix):
+    """Исходник, в котором size различных идентификаторов, каждый встречается дважды"""
+    return ''.join(f'{prefix}{ind} = {prefix}{ind} + 1\n' for ind in range(size))
+
+
+def measure(size):
+    """Время анализа исходника с size различными идентификаторами"""
+    # Префикс делает имена уникальными между замерами: таблица идентификаторов общая
+    source = make_source(size, prefix=f'n{size}_')
+    start = time.perf_counter()
+    for _ in iter_tokens(io.StringIO(source)):
+        pass
+    return time.perf_counter() - start
+
+
+def main(sizes):
+    print(f'{"идентификаторов":>16} {"время, с":>10} {"мкс на идентификатор":>22}')
+    for size in sizes:
+        elapsed = measure(size)
+        print(f'{size:>16} {elapsed:>10.3f} {elapsed / size * 1e6:>22.2f}')
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
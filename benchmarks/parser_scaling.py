@@ -0,0 +1,59 @@
+"""
+Замер времени синтаксического анализа в зависимости от количества токенов.
+Половина токенов программы - пустые строки перед блоком описания переменных, половина - выражения.
+Время на один токен не должно расти: парсер сдвигает индекс по потоку и не копирует его.
+
+Запуск: python -m benchmarks.parser_scaling [количество токенов ...]
+"""
+import sys
+import time
+
+from lexical_analysis import LexicalAnalyzer
+from syntactical_analysis import SyntacticalAnalyzer
+from compilation import CompilationContext
+from tokens import NL_TOKEN
+
+SIZES = [10000, 100000, 1000000, 10000000]
+
+HEAD = 'start_prog\n'
+DECLARATIONS = 'block_var_def\nint a\nint b\nendblock_var_def\n'
+STATEMENT = 'b = a + 1\n'
+TAIL = 'end_prog'
+
+
+def lex(source, context):
+    analyzer = LexicalAnalyzer(source_file=None, context=context)
+    analyzer.data = source.splitlines(keepends=True)
+    analyzer.analyze()
+    return analyzer.tokens
+
+
+def make_tokens(size, context):
+    """Поток примерно из size токенов"""
+    statement = lex(STATEMENT, context)
+    blank_lines = size // 2
+    statements = (size - blank_lines) // len(statement)
+    return (
+        lex(HEAD, context) + [NL_TOKEN] * blank_lines + lex(DECLARATIONS, context) +
+        statement * statements + lex(TAIL, context)
+    )
+
+
+def measure(size):
+    """Количество токенов и время анализа"""
+    context = CompilationContext()
+    tokens = make_tokens(size, context)
+    start = time.perf_counter()
+    SyntacticalAnalyzer(tokens, context=context).analyze()
+    return len(tokens), time.perf_counter() - start
+
+
+def main(sizes):
+    print(f'{"токенов":>10} {"время, с":>10} {"мкс на токен":>14}')
+    for size in sizes:
+        tokens_count, elapsed = measure(size)
+        print(f'{tokens_count:>10} {elapsed:>10.3f} {elapsed / tokens_count * 1e6:>14.2f}')
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
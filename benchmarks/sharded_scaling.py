@@ -0,0 +1,52 @@
+"""
+Масштабирование выполнения программы в нескольких процессах: записей в секунду
+в зависимости от количества процессов (1, 2, 4, ... до количества процессоров).
+Время запуска пула не учитывается: пул создаётся один раз и выполняет программу несколько раз.
+
+Запуск: python -m benchmarks.sharded_scaling [количество записей]
+"""
+import os
+import sys
+import time
+
+from execution import ShardedRunner, compile_vectorized
+from .vectorized_throughput import make_columns
+from .vm_throughput import SOURCE, compile_commands
+
+RECORDS = 10000000
+REPEATS = 3
+
+
+def main(records):
+    commands = compile_commands(SOURCE)
+    columns = make_columns(records)
+    start = time.perf_counter()
+    expected = compile_vectorized(commands, columns).run(columns)
+    single_seconds = time.perf_counter() - start
+
+    cpu_count = os.cpu_count() or 1
+    workers_counts = [1]
+    while workers_counts[-1] * 2 <= cpu_count:
+        workers_counts.append(workers_counts[-1] * 2)
+    if workers_counts[-1] != cpu_count:
+        workers_counts.append(cpu_count)
+
+    print(f'Записей: {records}, процессоров: {cpu_count}')
+    print(f'{"процессов":<10} {"время, с":>10} {"записей в секунду":>18} {"ускорение":>10}')
+    print(f'{"без пула":<10} {single_seconds:>10.3f} {records / single_seconds:>18,.0f}')
+    for workers_count in workers_counts:
+        with ShardedRunner(commands, columns, max_workers=workers_count) as runner:
+            # Первый запуск - запуск процессов пула
+            result = runner.run(columns)
+            assert all((result[name] == expected[name]).all() for name in expected)
+            start = time.perf_counter()
+            for _ in range(REPEATS):
+                runner.run(columns)
+            seconds = (time.perf_counter() - start) / REPEATS
+        print(
+            f'{workers_count:<10} {seconds:>10.3f} {records / seconds:>18,.0f} {single_seconds / seconds:>9.1f}x'
+        )
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else RECORDS)
@@ -0,0 +1,50 @@
+"""
+Пиковая память компиляции в зависимости от размера программы: обычная компиляция (весь поток токенов
+и все команды в памяти) против потоковой (compile_streaming). Память считается через tracemalloc.
+
+Запуск: python -m benchmarks.streaming_memory [количество операторов ...]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from compilation.cache import compile_data
+from compilation.streaming import compile_streaming
+from .binary_load import make_source
+
+SIZES = [1000, 10000, 30000]
+
+
+def measure(function):
+    """Время и пиковая память function() в байтах"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    function()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main(sizes):
+    print(f'{"операторов":>10} {"обычная, с":>11} {"память, КБ":>11} {"потоковая, с":>13} {"память, КБ":>11}')
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            source_path = os.path.join(directory, 'source.txt')
+            with open(source_path, 'w') as f:
+                f.write(make_source(size))
+            with open(source_path, 'rb') as f:
+                data = f.read()
+            tac_path = os.path.join(directory, 'result.tac')
+            batch_seconds, batch_peak = measure(lambda: compile_data(data))
+            stream_seconds, stream_peak = measure(lambda: compile_streaming(source_path, tac_path))
+            print(
+                f'{size:>10} {batch_seconds:>11.3f} {batch_peak / 1024:>11,.0f} '
+                f'{stream_seconds:>13.3f} {stream_peak / 1024:>11,.0f}'
+            )
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
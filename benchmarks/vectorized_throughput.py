@@ -0,0 +1,67 @@
+"""
+Скорость выполнения одной программы на многих входных записях: векторное выполнение (numpy)
+против выполнения байт-кода и функции Python по одной записи.
+Скорость - количество обработанных записей в секунду.
+
+Запуск: python -m benchmarks.vectorized_throughput [количество записей]
+"""
+import sys
+import time
+
+import numpy as np
+
+from execution import compile_bytecode, compile_python, compile_vectorized
+from .vm_throughput import SOURCE, compile_commands
+
+RECORDS = 1000000
+# Записей для выполнения по одной: дольше ждать нет смысла, скорость уже понятна
+SCALAR_RECORDS = 20000
+
+
+def make_columns(records, seed=0):
+    random = np.random.default_rng(seed)
+    return {
+        'a': random.integers(-5, 10, records),
+        'b': random.integers(-5, 10, records),
+        'c': np.zeros(records, dtype=np.int64),
+        'd': np.zeros(records, dtype=np.int64),
+        'x': random.uniform(-10.0, 10.0, records),
+        'y': random.uniform(-10.0, 10.0, records),
+        'p': random.random(records) < 0.5,
+        'q': random.random(records) < 0.5,
+    }
+
+
+def get_record(columns, record_ind):
+    return {name: column[record_ind].item() for name, column in columns.items()}
+
+
+def main(records):
+    commands = compile_commands(SOURCE)
+    columns = make_columns(records)
+    vectorized = compile_vectorized(commands, columns)
+    scalar_programs = [('байт-код', compile_bytecode(commands)), ('Python', compile_python(commands))]
+
+    start = time.perf_counter()
+    result = vectorized.run(columns)
+    vectorized_seconds = time.perf_counter() - start
+
+    scalar_records = min(records, SCALAR_RECORDS)
+    inputs = [get_record(columns, record_ind) for record_ind in range(scalar_records)]
+    print(f'Команд в программе: {len(commands)}, записей: {records}, по одной: {scalar_records}')
+    print(f'{"":<14} {"время, с":>10} {"записей в секунду":>18} {"ускорение":>10}')
+    vectorized_speed = records / vectorized_seconds
+    for name, program in scalar_programs:
+        start = time.perf_counter()
+        outputs = [program.run(record) for record in inputs]
+        seconds = time.perf_counter() - start
+        for record_ind, output in enumerate(outputs):
+            expected = get_record(result, record_ind)
+            assert all(output[name] == expected[name] for name in expected), (output, expected)
+        print(f'{name:<14} {seconds:>10.3f} {scalar_records / seconds:>18,.0f}')
+    print(f'{"векторно":<14} {vectorized_seconds:>10.3f} {vectorized_speed:>18,.0f} '
+          f'{vectorized_speed * seconds / scalar_records:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else RECORDS)
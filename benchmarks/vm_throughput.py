@@ -0,0 +1,130 @@
+"""
+Скорость выполнения команд: виртуальная машина с байт-кодом и ячейками и функция Python из команд
+против простого интерпретатора, который разбирает команды и хранит переменные по именам.
+Скорость - количество выполненных команд (трёхадресного кода) в секунду.
+
+Запуск: python -m benchmarks.vm_throughput [количество запусков]
+"""
+import sys
+import time
+
+from compilation import CompilationContext, calculate, compare
+from execution import compile_bytecode, compile_python
+from execution.operands import is_literal, parse_literal
+from lexical_analysis import LexicalAnalyzer
+from syntactical_analysis import SyntacticalAnalyzer
+from syntactical_analysis.commands import AssignmentCommand, ConditionCommand, GotoCommand, JumpTableCommand
+
+RUNS = 20000
+
+SOURCE = '''start_prog
+block_var_def
+int a
+int b
+int c
+int d
+float x
+float y
+bool p
+bool q
+endblock_var_def
+c = a * 3 + b / 2 - 7
+d = (a + b) * (c - 1)
+x = x * 1.5 + y / 4.0
+p = (a < b) and not q or p
+q = (a + 1 == b) or q and p
+y = x - y * 2.0
+p = (d > 10) and (p or q)
+match c:
+\tcase 1:
+\t\td = d + 1
+\tcase 2:
+\t\td = d + 2
+\tcase 3:
+\t\td = d + 3
+\tcase 4:
+\t\td = d + 4
+\tcase 5:
+\t\td = d + 5
+\tcase 6:
+\t\td = d + 6
+\tcase _:
+\t\td = 0
+end_prog'''
+
+INPUTS = {'a': 3, 'b': 4, 'c': 0, 'd': 0, 'x': 0.5, 'y': 2.0, 'p': False, 'q': True}
+
+
+def compile_commands(source):
+    context = CompilationContext()
+    lexical_analyzer = LexicalAnalyzer(source_file=None, context=context)
+    lexical_analyzer.data = source.splitlines(keepends=True)
+    lexical_analyzer.analyze()
+    SyntacticalAnalyzer(lexical_analyzer.tokens, context=context).analyze()
+    return context.commands
+
+
+def naive_run(commands, inputs):
+    """Выполнение команд по именам переменных. Возвращает значения переменных и количество выполненных команд"""
+    variables = dict(inputs)
+
+    def value(operand):
+        return parse_literal(operand) if is_literal(operand) else variables[operand]
+
+    command_ind = 0
+    executed = 0
+    while command_ind < len(commands):
+        command = commands[command_ind]
+        executed += 1
+        command_ind += 1
+        if isinstance(command, AssignmentCommand):
+            if command.operation is None:
+                variables[command.target] = value(command.source)
+            else:
+                variables[command.target] = calculate(
+                    command.operation, value(command.source), value(command.right), command.type
+                )
+        elif isinstance(command, ConditionCommand):
+            if command.operation is None:
+                cond = value(command.cond)
+            else:
+                cond = compare(command.operation, value(command.cond), value(command.right))
+            if bool(cond) != command.negated:
+                command_ind = command.goto_command_ind
+        elif isinstance(command, GotoCommand):
+            command_ind = command.next_command_ind
+        elif isinstance(command, JumpTableCommand):
+            index = value(command.value) - command.low
+            in_table = 0 <= index < len(command.targets)
+            command_ind = command.targets[index] if in_table else command.default_command_ind
+    return variables, executed
+
+
+def measure(function, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        function()
+    return time.perf_counter() - start
+
+
+def main(runs):
+    commands = compile_commands(SOURCE)
+    programs = [('байт-код', compile_bytecode(commands)), ('Python', compile_python(commands))]
+    expected, executed = naive_run(commands, INPUTS)
+    for _, program in programs:
+        result = program.run(INPUTS)
+        assert all(result[name] == expected[name] for name in INPUTS), (result, expected)
+
+    naive_seconds = measure(lambda: naive_run(commands, INPUTS), runs)
+    print(f'Команд в программе: {len(commands)}, выполняется за запуск: {executed}, запусков: {runs}')
+    print(f'{"":<14} {"время, с":>10} {"команд в секунду":>18} {"ускорение":>10}')
+    print(f'{"интерпретатор":<14} {naive_seconds:>10.3f} {executed * runs / naive_seconds:>18,.0f}')
+    for name, program in programs:
+        seconds = measure(lambda: program.run(INPUTS), runs)
+        print(
+            f'{name:<14} {seconds:>10.3f} {executed * runs / seconds:>18,.0f} {naive_seconds / seconds:>9.1f}x'
+        )
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else RUNS)
@@ -0,0 +1,2 @@
+from .context import *
+from .semantics import *
@@ -0,0 +1,198 @@
+"""
+Пакетная компиляция: python -m compilation.batch ИСХОДНИКИ [-o КАТАЛОГ] [-j ПРОЦЕССЫ]
+
+Исходники - каталоги (берутся файлы по шаблону --pattern) или glob-шаблоны.
+Для каждого файла записываются .tokens (результат лексического анализа) и .tac (трёхадресный код),
+а также общий отчёт со временем компиляции и ошибками каждого файла
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+from .cache import CompilationCache, compile_data
+
+__all__ = [
+    'BatchResult',
+    'collect_sources',
+    'compile_batch',
+    'compile_source',
+    'write_summary',
+]
+
+TOKENS_SUFFIX = '.tokens'
+TAC_SUFFIX = '.tac'
+SUMMARY_FILENAME = 'summary.txt'
+
+# Кэши компиляции процесса-исполнителя по каталогам
+_caches = {}
+
+
+@dataclass
+class BatchResult:
+    """Результат компиляции одного файла"""
+    source: str
+    tokens_path: str
+    tac_path: str
+    # Время компиляции в секундах
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def collect_sources(paths: Iterable[str], pattern='*.txt') -> List[str]:
+    """Файлы исходников: содержимое каталогов по шаблону pattern и файлы по glob-шаблонам"""
+    sources = []
+    for path in paths:
+        if os.path.isdir(path):
+            sources.extend(sorted(glob.glob(os.path.join(path, '**', pattern), recursive=True)))
+        else:
+            sources.extend(sorted(glob.glob(path, recursive=True)))
+    return [source for source in sources if os.path.isfile(source)]
+
+
+def compile_source(data: bytes, tokens_path: str, tac_path: str, encoding=None, cache: CompilationCache = None):
+    """
+    Компиляция исходника data с записью токенов в tokens_path и команд в tac_path.
+    С кэшем исходник компилируется, только если его результата нет в кэше
+    """
+    result = compile_data(data, encoding) if cache is None else cache.compile(data, encoding)
+    result.write(tokens_path, tac_path)
+
+
+def compile_batch(
+        sources: List[str], output_dir: str = None, max_workers: int = None, prefetch: int = None, encoding=None,
+        cache_dir: str = None
+) -> List[BatchResult]:
+    """
+    Компиляция исходников в пуле из max_workers процессов.
+    Файлы читаются в основном процессе, пока исполнители компилируют ранее прочитанные.
+    Прочитано и не скомпилировано не больше prefetch файлов.
+    Выходные файлы пишутся в output_dir с сохранением относительных путей, без него - рядом с исходниками.
+    Ошибка в одном файле не прерывает компиляцию остальных.
+    cache_dir - каталог кэша компиляции (CompilationCache), общий для всех исполнителей
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if prefetch is None:
+        prefetch = 2 * max_workers
+    root = None
+    if output_dir is not None and sources:
+        # Общий каталог исходников. Относительно него сохраняются пути в output_dir
+        root = os.path.commonpath([os.path.dirname(os.path.abspath(source)) for source in sources])
+    results = [_make_result(source, output_dir, root) for source in sources]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        for index, result in enumerate(results):
+            if len(futures) >= prefetch:
+                _collect(futures, results, wait(futures, return_when=FIRST_COMPLETED).done)
+            try:
+                with open(result.source, 'rb') as f:
+                    data = f.read()
+                for path in (result.tokens_path, result.tac_path):
+                    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            except OSError as e:
+                result.error = _format_error(e)
+                continue
+            future = executor.submit(
+                _compile_timed, data, result.tokens_path, result.tac_path, encoding, cache_dir
+            )
+            futures[future] = index
+        _collect(futures, results, list(futures))
+    return results
+
+
+def write_summary(results: List[BatchResult], file=None, errors_only=False):
+    """Отчёт: время и ошибка для каждого файла (или только для файлов с ошибками) и итог"""
+    failed = [result for result in results if not result.ok]
+    for result in failed if errors_only else results:
+        status = 'OK' if result.ok else 'ERROR'
+        line = f'{status:<6}{result.seconds:10.4f} s  {result.source}'
+        if not result.ok:
+            line += f'  {result.error}'
+        print(line, file=file)
+    print(
+        f'Итого: файлов {len(results)}, успешно {len(results) - len(failed)}, с ошибками {len(failed)}, '
+        f'время {sum(result.seconds for result in results):.4f} s',
+        file=file,
+    )
+
+
+def _make_result(source, output_dir, root):
+    """Пути выходных файлов исходника"""
+    if output_dir is None:
+        base = os.path.splitext(source)[0]
+    else:
+        relative = os.path.relpath(os.path.abspath(source), root)
+        base = os.path.join(output_dir, os.path.splitext(relative)[0])
+    return BatchResult(source=source, tokens_path=base + TOKENS_SUFFIX, tac_path=base + TAC_SUFFIX)
+
+
+def _compile_timed(data, tokens_path, tac_path, encoding, cache_dir=None):
+    """Компиляция в процессе-исполнителе. Возвращает время и текст ошибки"""
+    start = time.perf_counter()
+    error = None
+    try:
+        cache = None
+        if cache_dir is not None:
+            # Кэш в памяти у каждого исполнителя свой, на диске - общий
+            if cache_dir not in _caches:
+                _caches[cache_dir] = CompilationCache(cache_dir)
+            cache = _caches[cache_dir]
+        compile_source(data, tokens_path, tac_path, encoding, cache)
+    except Exception as e:
+        error = _format_error(e)
+    return time.perf_counter() - start, error
+
+
+def _collect(futures, results, done):
+    """Перенос результатов завершённых задач в results"""
+    for future in done:
+        result = results[futures.pop(future)]
+        try:
+            result.seconds, result.error = future.result()
+        except Exception as e:
+            # Процесс-исполнитель аварийно завершился
+            result.error = _format_error(e)
+
+
+def _format_error(e):
+    # У части исключений анализатора текст только в атрибуте msg
+    return f'{type(e).__name__}: {str(e) or getattr(e, "msg", "")}'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m compilation.batch', description='Пакетная компиляция')
+    parser.add_argument('sources', nargs='+', help='каталоги или glob-шаблоны исходников')
+    parser.add_argument('-o', '--output-dir', help='каталог для .tokens и .tac (по умолчанию - рядом с исходником)')
+    parser.add_argument('-j', '--jobs', type=int, help='количество процессов (по умолчанию - число ядер)')
+    parser.add_argument('--prefetch', type=int, help='сколько файлов читать заранее (по умолчанию - 2 * jobs)')
+    parser.add_argument('--pattern', default='*.txt', help='шаблон имён файлов в каталогах')
+    parser.add_argument('--encoding', help='кодировка исходников (по умолчанию - как у open())')
+    parser.add_argument('--cache-dir', help='каталог кэша компиляции (по умолчанию кэш не используется)')
+    parser.add_argument('--summary', help=f'файл отчёта (по умолчанию - {SUMMARY_FILENAME} в каталоге вывода)')
+    args = parser.parse_args(argv)
+
+    sources = collect_sources(args.sources, args.pattern)
+    results = compile_batch(
+        sources, args.output_dir, args.jobs, args.prefetch, args.encoding, args.cache_dir
+    )
+
+    summary_path = args.summary or os.path.join(args.output_dir or '.', SUMMARY_FILENAME)
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        write_summary(results, f)
+    write_summary(results, errors_only=True)
+    print(f'Отчёт: {summary_path}')
+    return 0 if all(result.ok for result in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,347 @@
+"""
+Кэш результатов компиляции с адресацией по содержимому.
+
+Ключ - хэш байтов исходника, версии компилятора и параметров компиляции. Результат - поток токенов
+лексического анализа (TokenBuffer со своими таблицами) и команды. Два уровня:
+    в памяти - не больше memory_entries результатов, вытесняется давно не использованный;
+    на диске (если задан каталог) - файл на результат. Суммарный размер файлов ограничен disk_size,
+        вытесняются файлы с самым старым временем изменения (оно обновляется при каждом попадании).
+        Каталог просматривается при первой записи и потом, только когда размер, подсчитанный по записанным
+        файлам, превысит disk_size: файлы других процессов учитываются при этом просмотре.
+Файл записывается во временный файл в том же каталоге и переименовывается, поэтому несколько процессов
+могут пользоваться одним каталогом: читатель видит либо старый файл, либо новый целиком.
+
+Файл результата (числа - little-endian):
+    заголовок: количество токенов, длины имён идентификаторов и констант в байтах (uint32);
+    коды токенов (uint16) и значения (uint32) - массивы TokenBuffer;
+    имена идентификаторов таблицы через перевод строки (UTF-8);
+    числовые константы таблицы через перевод строки: тип и значение через пробел;
+    команды в двоичном формате (syntactical_analysis.binary_format).
+Повреждённый файл (BinaryFormatError при чтении) удаляется и считается промахом
+"""
+import hashlib
+import io
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from lexical_analysis import LexicalAnalyzer
+from lexical_analysis.const import INT, FLOAT
+from syntactical_analysis import SyntacticalAnalyzer, dumps_binary, loads_binary
+from syntactical_analysis.binary_format import VERSION as BINARY_FORMAT_VERSION
+from syntactical_analysis.custom_exceptions import BinaryFormatError
+from tokens import DigitalConstToken, DigitalConstsTable, IdentifierToken, TokenBuffer
+from .context import CompilationContext
+
+__all__ = [
+    'COMPILER_VERSION',
+    'CacheStats',
+    'CompilationCache',
+    'CompilationResult',
+    'compile_data',
+    'get_compiler_version',
+]
+
+# Пакеты, от исходников которых зависит результат компиляции
+COMPILER_PACKAGES = ('lexical_analysis', 'syntactical_analysis', 'tokens', 'compilation')
+# Сколько результатов хранится в памяти
+MEMORY_ENTRIES = 128
+# Наибольший суммарный размер файлов кэша на диске (в байтах)
+DISK_SIZE = 256 * 1024 * 1024
+ENTRY_SUFFIX = '.entry'
+TEMP_SUFFIX = '.tmp'
+
+ENTRY_HEADER = struct.Struct('<III')
+
+
+def get_compiler_version() -> str:
+    """
+    Хэш исходников компилятора (файлов .py пакетов COMPILER_PACKAGES). Меняется при любом изменении
+    компилятора, поэтому записи кэша, полученные старым компилятором, перестают находиться
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    paths = []
+    for package in COMPILER_PACKAGES:
+        for directory, _, filenames in os.walk(os.path.join(root, package)):
+            paths.extend(os.path.join(directory, filename) for filename in filenames if filename.endswith('.py'))
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest.update(f'{os.path.relpath(path, root)}\0{len(data)}\0'.encode())
+        digest.update(data)
+    return digest.hexdigest()
+
+
+# Версия компилятора - хэш его исходников
+COMPILER_VERSION = get_compiler_version()
+
+
+@dataclass
+class CompilationResult:
+    """Результат компиляции исходника. Результат из кэша общий для всех получивших, его нельзя менять"""
+    # Результат лексического анализа
+    tokens: TokenBuffer
+    commands: List
+
+    def write(self, tokens_path: str, tac_path: str):
+        """Запись в файлы так же, как LexicalAnalyzer.write и SyntacticalAnalyzer.write"""
+        with open(tokens_path, 'w') as f:
+            f.write(''.join(map(str, self.tokens)))
+        with open(tac_path, 'w') as f:
+            f.write('\n'.join(map(str, self.commands)))
+
+
+@dataclass
+class CacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    # Записи, вытесненные из памяти и с диска
+    memory_evictions: int = 0
+    disk_evictions: int = 0
+
+    @property
+    def hits(self):
+        return self.memory_hits + self.disk_hits
+
+
+def compile_data(data: bytes, encoding=None, optimization=True) -> CompilationResult:
+    """Компиляция исходника data. У каждого исходника свой контекст компиляции"""
+    context = CompilationContext()
+    lexical_analyzer = LexicalAnalyzer(source_file=None, compact=True, context=context)
+    # Декодируем так же, как open()
+    lexical_analyzer.read_file(io.TextIOWrapper(io.BytesIO(data), encoding=encoding))
+    lexical_analyzer.analyze()
+
+    syntactical_analyzer = SyntacticalAnalyzer(lexical_analyzer.tokens, context=context, optimization=optimization)
+    syntactical_analyzer.analyze()
+    return CompilationResult(tokens=lexical_analyzer.tokens, commands=context.commands)
+
+
+@dataclass
+class CompilationCache:
+    """
+    Кэш результатов компиляции. directory - каталог кэша на диске, без него результаты хранятся только в памяти
+    """
+    directory: Optional[str] = None
+    memory_entries: int = MEMORY_ENTRIES
+    disk_size: int = DISK_SIZE
+    stats: CacheStats = field(default_factory=CacheStats)
+
+    def __post_init__(self):
+        self._memory = OrderedDict()  # type: OrderedDict[str, CompilationResult]
+        # Размер файлов на диске: по последнему просмотру каталога и записанным после него файлам.
+        # None - каталог ещё не просматривался
+        self._disk_usage = None  # type: Optional[int]
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def key(data: bytes, encoding=None, optimization=True) -> str:
+        """Ключ исходника: хэш версии компилятора, параметров компиляции и байтов исходника"""
+        digest = hashlib.sha256()
+        digest.update(f'{COMPILER_VERSION}\0{BINARY_FORMAT_VERSION}\0{encoding}\0{optimization}\0'.encode())
+        digest.update(data)
+        return digest.hexdigest()
+
+    def compile(self, data: bytes, encoding=None, optimization=True) -> CompilationResult:
+        """Результат из кэша или компиляция с сохранением результата в кэш"""
+        key = self.key(data, encoding, optimization)
+        result = self.get(key)
+        if result is None:
+            result = compile_data(data, encoding, optimization)
+            self.put(key, result)
+        return result
+
+    def compile_file(self, path: str, encoding=None, optimization=True) -> CompilationResult:
+        with open(path, 'rb') as f:
+            return self.compile(f.read(), encoding, optimization)
+
+    def get(self, key: str) -> Optional[CompilationResult]:
+        """Результат по ключу или None. Результат с диска попадает и в память"""
+        result = self._memory.get(key)
+        if result is not None:
+            self._memory.move_to_end(key)
+            self.stats.memory_hits += 1
+            return result
+        result = self._read(key)
+        if result is None:
+            self.stats.misses += 1
+            return None
+        self.stats.disk_hits += 1
+        self._remember(key, result)
+        return result
+
+    def put(self, key: str, result: CompilationResult):
+        self._remember(key, result)
+        if self.directory is not None:
+            size = self._write(key, result)
+            if self._disk_usage is None:
+                self._evict_files()
+                return
+            self._disk_usage += size
+            if self._disk_usage > self.disk_size:
+                self._evict_files()
+
+    def clear(self):
+        """Удаление всех результатов из памяти и с диска. Счётчики не сбрасываются"""
+        self._memory.clear()
+        if self.directory is not None:
+            for path, _, _ in self._list_files():
+                _remove(path)
+            self._disk_usage = None
+
+    def _remember(self, key, result):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.stats.memory_evictions += 1
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def _read(self, key):
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            # Время изменения - время последнего использования: по нему вытесняются файлы
+            os.utime(path)
+        except OSError:
+            return None
+        try:
+            return _decode_entry(data)
+        except BinaryFormatError:
+            # Повреждённый файл
+            _remove(path)
+            return None
+
+    def _write(self, key, result) -> int:
+        """Запись файла результата. Возвращает его размер"""
+        data = _encode_entry(result)
+        descriptor, temp_path = tempfile.mkstemp(dir=self.directory, suffix=TEMP_SUFFIX)
+        try:
+            with os.fdopen(descriptor, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, self._path(key))
+        except BaseException:
+            _remove(temp_path)
+            raise
+        return len(data)
+
+    def _list_files(self):
+        """Файлы записей: (путь, размер, время изменения)"""
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith(ENTRY_SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    # Файл удалён другим процессом
+                    continue
+                files.append((entry.path, stat.st_size, stat.st_mtime))
+        return files
+
+    def _evict_files(self):
+        """
+        Просмотр каталога и удаление давно не использованных файлов, пока их суммарный размер больше disk_size
+        """
+        files = self._list_files()
+        total_size = sum(size for _, size, _ in files)
+        for path, size, _ in sorted(files, key=lambda file: file[2]):
+            if total_size <= self.disk_size:
+                break
+            if _remove(path):
+                self.stats.disk_evictions += 1
+            total_size -= size
+        self._disk_usage = total_size
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _array_from(typecode: str, data) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def _encode_entry(result: CompilationResult) -> bytes:
+    """Файл результата (формат - в описании модуля)"""
+    tokens = result.tokens
+    identifiers = '\n'.join(token.attr_name for token in tokens.identifiers).encode('utf-8')
+    digital_consts = '\n'.join(f'{token.type} {token.attr!r}' for token in tokens.digital_consts).encode('utf-8')
+    return b''.join([
+        ENTRY_HEADER.pack(len(tokens), len(identifiers), len(digital_consts)),
+        _little_endian(tokens.codes),
+        _little_endian(tokens.values),
+        identifiers,
+        digital_consts,
+        dumps_binary(result.commands),
+    ])
+
+
+def _decode_entry(data: bytes) -> CompilationResult:
+    """Результат из файла. Повреждённый файл - BinaryFormatError"""
+    try:
+        tokens_count, identifiers_length, digital_consts_length = ENTRY_HEADER.unpack_from(data)
+        offset = ENTRY_HEADER.size
+        codes_end = offset + tokens_count * 2
+        values_end = codes_end + tokens_count * 4
+        identifiers_end = values_end + identifiers_length
+        digital_consts_end = identifiers_end + digital_consts_length
+        if digital_consts_end > len(data):
+            raise BinaryFormatError()
+
+        # Встроенные типы в начале таблицы идентификаторов - общие токены контекста
+        context = CompilationContext()
+        identifiers = context.identifiers_table
+        names = str(data[values_end:identifiers_end], 'utf-8').split('\n')
+        if names[:len(identifiers)] != [token.attr_name for token in identifiers]:
+            raise BinaryFormatError()
+        for name in names[len(identifiers):]:
+            identifiers.append(IdentifierToken(value=len(identifiers), attr_name=name, attr_value=None, type=None))
+        digital_consts = DigitalConstsTable()
+        if digital_consts_length:
+            for line in str(data[identifiers_end:digital_consts_end], 'utf-8').split('\n'):
+                type_, attr = line.split(' ')
+                if type_ not in (INT, FLOAT):
+                    raise BinaryFormatError()
+                attr = int(attr) if type_ == INT else float(attr)
+                digital_consts.append(DigitalConstToken(value=len(digital_consts), attr=attr, type=type_))
+
+        tokens = TokenBuffer(identifiers=identifiers, digital_consts=digital_consts)
+        tokens.codes = _array_from('H', data[offset:codes_end])
+        tokens.values = _array_from('I', data[codes_end:values_end])
+        tokens.validate()
+        commands = list(loads_binary(data[digital_consts_end:]))
+    except (struct.error, ValueError):
+        # ValueError - в том числе UnicodeDecodeError
+        raise BinaryFormatError()
+    return CompilationResult(tokens=tokens, commands=commands)
+
+
+def _remove(path) -> bool:
+    """Удаление файла. Файл мог уже удалить другой процесс"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return False
+    return True
@@ -0,0 +1,37 @@
+# Модули tokens можно импортировать только после lexical_analysis
+import lexical_analysis  # noqa: F401
+from tokens import (
+    IdentifiersTable, DigitalConstsTable, INT_TOKEN, FLOAT_TOKEN, BOOL_TOKEN,
+    identifiers_table, digital_consts_table,
+)
+
+__all__ = [
+    'CompilationContext',
+    'default_context',
+]
+
+
+class CompilationContext(object):
+    """
+    Контекст компиляции одной программы.
+    Хранит таблицы идентификаторов и числовых констант, сгенерированные команды и счётчик временных переменных.
+    Контексты независимы, поэтому программы можно компилировать одну за другой или одновременно в разных потоках.
+    Общие для всех контекстов только токены встроенных типов (INT_TOKEN, FLOAT_TOKEN, BOOL_TOKEN), они неизменяемые.
+    Поле записи ссылается на запись напрямую (IdentifierToken.parent), а не номером в таблице
+    """
+
+    def __init__(self, identifiers_table=None, digital_consts_table=None, commands=None):
+        if identifiers_table is None:
+            identifiers_table = IdentifiersTable([INT_TOKEN, FLOAT_TOKEN, BOOL_TOKEN])
+        if digital_consts_table is None:
+            digital_consts_table = DigitalConstsTable()
+        self.identifiers_table = identifiers_table  # type: IdentifiersTable
+        self.digital_consts_table = digital_consts_table  # type: DigitalConstsTable
+        # Сгенерированные команды
+        self.commands = [] if commands is None else commands
+        # Количество созданных временных переменных
+        self.temp_vars_count = 0
+
+
+# Контекст по умолчанию. Использует общие таблицы модуля tokens
+default_context = CompilationContext(identifiers_table=identifiers_table, digital_consts_table=digital_consts_table)
@@ -0,0 +1,54 @@
+"""
+Семантика операций языка.
+Используется при вычислении констант во время компиляции и при выполнении команд
+"""
+import operator
+
+from lexical_analysis.const import INT
+
+__all__ = [
+    'ARITHMETIC_FUNCTIONS',
+    'RELATION_FUNCTIONS',
+    'calculate',
+    'compare',
+    'divide',
+]
+
+
+def divide(left, right, type_):
+    """
+    Деление. Целые делятся с отбрасыванием дробной части (округлением к нулю): -7 / 2 == -3.
+    При делении на ноль - ZeroDivisionError
+    """
+    if type_ == INT:
+        quotient = abs(left) // abs(right)
+        return quotient if (left < 0) == (right < 0) else -quotient
+    return left / right
+
+
+ARITHMETIC_FUNCTIONS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+}
+
+RELATION_FUNCTIONS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+
+def calculate(operation: str, left, right, type_):
+    """Результат арифметической операции над значениями типа type_"""
+    if operation == '/':
+        return divide(left, right, type_)
+    return ARITHMETIC_FUNCTIONS[operation](left, right)
+
+
+def compare(operation: str, left, right) -> bool:
+    """Результат операции сравнения"""
+    return RELATION_FUNCTIONS[operation](left, right)
@@ -0,0 +1,59 @@
+"""
+Потоковая компиляция: python -m compilation.streaming ИСХОДНИК TAC [--tokens ФАЙЛ]
+
+Лексический анализатор читает исходник блоками и выдаёт токены по мере разбора, синтаксический
+анализатор берёт их по одному оператору и сразу записывает команды оператора (SyntacticalAnalyzer.analyze_stream).
+Память зависит от размера самого большого оператора и количества разных идентификаторов и констант,
+но не от размера программы
+"""
+import argparse
+import sys
+
+from lexical_analysis import LexicalAnalyzer
+from syntactical_analysis import SyntacticalAnalyzer
+from .context import CompilationContext
+
+__all__ = [
+    'compile_streaming',
+]
+
+
+def compile_streaming(
+        source_path: str, tac_path: str, tokens_path: str = None, encoding=None, optimization=True
+) -> int:
+    """
+    Компиляция файла source_path с записью команд в tac_path и, если задан tokens_path, токенов.
+    Результат совпадает с LexicalAnalyzer.write и SyntacticalAnalyzer.write.
+    Возвращает количество команд
+    """
+    context = CompilationContext()
+    with open(source_path, encoding=encoding) as source, open(tac_path, 'w') as tac:
+        tokens = LexicalAnalyzer(source_file=None, context=context).iter_tokens(source)
+        if tokens_path is None:
+            return SyntacticalAnalyzer(tokens, context=context, optimization=optimization).analyze_stream(tac)
+        with open(tokens_path, 'w') as tokens_file:
+            tokens = _write_tokens(tokens, tokens_file)
+            return SyntacticalAnalyzer(tokens, context=context, optimization=optimization).analyze_stream(tac)
+
+
+def _write_tokens(tokens, f):
+    """Запись токенов в файл по мере того, как их забирает синтаксический анализатор"""
+    for token in tokens:
+        f.write(str(token))
+        yield token
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m compilation.streaming', description='Потоковая компиляция')
+    parser.add_argument('source', help='исходник')
+    parser.add_argument('tac', help='файл трёхадресного кода')
+    parser.add_argument('--tokens', help='файл токенов (по умолчанию токены не записываются)')
+    parser.add_argument('--encoding', help='кодировка исходника (по умолчанию - как у open())')
+    parser.add_argument('--no-optimization', action='store_true', help='не оптимизировать команды')
+    args = parser.parse_args(argv)
+    compile_streaming(args.source, args.tac, args.tokens, args.encoding, not args.no_optimization)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,4 @@
+from .vm import *
+from .python_backend import *
+from .vectorized import *
+from .sharded import *
@@ -0,0 +1,37 @@
+"""
+Операнды команд: имена переменных и записанные текстом константы
+"""
+from lexical_analysis.const import INT, FLOAT, KW_TRUE, KW_FALSE
+
+__all__ = [
+    'is_literal',
+    'parse_literal',
+    'get_division_type',
+]
+
+
+def is_literal(operand: str) -> bool:
+    """Является ли операнд константой: True, False или число (после свёртки - возможно, отрицательное)"""
+    return operand in (KW_TRUE, KW_FALSE) or operand[0].isdigit() or operand[0] in '-.'
+
+
+def parse_literal(operand: str):
+    """Значение константы"""
+    if operand == KW_TRUE:
+        return True
+    if operand == KW_FALSE:
+        return False
+    try:
+        return int(operand)
+    except ValueError:
+        return float(operand)
+
+
+def get_division_type(command) -> str:
+    """
+    Тип операндов деления command (INT или FLOAT). Он известен при компиляции и записан в команде,
+    по значениям операндов во время выполнения не определяется
+    """
+    if command.type not in (INT, FLOAT):
+        raise ValueError(f'Не указан тип деления: {command}')
+    return command.type
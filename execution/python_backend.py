@@ -0,0 +1,335 @@
+"""
+Перевод команд в исходный код функции Python и её компиляция.
+
+Переменные становятся локальными переменными функции, линейные участки - обычными присваиваниями.
+Переходы в командах только вперёд, поэтому участки выполняются по порядку, а переход - это номер команды
+_skip, до которой участки пропускаются. Участок, который может быть пропущен, выполняется под условием
+if _skip <= <номер его первой команды>.
+Таблица переходов и выбор case в match (цепочка if $t == k goto или двоичный поиск по $t) - поиск в словаре.
+Если встречается переход назад, участки выполняются в цикле с выбором по номеру.
+
+Скомпилированные функции кэшируются по хэшу текста программы и типов деления
+"""
+import hashlib
+from collections import OrderedDict
+from typing import Callable, Dict, List
+
+from compilation.semantics import compare, divide
+from lexical_analysis.const import INT
+from syntactical_analysis.commands import (
+    AssignmentCommand, ConditionCommand, GotoCommand, JumpTableCommand, NoopCommand, get_jump_targets,
+)
+from syntactical_analysis.temp_var import is_temp_name
+from .operands import is_literal, parse_literal, get_division_type
+
+__all__ = [
+    'PythonProgram',
+    'clear_python_cache',
+    'compile_python',
+    'generate_python_source',
+    'run_python',
+]
+
+# Сколько скомпилированных программ хранится в кэше
+CACHE_SIZE = 256
+FUNCTION_NAME = 'program'
+# Наименьшее количество условий в участке выбора, который заменяется поиском в словаре
+DICT_DISPATCH_MIN_CONDITIONS = 2
+INDENT = ' ' * 4
+
+_cache = OrderedDict()  # type: OrderedDict[str, PythonProgram]
+
+
+class PythonProgram(object):
+    """Скомпилированная функция программы: принимает значения переменных, возвращает значения переменных"""
+
+    def __init__(self, source: str, function: Callable[[Dict], Dict]):
+        self.source = source
+        self.function = function
+
+    def run(self, inputs: Dict = None) -> Dict:
+        """Переменные из inputs, которых нет в командах, не меняются"""
+        return self.function({} if inputs is None else inputs)
+
+    __call__ = run
+
+
+def compile_python(commands: List, use_cache=True) -> PythonProgram:
+    """Функция Python для команд. Одинаковые программы компилируются один раз"""
+    # Тип деления в текст команды не входит, а код от него зависит
+    text = '\n'.join(f'{command}\t{getattr(command, "type", None)}' for command in commands)
+    key = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    if use_cache and key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+
+    source, constants = generate_python_source(commands)
+    namespace = {'_int_divide': _int_divide, **constants}
+    exec(compile(source, f'<program {key[:12]}>', 'exec'), namespace)
+    program = PythonProgram(source, namespace[FUNCTION_NAME])
+    if use_cache:
+        _cache[key] = program
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return program
+
+
+def run_python(commands: List, inputs: Dict = None) -> Dict:
+    return compile_python(commands).run(inputs)
+
+
+def clear_python_cache():
+    _cache.clear()
+
+
+def generate_python_source(commands: List):
+    """Исходный код функции и значения глобальных имён, которые в нём используются (таблицы переходов)"""
+    return _SourceGenerator(commands).generate()
+
+
+def _int_divide(left, right):
+    """Деление целых по правилам языка - с округлением к нулю"""
+    return divide(left, right, INT)
+
+
+class _DictJump(object):
+    """Переход по словарю: table.get(value, default_command_ind)"""
+
+    def __init__(self, value: str, table: Dict, default_command_ind: int):
+        self.value = value
+        self.table = table
+        self.default_command_ind = default_command_ind
+
+
+def _get_jump_targets(command) -> List[int]:
+    if isinstance(command, _DictJump):
+        return list(command.table.values()) + [command.default_command_ind]
+    return get_jump_targets(command)
+
+
+def _replace_dispatches(commands) -> List:
+    """
+    Копия команд, в которой участки выбора по значению заменены переходом по словарю (_DictJump),
+    а остальные команды участка - noop
+    """
+    commands = list(commands)
+    # Индексы команд, на которые есть переходы, и откуда
+    sources = {}
+    for command_ind, command in enumerate(commands):
+        for target in get_jump_targets(command):
+            sources.setdefault(target, []).append(command_ind)
+    command_ind = 0
+    while command_ind < len(commands):
+        dispatch = _find_dispatch(commands, command_ind, sources)
+        if dispatch is None:
+            command_ind += 1
+            continue
+        end, dict_jump = dispatch
+        commands[command_ind] = dict_jump
+        for removed_ind in range(command_ind + 1, end):
+            commands[removed_ind] = NoopCommand()
+        command_ind = end
+    return commands
+
+
+def _find_dispatch(commands, start, sources):
+    """
+    Участок выбора, начинающийся с команды start: условия сравнения одной переменной с числами и goto,
+    вход в который только через start. Так выглядит выбор case в match.
+    Результат участка для каждого значения переменной определяется выполнением участка на всех числах
+    из условий, между ними и за их пределами. Если все значения, кроме чисел из условий, ведут в одно место,
+    участок заменяется словарём число -> индекс команды. Возвращает (конец участка, _DictJump) или None
+    """
+    head = commands[start]
+    if not isinstance(head, ConditionCommand) or _get_case_value(head) is None or is_literal(head.cond):
+        return None
+    value = head.cond
+    end = start
+    while end < len(commands):
+        command = commands[end]
+        is_condition = (
+            isinstance(command, ConditionCommand) and command.cond == value and _get_case_value(command) is not None
+        )
+        if not is_condition and not isinstance(command, GotoCommand):
+            break
+        end += 1
+    # Переход в середину участка извне делит его
+    for command_ind in range(start + 1, end):
+        if any(not start <= source < end for source in sources.get(command_ind, ())):
+            end = command_ind
+            break
+    conditions = [command for command in commands[start:end] if isinstance(command, ConditionCommand)]
+    if len(conditions) < DICT_DISPATCH_MIN_CONDITIONS:
+        return None
+
+    values = sorted({_get_case_value(command) for command in conditions})
+    others = [values[0] - 1, values[-1] + 1, float('nan')]
+    others += [(low + high) / 2 for low, high in zip(values, values[1:])]
+    targets = [_run_dispatch(commands, start, end, other) for other in others]
+    default_command_ind = targets[0]
+    if default_command_ind is None or any(target != default_command_ind for target in targets):
+        return None
+    table = {}
+    for case_value in values:
+        target = _run_dispatch(commands, start, end, case_value)
+        if target is None:
+            return None
+        if target != default_command_ind:
+            table[case_value] = target
+    return end, _DictJump(value, table, default_command_ind)
+
+
+def _get_case_value(command):
+    """Число, с которым условие сравнивает переменную, или None"""
+    if command.operation is None or not is_literal(command.right):
+        return None
+    case_value = parse_literal(command.right)
+    return None if isinstance(case_value, bool) else case_value
+
+
+def _run_dispatch(commands, start, end, value):
+    """Индекс команды, на которую участок [start, end) переходит при значении value. None, если участок зацикливается"""
+    command_ind = start
+    visited = set()
+    while start <= command_ind < end:
+        if command_ind in visited:
+            return None
+        visited.add(command_ind)
+        command = commands[command_ind]
+        if isinstance(command, GotoCommand):
+            command_ind = command.next_command_ind
+        elif compare(command.operation, value, _get_case_value(command)) != command.negated:
+            command_ind = command.goto_command_ind
+        else:
+            command_ind += 1
+    return command_ind
+
+
+class _SourceGenerator(object):
+    def __init__(self, commands):
+        self.commands = _replace_dispatches(commands)
+        # Имя переменной программы -> имя локальной переменной
+        self.locals = {}
+        self.constants = {}
+
+    def generate(self):
+        commands = self.commands
+        blocks = self._get_blocks()
+        forward_only = all(
+            target > command_ind
+            for command_ind, command in enumerate(commands) for target in _get_jump_targets(command)
+        )
+        body = []
+        if forward_only:
+            self._generate_sequential(blocks, body)
+        else:
+            self._generate_dispatch_loop(blocks, body)
+
+        lines = [f'def {FUNCTION_NAME}(inputs):']
+        for name, local in self.locals.items():
+            if not is_temp_name(name):
+                lines.append(f'{INDENT}{local} = inputs.get({name!r})')
+        if forward_only:
+            lines.append(f'{INDENT}_skip = 0')
+        lines.extend(body)
+        lines.append(f'{INDENT}result = dict(inputs)')
+        items = ', '.join(f'{name!r}: {local}' for name, local in self.locals.items() if not is_temp_name(name))
+        lines.append(f'{INDENT}result.update({{{items}}})')
+        lines.append(f'{INDENT}return result')
+        return '\n'.join(lines) + '\n', self.constants
+
+    def _get_blocks(self):
+        """Линейные участки: (индекс первой команды, индекс после последней)"""
+        commands_count = len(self.commands)
+        leaders = {0}
+        for command_ind, command in enumerate(self.commands):
+            targets = _get_jump_targets(command)
+            if targets:
+                leaders.update(targets)
+                leaders.add(command_ind + 1)
+        leaders = sorted(leader for leader in leaders if leader < commands_count)
+        return list(zip(leaders, leaders[1:] + [commands_count]))
+
+    def _generate_sequential(self, blocks, lines):
+        """Участки по порядку. Под условием - только те, через которые есть переход"""
+        # Самая дальняя цель перехода среди уже пройденных команд
+        farthest_target = 0
+        for start, end in blocks:
+            skippable = farthest_target > start
+            indent = INDENT * 2 if skippable else INDENT
+            block_lines = self._generate_block(start, end, indent, lambda target: f'_skip = {target}')
+            # Участок только из noop (например, остаток заменённого выбора) не нужен и под условием
+            if block_lines:
+                if skippable:
+                    lines.append(f'{INDENT}if _skip <= {start}:')
+                lines.extend(block_lines)
+            for command in self.commands[start:end]:
+                farthest_target = max([farthest_target] + _get_jump_targets(command))
+
+    def _generate_dispatch_loop(self, blocks, lines):
+        """Участки в цикле: _label - номер первой команды следующего участка"""
+        commands_count = len(self.commands)
+        lines.append(f'{INDENT}_label = 0')
+        lines.append(f'{INDENT}while _label < {commands_count}:')
+        for block_ind, (start, end) in enumerate(blocks):
+            keyword = 'if' if block_ind == 0 else 'elif'
+            lines.append(f'{INDENT * 2}{keyword} _label == {start}:')
+            indent = INDENT * 3
+            lines.append(f'{indent}_label = {end}')
+            lines.extend(self._generate_block(start, end, indent, lambda target: f'_label = {target}'))
+        lines.append(f'{INDENT * 2}else:')
+        lines.append(f'{INDENT * 3}break')
+
+    def _generate_block(self, start, end, indent, jump):
+        """Строки участка. jump(target) - оператор перехода на команду target"""
+        lines = []
+        for command in self.commands[start:end]:
+            if isinstance(command, AssignmentCommand):
+                lines.append(f'{indent}{self._local(command.target)} = {self._expression(command)}')
+            elif isinstance(command, ConditionCommand):
+                cond = self._operand(command.cond)
+                if command.operation is not None:
+                    cond = f'{cond} {command.operation} {self._operand(command.right)}'
+                if command.negated:
+                    cond = f'not ({cond})'
+                lines.append(f'{indent}if {cond}:')
+                lines.append(f'{indent}{INDENT}{jump(command.goto_command_ind)}')
+            elif isinstance(command, GotoCommand):
+                lines.append(f'{indent}{jump(command.next_command_ind)}')
+            elif isinstance(command, (JumpTableCommand, _DictJump)):
+                lines.append(f'{indent}{self._table_jump(command, jump)}')
+            elif not isinstance(command, NoopCommand):
+                raise TypeError(f'Неизвестная команда: {command}')
+        return lines
+
+    def _table_jump(self, command, jump):
+        """Переход по словарю: значение -> индекс команды"""
+        if isinstance(command, JumpTableCommand):
+            table = {command.low + offset: target for offset, target in enumerate(command.targets)}
+        else:
+            table = command.table
+        table_name = f'_table{len(self.constants)}'
+        self.constants[table_name] = table
+        return jump(f'{table_name}.get({self._operand(command.value)}, {command.default_command_ind})')
+
+    def _expression(self, command):
+        source = self._operand(command.source)
+        if command.operation is None:
+            return source
+        right = self._operand(command.right)
+        if command.operation == '/':
+            if get_division_type(command) == INT:
+                return f'_int_divide({source}, {right})'
+            # Деление вещественных - деление Python, на ноль - ZeroDivisionError
+            return f'{source} / {right}'
+        return f'{source} {command.operation} {right}'
+
+    def _operand(self, operand):
+        if is_literal(operand):
+            return repr(parse_literal(operand))
+        return self._local(operand)
+
+    def _local(self, name):
+        if name not in self.locals:
+            self.locals[name] = f'v{len(self.locals)}'
+        return self.locals[name]
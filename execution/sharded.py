@@ -0,0 +1,216 @@
+"""
+Выполнение программы на больших наборах входных записей в нескольких процессах (требуется numpy).
+
+Записи делятся на части (shards), каждую часть процесс выполняет векторно (VectorizedProgram).
+Программа компилируется один раз и передаётся каждому процессу один раз - при его запуске.
+Столбцы входных переменных копируются в разделяемую память (multiprocessing.shared_memory),
+процессы читают свои части оттуда. Столбцы результата части процесс тоже записывает в разделяемую
+память и передаёт обратно только имена блоков. Тип столбца результата заранее неизвестен
+(зависит от того, какие команды выполнились), поэтому блоки результата создаёт процесс
+"""
+import math
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .vectorized import VectorizedProgram
+
+__all__ = [
+    'ShardedRunner',
+    'run_sharded',
+]
+
+# Наибольшее количество записей в одной части
+SHARD_SIZE = 1000000
+
+# Программа процесса, задаётся при его запуске
+_worker_program = None  # type: VectorizedProgram
+
+
+class ShardedRunner(object):
+    """
+    Пул процессов, выполняющих одну программу. inputs - как в VectorizedProgram.
+    Используется как контекстный менеджер или закрывается методом close()
+    """
+
+    def __init__(self, commands: List, inputs: Iterable[str], max_workers: int = None):
+        self.program = VectorizedProgram(commands, inputs)
+        self.executor = ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_init_worker, initargs=(self.program,)
+        )
+        # max_workers=None - по количеству процессоров
+        self.max_workers = self.executor._max_workers
+
+    def run(self, columns: Dict, shard_size: int = None) -> Dict:
+        """
+        Выполнение для всех записей, результат совпадает с VectorizedProgram.run.
+        shard_size - количество записей в части (по умолчанию записи делятся поровну между процессами,
+        но не больше SHARD_SIZE в части)
+        """
+        missing = [name for name in self.program.inputs if name not in columns]
+        if missing:
+            raise ValueError(f'Не переданы входные переменные: {", ".join(missing)}')
+        columns = {name: np.ascontiguousarray(columns[name]) for name in self.program.inputs}
+        lengths = {len(column) for column in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError('Столбцы входных переменных разной длины')
+        size = lengths.pop() if lengths else 1
+        if shard_size is None:
+            shard_size = min(SHARD_SIZE, math.ceil(size / self.max_workers))
+        shard_size = max(shard_size, 1)
+
+        input_blocks = {}
+        try:
+            for name, column in columns.items():
+                input_blocks[name] = _SharedColumn.create(column)
+            descriptions = {name: block.description for name, block in input_blocks.items()}
+            futures = [
+                self.executor.submit(_run_shard, descriptions, start, min(start + shard_size, size))
+                for start in range(0, size, shard_size)
+            ]
+            return self._merge(columns, futures, size)
+        finally:
+            for block in input_blocks.values():
+                block.unlink()
+
+    def _merge(self, columns, futures, size):
+        """Сборка столбцов результата из частей. Блоки результата частей удаляются"""
+        shards = []
+        error = None
+        # Результаты ждём все, даже после ошибки: иначе блоки выполненных частей не будут удалены
+        for future in futures:
+            try:
+                shards.append(future.result())
+            except Exception as e:
+                error = error or e
+        try:
+            if error is not None:
+                raise error
+            result = {}
+            for name in self.program.variables:
+                parts = [(start, stop, shard[name]) for start, stop, shard in shards if name in shard]
+                if all(description is None for _, _, description in parts):
+                    # Входной столбец не изменился ни в одной части
+                    if name in columns:
+                        result[name] = columns[name]
+                    continue
+                dtypes = [description[0] for _, _, description in parts if description is not None]
+                if name in columns:
+                    dtypes.append(columns[name].dtype)
+                column = np.zeros(size, dtype=np.result_type(*dtypes))
+                if name in columns:
+                    column[:] = columns[name]
+                for start, stop, description in parts:
+                    if description is not None:
+                        with _SharedColumn.attach(description) as block:
+                            column[start:stop] = block.array
+                result[name] = column
+            return result
+        finally:
+            for _, _, shard in shards:
+                for description in shard.values():
+                    if description is not None:
+                        _SharedColumn.attach(description).unlink()
+
+    def close(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def run_sharded(commands: List, columns: Dict, max_workers: int = None, shard_size: int = None) -> Dict:
+    """Выполнение в нескольких процессах, входные переменные - все переданные столбцы"""
+    with ShardedRunner(commands, columns, max_workers=max_workers) as runner:
+        return runner.run(columns, shard_size=shard_size)
+
+
+class _SharedColumn(object):
+    """Столбец в блоке разделяемой памяти. description - (тип, длина, имя блока)"""
+
+    def __init__(self, memory, dtype, length):
+        self.memory = memory
+        self.array = np.ndarray((length,), dtype=dtype, buffer=memory.buf)
+
+    @property
+    def description(self):
+        return self.array.dtype, len(self.array), self.memory.name
+
+    @classmethod
+    def create(cls, values):
+        # Блок нулевого размера создать нельзя
+        memory = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        column = cls(memory, values.dtype, len(values))
+        column.array[:] = values
+        return column
+
+    @classmethod
+    def attach(cls, description):
+        dtype, length, name = description
+        return cls(shared_memory.SharedMemory(name=name), dtype, length)
+
+    def close(self):
+        # Массив ссылается на память блока, его нужно удалить до закрытия
+        self.array = None
+        try:
+            self.memory.close()
+        except BufferError:
+            # На память ещё ссылаются другие массивы (например, из трассировки исключения).
+            # Отображение памяти закроется, когда они будут удалены
+            pass
+
+    def unlink(self):
+        self.close()
+        self.memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _init_worker(program):
+    global _worker_program
+    _worker_program = program
+
+
+def _run_shard(input_descriptions, start, stop):
+    """
+    Выполнение записей [start, stop). Возвращает (start, stop, описания блоков столбцов результата).
+    Вместо описания None, если входной столбец не изменился
+    """
+    inputs = {name: _SharedColumn.attach(description) for name, description in input_descriptions.items()}
+    try:
+        return start, stop, _write_result(inputs, start, stop)
+    finally:
+        for block in inputs.values():
+            block.close()
+
+
+def _write_result(inputs, start, stop):
+    columns = {name: block.array[start:stop] for name, block in inputs.items()}
+    result = _worker_program.run(columns)
+    descriptions = {}
+    try:
+        for name, values in result.items():
+            if values is columns.get(name):
+                descriptions[name] = None
+            else:
+                block = _SharedColumn.create(values)
+                descriptions[name] = block.description
+                block.close()
+    except BaseException:
+        for description in descriptions.values():
+            if description is not None:
+                _SharedColumn.attach(description).unlink()
+        raise
+    return descriptions
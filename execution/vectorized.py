@@ -0,0 +1,256 @@
+"""
+Векторное выполнение программы сразу для многих входных записей (требуется numpy).
+
+Каждая переменная - столбец: массив значений по всем записям. Присваивание - операция над массивами.
+Переходы только вперёд, поэтому команды выполняются по порядку, а для каждой команды известна маска
+записей, которые до неё доходят. Условие делит маску на перешедшие и продолжившие записи,
+присваивание меняет значения только в записях маски (np.where).
+
+Отличия от выполнения по одной записи (vm, python_backend), где значения - числа Python:
+    чтение переменной, которая в какой-либо записи маски ещё не присвоена, - ValueError
+    (по одной записи неприсвоенная переменная - None), хотя в массиве на её месте есть значение;
+    целые - int64: при переполнении в записях маски - OverflowError, а не большое целое Python
+"""
+from typing import Dict, Iterable, List
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from lexical_analysis.const import INT
+from syntactical_analysis.commands import (
+    AssignmentCommand, ConditionCommand, GotoCommand, JumpTableCommand, NoopCommand, get_jump_targets,
+)
+from syntactical_analysis.temp_var import is_temp_name
+from .operands import is_literal, parse_literal, get_division_type
+
+__all__ = [
+    'VectorizedProgram',
+    'compile_vectorized',
+    'run_vectorized',
+]
+
+RELATION_FUNCTIONS_NAMES = {
+    '==': 'equal', '!=': 'not_equal', '<': 'less', '<=': 'less_equal', '>': 'greater', '>=': 'greater_equal',
+}
+ARITHMETIC_FUNCTIONS_NAMES = {'+': 'add', '-': 'subtract', '*': 'multiply'}
+
+
+class VectorizedProgram(object):
+    """
+    Программа для векторного выполнения.
+    inputs - переменные (из block_var_def), значения которых передаются столбцами.
+    Остальные переменные до присваивания в записи равны нулю своего типа
+    """
+
+    def __init__(self, commands: List, inputs: Iterable[str]):
+        if np is None:
+            raise ImportError('Для векторного выполнения нужен numpy')
+        for command_ind, command in enumerate(commands):
+            if any(target <= command_ind for target in get_jump_targets(command)):
+                raise ValueError('Векторное выполнение поддерживает только переходы вперёд')
+        self.commands = commands
+        self.inputs = list(inputs)
+        # Входные переменные и переменные программы
+        variables = dict.fromkeys(self.inputs)
+        for command in commands:
+            for name in [getattr(command, 'target', None), *getattr(command, 'operands', ())]:
+                if name and not is_literal(name) and not is_temp_name(name):
+                    variables[name] = None
+        self.variables = list(variables)
+
+    def run(self, columns: Dict) -> Dict:
+        """
+        Выполнение для всех записей. columns - столбец значений каждой входной переменной.
+        Возвращает столбцы входных переменных и переменных программы
+        """
+        missing = [name for name in self.inputs if name not in columns]
+        if missing:
+            raise ValueError(f'Не переданы входные переменные: {", ".join(missing)}')
+        values = {name: np.asarray(columns[name]) for name in self.inputs}
+        lengths = {len(column) for column in values.values()}
+        if len(lengths) > 1:
+            raise ValueError('Столбцы входных переменных разной длины')
+        size = lengths.pop() if lengths else 1
+        _Execution(self.commands, values, size).run()
+        return {name: values[name] for name in self.variables if name in values}
+
+
+def compile_vectorized(commands: List, inputs: Iterable[str]) -> VectorizedProgram:
+    return VectorizedProgram(commands, inputs)
+
+
+def run_vectorized(commands: List, columns: Dict) -> Dict:
+    """Векторное выполнение, входные переменные - все переданные столбцы"""
+    return VectorizedProgram(commands, columns).run(columns)
+
+
+class _Execution(object):
+    def __init__(self, commands, values, size):
+        self.commands = commands
+        self.values = values
+        self.size = size
+        # Индекс команды -> маска записей, которые на неё переходят
+        self.incoming = {}
+        # Переменная -> маска записей, в которых она присвоена. Входные и везде присвоенные переменные не хранятся
+        self.assigned = {}
+
+    def run(self):
+        commands_count = len(self.commands)
+        mask = np.ones(self.size, dtype=bool)
+        for command_ind, command in enumerate(self.commands):
+            jumped = self.incoming.pop(command_ind, None)
+            if jumped is not None:
+                mask = jumped if mask is None else mask | jumped
+            if mask is None or not mask.any():
+                mask = None
+                continue
+            if isinstance(command, AssignmentCommand):
+                self._assign(command.target, self._evaluate(command, mask), mask)
+            elif isinstance(command, ConditionCommand):
+                cond = self._operand(command.cond, mask)
+                if command.operation is not None:
+                    cond = getattr(np, RELATION_FUNCTIONS_NAMES[command.operation])(
+                        cond, self._operand(command.right, mask)
+                    )
+                cond = np.broadcast_to(np.asarray(cond, dtype=bool), (self.size,))
+                jump = mask & (~cond if command.negated else cond)
+                self._jump(command.goto_command_ind, jump)
+                mask = mask & ~jump
+            elif isinstance(command, GotoCommand):
+                self._jump(command.next_command_ind, mask)
+                mask = None
+            elif isinstance(command, JumpTableCommand):
+                self._jump_table(command, mask)
+                mask = None
+            elif not isinstance(command, NoopCommand):
+                raise TypeError(f'Неизвестная команда: {command}')
+        # Переходы на конец программы ничего не меняют
+        self.incoming.pop(commands_count, None)
+
+    def _jump(self, target, mask):
+        if target in self.incoming:
+            self.incoming[target] = self.incoming[target] | mask
+        else:
+            self.incoming[target] = mask
+
+    def _jump_table(self, command, mask):
+        """Индекс команды для каждой записи: targets[value - low] или default_command_ind вне таблицы"""
+        index = np.broadcast_to(np.asarray(self._operand(command.value, mask)), (self.size,)) - command.low
+        in_table = (index >= 0) & (index < len(command.targets))
+        table = np.asarray(command.targets)
+        targets = np.where(in_table, table[np.clip(index, 0, len(command.targets) - 1)], command.default_command_ind)
+        for target in np.unique(targets[mask]):
+            self._jump(int(target), mask & (targets == target))
+
+    def _evaluate(self, command, mask):
+        left = self._operand(command.source, mask)
+        if command.operation is None:
+            return left
+        right = self._operand(command.right, mask)
+        if command.operation == '/':
+            return self._divide(left, right, mask, get_division_type(command))
+        if command.operation in ARITHMETIC_FUNCTIONS_NAMES:
+            return self._calculate(command.operation, left, right, mask)
+        return getattr(np, RELATION_FUNCTIONS_NAMES[command.operation])(left, right)
+
+    @staticmethod
+    def _calculate(operation, left, right, mask):
+        """+, - или *. Для целых - проверка переполнения int64 в записях маски"""
+        with np.errstate(over='ignore'):
+            result = np.asarray(getattr(np, ARITHMETIC_FUNCTIONS_NAMES[operation])(left, right))
+            if np.issubdtype(result.dtype, np.integer):
+                _check_overflow(_get_overflow(operation, left, right, result), mask)
+        return result
+
+    @staticmethod
+    def _divide(left, right, mask, type_):
+        """
+        Деление по правилам языка: целые (type_ - INT) - с округлением к нулю, деление на ноль - ошибка.
+        Тип операции берётся из команды, а не из типа массивов
+        """
+        left, right = np.asarray(left), np.asarray(right)
+        zero = right == 0
+        if np.any(mask & zero):
+            raise ZeroDivisionError('Деление на ноль')
+        # В записях вне маски делитель может быть нулём, там результат не используется
+        right = np.where(zero, 1, right)
+        if type_ != INT:
+            return left / right
+        with np.errstate(over='ignore'):
+            # Округление вниз исправляется на округление к нулю, если частное отрицательно и не целое.
+            # abs не подходит: для наименьшего int64 он переполняется
+            quotient = left // right
+            quotient = np.where(((left < 0) != (right < 0)) & (left % right != 0), quotient + 1, quotient)
+        if np.issubdtype(quotient.dtype, np.integer):
+            _check_overflow((left == np.iinfo(quotient.dtype).min) & (right == -1), mask)
+        return quotient
+
+    def _assign(self, name, value, mask):
+        value = np.broadcast_to(np.asarray(value), (self.size,))
+        if name in self.assigned:
+            assigned = self.assigned[name] | mask
+            if assigned.all():
+                del self.assigned[name]
+            else:
+                self.assigned[name] = assigned
+        if name not in self.values:
+            if mask.all():
+                self.values[name] = value.copy()
+                return
+            # Значения в остальных записях не читаются (см. _operand)
+            self.assigned[name] = mask
+            self.values[name] = np.zeros_like(value)
+        current = self.values[name]
+        if current.dtype != value.dtype:
+            # Ячейка временной переменной может хранить значения разных типов
+            current = current.astype(value.dtype)
+        self.values[name] = np.where(mask, value, current)
+
+    def _operand(self, operand, mask):
+        if is_literal(operand):
+            return parse_literal(operand)
+        if operand not in self.values:
+            # Переменная ещё не присвоена ни в одной записи
+            raise ValueError(f'Переменная {operand} не входная и не присвоена')
+        if operand in self.assigned and (mask & ~self.assigned[operand]).any():
+            raise ValueError(f'Переменная {operand} читается до присваивания')
+        return self.values[operand]
+
+
+def _get_overflow(operation, left, right, result):
+    """Записи, в которых целая операция left operation right == result переполнилась"""
+    if operation != '-' and isinstance(left, int):
+        left, right = right, left
+    info = np.iinfo(result.dtype)
+    if isinstance(right, int):
+        # Правый операнд - константа: достаточно сравнить результат или левый операнд с границей
+        if right == 0:
+            return False
+        if operation == '*':
+            low, high = (info.min, info.max) if right > 0 else (info.max, info.min)
+            return (left < -(-low // right)) | (left > high // right)
+        grows = (right > 0) == (operation == '+')
+        return result < left if grows else result > left
+    left, right = np.asarray(left), np.asarray(right)
+    # При переполнении знак результата не согласуется со знаками операндов
+    if operation == '+':
+        return ((left ^ result) & (right ^ result)) < 0
+    if operation == '-':
+        return ((left ^ right) & (left ^ result)) < 0
+    # Произведение чисел меньше 2 ** 31 по модулю не переполняется - частый случай проверяется быстро
+    half = 2 ** 31
+    if ((left >= -half) & (left < half) & (right >= -half) & (right < half)).all():
+        return False
+    # Без переполнения произведение делится на left нацело и частное равно right,
+    # кроме -1 * min: частное min // -1 тоже переполняется
+    nonzero = left != 0
+    overflow = nonzero & (result // np.where(nonzero, left, 1) != right)
+    return overflow | ((left == -1) & (right == info.min))
+
+
+def _check_overflow(overflow, mask):
+    """OverflowError, если переполнение есть в записях маски. Вне маски результат не используется"""
+    if np.any(mask & overflow):
+        raise OverflowError('Переполнение целого (int64) при векторном выполнении')
@@ -0,0 +1,253 @@
+"""
+Виртуальная машина: выполнение команд, переведённых в байт-код.
+
+Байт-код - плоский список целых чисел: код операции и её аргументы. Переменные, временные переменные
+и константы хранятся в ячейках (slots), аргументы команд - индексы ячеек и адреса переходов.
+Сравнение и условный переход объединены в одну инструкцию (JUMP_IF_LT a b target и т.п.)
+"""
+from typing import Dict, List
+
+from compilation.semantics import divide
+from lexical_analysis.const import INT, FLOAT
+from syntactical_analysis.commands import (
+    AssignmentCommand, ConditionCommand, GotoCommand, JumpTableCommand, NoopCommand,
+)
+from syntactical_analysis.temp_var import is_temp_name
+from .operands import is_literal, parse_literal, get_division_type
+
+__all__ = [
+    'BytecodeProgram',
+    'compile_bytecode',
+    'run_bytecode',
+]
+
+# region Коды операций
+# dst src
+MOVE = 0
+# dst a b
+ADD = 1
+SUB = 2
+MUL = 3
+# Деление целых (с округлением к нулю) и вещественных. Тип известен при компиляции
+INT_DIV = 4
+FLOAT_DIV = 5
+EQ = 6
+NE = 7
+LT = 8
+LE = 9
+GT = 10
+GE = 11
+# target
+JUMP = 12
+# cond target
+JUMP_IF = 13
+JUMP_IF_NOT = 14
+# a b target: сравнение и переход, если результат истинен (JUMP_IF_*) или ложен (JUMP_UNLESS_*)
+JUMP_IF_EQ = 15
+JUMP_IF_NE = 16
+JUMP_IF_LT = 17
+JUMP_IF_LE = 18
+JUMP_IF_GT = 19
+JUMP_IF_GE = 20
+JUMP_UNLESS_EQ = 21
+JUMP_UNLESS_NE = 22
+JUMP_UNLESS_LT = 23
+JUMP_UNLESS_LE = 24
+JUMP_UNLESS_GT = 25
+JUMP_UNLESS_GE = 26
+# value low default count target0 ... target(count - 1)
+JUMP_TABLE = 27
+# endregion
+
+ARITHMETIC_OPCODES = {'+': ADD, '-': SUB, '*': MUL}
+DIV_OPCODES = {INT: INT_DIV, FLOAT: FLOAT_DIV}
+RELATION_OPCODES = {'==': EQ, '!=': NE, '<': LT, '<=': LE, '>': GT, '>=': GE}
+JUMP_IF_OPCODES = {
+    '==': JUMP_IF_EQ, '!=': JUMP_IF_NE, '<': JUMP_IF_LT, '<=': JUMP_IF_LE, '>': JUMP_IF_GT, '>=': JUMP_IF_GE,
+}
+JUMP_UNLESS_OPCODES = {
+    '==': JUMP_UNLESS_EQ, '!=': JUMP_UNLESS_NE, '<': JUMP_UNLESS_LT, '<=': JUMP_UNLESS_LE, '>': JUMP_UNLESS_GT,
+    '>=': JUMP_UNLESS_GE,
+}
+
+
+class BytecodeProgram(object):
+    """Байт-код программы и ячейки, с которых начинается выполнение"""
+
+    def __init__(self, code: List[int], slot_names: List[str], initial_slots: List):
+        self.code = code
+        # Имя переменной или текст константы в каждой ячейке
+        self.slot_names = slot_names
+        # Начальные значения ячеек: константы заполнены, переменные - None
+        self.initial_slots = initial_slots
+        self.slot_indices = {name: slot for slot, name in enumerate(slot_names)}
+        # Ячейки переменных программы (не временных и не констант)
+        self.variable_slots = {
+            name: slot for slot, name in enumerate(slot_names)
+            if not is_literal(name) and not is_temp_name(name)
+        }
+
+    def run(self, inputs: Dict = None) -> Dict:
+        """
+        Выполнение программы. inputs - начальные значения переменных.
+        Возвращает значения переменных. Переменные из inputs, которых нет в командах, не меняются
+        """
+        slots = list(self.initial_slots)
+        result = {}
+        if inputs:
+            variable_slots = self.variable_slots
+            for name, value in inputs.items():
+                if name in variable_slots:
+                    slots[variable_slots[name]] = value
+                else:
+                    result[name] = value
+        _execute(self.code, slots)
+        for name, slot in self.variable_slots.items():
+            result[name] = slots[slot]
+        return result
+
+
+def compile_bytecode(commands: List) -> BytecodeProgram:
+    """Перевод команд в байт-код. noop не переводятся, адреса переходов пересчитываются"""
+    slot_indices = {}
+    slot_names = []
+    initial_slots = []
+
+    def slot(operand: str) -> int:
+        if operand not in slot_indices:
+            slot_indices[operand] = len(slot_names)
+            slot_names.append(operand)
+            initial_slots.append(parse_literal(operand) if is_literal(operand) else None)
+        return slot_indices[operand]
+
+    code = []
+    # Адрес в байт-коде каждой команды и конца программы
+    addresses = []
+    # Позиции в code, где записаны индексы команд. После перевода они заменяются адресами
+    jump_positions = []
+    for command in commands:
+        addresses.append(len(code))
+        if isinstance(command, AssignmentCommand):
+            if command.operation is None:
+                code += [MOVE, slot(command.target), slot(command.source)]
+            else:
+                if command.operation == '/':
+                    opcode = DIV_OPCODES[get_division_type(command)]
+                else:
+                    opcode = ARITHMETIC_OPCODES.get(command.operation) or RELATION_OPCODES[command.operation]
+                code += [opcode, slot(command.target), slot(command.source), slot(command.right)]
+        elif isinstance(command, ConditionCommand):
+            if command.operation is None:
+                code += [JUMP_IF_NOT if command.negated else JUMP_IF, slot(command.cond)]
+            else:
+                opcodes = JUMP_UNLESS_OPCODES if command.negated else JUMP_IF_OPCODES
+                code += [opcodes[command.operation], slot(command.cond), slot(command.right)]
+            jump_positions.append(len(code))
+            code.append(command.goto_command_ind)
+        elif isinstance(command, GotoCommand):
+            code.append(JUMP)
+            jump_positions.append(len(code))
+            code.append(command.next_command_ind)
+        elif isinstance(command, JumpTableCommand):
+            code += [JUMP_TABLE, slot(command.value), command.low]
+            jump_positions.append(len(code))
+            code += [command.default_command_ind, len(command.targets)]
+            for target in command.targets:
+                jump_positions.append(len(code))
+                code.append(target)
+        elif not isinstance(command, NoopCommand):
+            raise TypeError(f'Неизвестная команда: {command}')
+    addresses.append(len(code))
+    for position in jump_positions:
+        code[position] = addresses[code[position]]
+    return BytecodeProgram(code, slot_names, initial_slots)
+
+
+def run_bytecode(commands: List, inputs: Dict = None) -> Dict:
+    """Перевод команд в байт-код и выполнение"""
+    return compile_bytecode(commands).run(inputs)
+
+
+def _execute(code, slots):
+    """
+    Цикл выполнения. Коды операций сравниваются по диапазонам, чтобы проверок на инструкцию было немного
+    """
+    pc = 0
+    end = len(code)
+    while pc < end:
+        op = code[pc]
+        if op == MOVE:
+            slots[code[pc + 1]] = slots[code[pc + 2]]
+            pc += 3
+        elif op <= GE:
+            a = slots[code[pc + 2]]
+            b = slots[code[pc + 3]]
+            if op <= FLOAT_DIV:
+                if op == ADD:
+                    result = a + b
+                elif op == SUB:
+                    result = a - b
+                elif op == MUL:
+                    result = a * b
+                elif op == INT_DIV:
+                    result = divide(a, b, INT)
+                else:
+                    result = a / b
+            elif op == EQ:
+                result = a == b
+            elif op == NE:
+                result = a != b
+            elif op == LT:
+                result = a < b
+            elif op == LE:
+                result = a <= b
+            elif op == GT:
+                result = a > b
+            else:
+                result = a >= b
+            slots[code[pc + 1]] = result
+            pc += 4
+        elif op <= JUMP_IF_NOT:
+            if op == JUMP:
+                pc = code[pc + 1]
+            elif op == JUMP_IF:
+                pc = code[pc + 2] if slots[code[pc + 1]] else pc + 3
+            else:
+                pc = pc + 3 if slots[code[pc + 1]] else code[pc + 2]
+        elif op <= JUMP_IF_GE:
+            a = slots[code[pc + 1]]
+            b = slots[code[pc + 2]]
+            if op == JUMP_IF_EQ:
+                jump = a == b
+            elif op == JUMP_IF_NE:
+                jump = a != b
+            elif op == JUMP_IF_LT:
+                jump = a < b
+            elif op == JUMP_IF_LE:
+                jump = a <= b
+            elif op == JUMP_IF_GT:
+                jump = a > b
+            else:
+                jump = a >= b
+            pc = code[pc + 3] if jump else pc + 4
+        elif op <= JUMP_UNLESS_GE:
+            a = slots[code[pc + 1]]
+            b = slots[code[pc + 2]]
+            if op == JUMP_UNLESS_EQ:
+                jump = a == b
+            elif op == JUMP_UNLESS_NE:
+                jump = a != b
+            elif op == JUMP_UNLESS_LT:
+                jump = a < b
+            elif op == JUMP_UNLESS_LE:
+                jump = a <= b
+            elif op == JUMP_UNLESS_GT:
+                jump = a > b
+            else:
+                jump = a >= b
+            # Переход, если сравнение ложно
+            pc = pc + 4 if jump else code[pc + 3]
+        else:
+            # JUMP_TABLE
+            index = slots[code[pc + 1]] - code[pc + 2]
+            pc = code[pc + 5 + index] if 0 <= index < code[pc + 4] else code[pc + 3]
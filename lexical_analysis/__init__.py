@@ -1 +1,2 @@
 from .analyzer import *
+from .parallel import *
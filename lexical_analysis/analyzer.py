@@ -1,34 +1,82 @@
-from typing import List
+import io
+import mmap
+import os
+from array import array
+from collections import defaultdict
+from typing import Iterator, List, Union
 
 from . import const
 from . import utils
 from .custom_exceptions import WrongSymbolException
-from .state_machine import STATE_TRANSITION_TABLE, STATE_TOKEN_MAPPING
+from .state_machine import (
+    STATE_TOKEN_MAPPING, STATES_WITH_RETURN, DIGITAL_CONST_STATES, COMMENT_STATE, WHITESPACE_STATE,
+    ERROR_STATE, CHAR_CLASSES, CLASSES_COUNT, TRANSITIONS,
+)
 from tokens import *
 
 __all__ = [
-    'LexicalAnalyzer'
+    'LexicalAnalyzer',
+    'iter_tokens',
+    'iter_mmap_tokens',
 ]
 
+# Размер блока, которым читается исходник при потоковом анализе (в символах)
+CHUNK_SIZE = 64 * 1024
+
+# region Константы для анализа байтов
+BYTES_WORDS_TOKENS_MAPPING = {word.encode(): token for word, token in WORDS_TOKENS_MAPPING.items()}
+NL_CODE = ord(const.KW_NL)
+END_PROG_BYTES = const.KW_END_PROG.encode()
+TAB_EQUIVALENT_SPACES_BYTES = const.TAB_EQUIVALENT_SPACES.encode()
+TAB_BYTES = const.KW_TAB.encode()
+TAB_VIEW = memoryview(TAB_BYTES)
+# endregion
+
 
 class LexicalAnalyzer:
     """Лексический анализатор"""
 
-    def __init__(self, source_file='tests/editable.txt', *args, **kwargs):
+    def __init__(self, source_file='tests/editable.txt', *args, compact=False, context=None, **kwargs):
         self.source_file = source_file  # type: str
         self.data = []  # type: List[str]
-        self.read()
-        self.tokens = []
+        if source_file is not None:
+            self.read()
+        # Таблицы идентификаторов и числовых констант берутся из контекста компиляции (CompilationContext).
+        # Без контекста используются общие таблицы модуля tokens
+        self.context = context
+        if context is None:
+            self.identifiers_table = identifiers_table
+            self.digital_consts_table = digital_consts_table
+        else:
+            self.identifiers_table = context.identifiers_table
+            self.digital_consts_table = context.digital_consts_table
+        # В компактном режиме токены хранятся в TokenBuffer: по 6 байт на токен
+        self.tokens = TokenBuffer(
+            identifiers=self.identifiers_table,
+            digital_consts=self.digital_consts_table,
+        ) if compact else []  # type: Union[List[Token], TokenBuffer]
         # Текущее состояние автомата
         self.current_state = 0
+        # Для повторного анализа изменённых строк (relex):
+        # состояние автомата в начале каждой строки data (и после последней) и количество токенов строки
+        self.line_states = array('b')
+        self.line_tokens_counts = array('I')
+        # Кодировка файла при анализе байтов (iter_mmap_tokens)
+        self.encoding = 'utf-8'
+        # Токены, уже найденные по байтам лексемы: конечное состояние -> {байты лексемы: токен}
+        self._bytes_tokens_cache = defaultdict(dict)
 
     def read(self):
         """Считывает код из файла"""
         with open(self.source_file) as f:
-            self.data = [
-                utils.change_prefix_to_tabs(line)
-                for line in f.readlines()
-            ]
+            self.read_file(f)
+
+    def read_file(self, f):
+        """Считывает код из открытого текстового файла"""
+        self.data = [
+            utils.change_prefix_to_tabs(line)
+            for line in f.readlines()
+        ]
 
     def write(self, filename='lexical_analysis_result.txt'):
         with open(filename, 'w') as f:
@@ -36,76 +84,294 @@ class LexicalAnalyzer:
 
     def analyze(self):
         """Анализ файла"""
-        for line in self.data:
+        self.line_states = array('b')
+        self.line_tokens_counts = array('I')
+        self._analyze_lines(self.data, self.tokens, self.line_states, self.line_tokens_counts)
+        self.line_states.append(self.current_state)
+
+    def relex(self, start_line, end_line, new_lines):
+        """
+        Повторный анализ после замены строк data[start_line:end_line] на new_lines.
+        Анализируются только новые строки и следующие за ними, пока состояние автомата в начале строки
+        отличается от прежнего (например, если правка открыла или закрыла многострочный комментарий).
+        Новые токены заменяют старые в tokens.
+        Строки делятся так же, как при чтении файла: последняя строка без перевода строки сливается
+        со вставкой после неё, поэтому анализируется заново вместе с new_lines. Без перевода строки может
+        заканчиваться только последняя строка файла: иначе ValueError (пробелы в начале следующей строки
+        уже заменены на табы, и её исходный текст не восстановить).
+        Возвращает (начало, прежний конец, новый конец) изменённого диапазона токенов
+        """
+        new_lines = list(new_lines)
+        if start_line and not self.data[start_line - 1].endswith('\n'):
+            start_line -= 1
+            new_lines.insert(0, self.data[start_line])
+        if new_lines and not new_lines[-1].endswith('\n') and end_line < len(self.data):
+            raise ValueError('Без перевода строки может заканчиваться только последняя строка')
+        new_lines = [utils.change_prefix_to_tabs(line) for line in utils.split_lines(''.join(new_lines))]
+        states, counts = self.line_states, self.line_tokens_counts
+        # Сумму считаем по более короткой части
+        if start_line < len(counts) // 2:
+            token_start = sum(counts[:start_line])
+        else:
+            token_start = len(self.tokens) - sum(counts[start_line:])
+
+        new_tokens = []
+        new_states = array('b')
+        new_counts = array('I')
+        self.current_state = states[start_line]
+        try:
+            self._analyze_lines(new_lines, new_tokens, new_states, new_counts)
+            relex_end_line = end_line
+            while relex_end_line < len(self.data) and self.current_state != states[relex_end_line]:
+                self._analyze_lines(self.data[relex_end_line:relex_end_line + 1], new_tokens, new_states, new_counts)
+                relex_end_line += 1
+        except Exception:
+            self.current_state = states[-1]
+            raise
+
+        old_token_end = token_start + sum(counts[start_line:relex_end_line])
+        self.tokens[token_start:old_token_end] = new_tokens
+        if relex_end_line == len(self.data):
+            # Дошли до конца файла, изменилось и конечное состояние
+            states[-1] = self.current_state
+        states[start_line:relex_end_line] = new_states
+        counts[start_line:relex_end_line] = new_counts
+        self.data[start_line:end_line] = new_lines
+        self.current_state = states[-1]
+        return token_start, old_token_end, token_start + len(new_tokens)
+
+    def _analyze_lines(self, lines, tokens, states, counts):
+        """Анализ строк с запоминанием состояния автомата в начале каждой строки и количества её токенов"""
+        for line in lines:
+            states.append(self.current_state)
+            tokens_count = len(tokens)
+            if line and line != '\n':
+                tokens.extend(self._iter_line_tokens(line))
+            counts.append(len(tokens) - tokens_count)
+
+    def iter_tokens(self, path_or_fileobj=None, chunk_size=CHUNK_SIZE) -> Iterator[Token]:
+        """
+        Потоковый анализ. Исходник читается блоками по chunk_size символов, токены возвращаются по мере разбора.
+        В памяти одновременно находятся только текущий блок и незаконченная строка
+        """
+        if path_or_fileobj is None:
+            path_or_fileobj = self.source_file
+        if isinstance(path_or_fileobj, (str, os.PathLike)):
+            with open(path_or_fileobj) as f:
+                yield from self._iter_file_tokens(f, chunk_size)
+        elif isinstance(path_or_fileobj, io.TextIOBase):
+            yield from self._iter_file_tokens(path_or_fileobj, chunk_size)
+        else:
+            # Бинарный файл декодируем так же, как это делает open()
+            f = io.TextIOWrapper(path_or_fileobj)
+            try:
+                yield from self._iter_file_tokens(f, chunk_size)
+            finally:
+                f.detach()
+
+    def _iter_file_tokens(self, f, chunk_size):
+        """Токены файла, читаемого блоками"""
+        for line in self._iter_lines(f, chunk_size):
+            line = utils.change_prefix_to_tabs(line)
             if line and line != '\n':
-                self._analyze_line(line)
+                yield from self._iter_line_tokens(line)
+
+    @staticmethod
+    def _iter_lines(f, chunk_size):
+        """Строки файла (вместе с переводом строки), собранные из блоков ограниченного размера"""
+        # Начало строки, не закончившейся в предыдущих блоках
+        pending = []
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            start = 0
+            end = chunk.find('\n')
+            while end != -1:
+                if pending:
+                    pending.append(chunk[start:end + 1])
+                    yield ''.join(pending)
+                    pending = []
+                else:
+                    yield chunk[start:end + 1]
+                start = end + 1
+                end = chunk.find('\n', start)
+            if start < len(chunk):
+                pending.append(chunk[start:])
+        if pending:
+            yield ''.join(pending)
+
+    def iter_mmap_tokens(self, path=None, encoding='utf-8') -> Iterator[Token]:
+        """
+        Анализ файла, отображённого в память (mmap). Автомат работает над байтами,
+        лексемы - срезы memoryview без копирования. Строка создаётся только при первом занесении
+        идентификатора в таблицу, тела комментариев не декодируются.
+        Кодировка должна совпадать с ASCII на латинице, цифрах и знаках (utf-8, cp1251)
+        """
+        if path is None:
+            path = self.source_file
+        self.encoding = encoding
+        with open(path, 'rb') as f:
+            if not os.fstat(f.fileno()).st_size:
+                # Пустой файл отобразить нельзя
+                return
+            codes = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        line = memoryview(codes)
+        try:
+            yield from self._iter_bytes_tokens(codes, line, 0, len(codes))
+        finally:
+            try:
+                line.release()
+                codes.close()
+            except BufferError:
+                # На срезы ещё есть ссылки (например, из трассировки исключения).
+                # Отображение закроется при сборке мусора
+                pass
+
+    def _iter_bytes_tokens(self, codes, line, start, end):
+        """Токены байтов codes[start:end], разбитых на строки. line - memoryview над теми же байтами"""
+        # Ближайший '\r'. Как и open(), приводим переводы строк '\r\n' и '\r' к '\n'
+        carriage_return = codes.find(b'\r', start, end)
+        while start < end:
+            line_end = codes.find(b'\n', start, end)
+            line_end = end if line_end == -1 else line_end + 1
+            if carriage_return == -1 or carriage_return >= line_end:
+                yield from self._iter_bytes_line_tokens(codes, line, start, line_end)
+            else:
+                # Такую строку приходится скопировать
+                copied = codes[start:carriage_return] + b'\n'
+                yield from self._iter_bytes_line_tokens(copied, memoryview(copied), 0, len(copied))
+                line_end = carriage_return + 1
+                if codes[line_end:line_end + 1] == b'\n':
+                    line_end += 1
+                carriage_return = codes.find(b'\r', line_end, end)
+            start = line_end
+
+    def _iter_bytes_line_tokens(self, codes, line, start, end):
+        """Токены строки codes[start:end] (вместе с переводом строки)"""
+        if end - start == 1 and codes[start] == NL_CODE:
+            # Пустая строка
+            return
+        if end - start == len(END_PROG_BYTES) and codes[start:end] == END_PROG_BYTES:
+            yield END_PROG_TOKEN
+        if codes[start:min(start + len(TAB_EQUIVALENT_SPACES_BYTES), end)] == TAB_EQUIVALENT_SPACES_BYTES:
+            # Аналог utils.change_prefix_to_tabs: первые пробелы в начале строки считаются табом
+            for new_state, lexeme in self._scan(TAB_VIEW, TAB_BYTES):
+                yield self._get_bytes_token(new_state, lexeme)
+            start += len(TAB_EQUIVALENT_SPACES_BYTES)
+        for new_state, lexeme in self._scan(line, codes, start, end):
+            token_ = self._get_bytes_token(new_state, lexeme)
+            if token_:
+                yield token_
+
+    def _get_bytes_token(self, new_state, lexeme):
+        """Токен лексемы - среза memoryview, распознанной в конечном состоянии new_state"""
+        token_ = BYTES_WORDS_TOKENS_MAPPING.get(lexeme)
+        if token_ is not None:
+            return token_
+        token_ = STATE_TOKEN_MAPPING.get(new_state)
+        if token_ is not None:
+            return token_
+        # Идентификаторы и константы кэшируются по байтам лексемы,
+        # поэтому строка создаётся только для новой лексемы
+        cache = self._bytes_tokens_cache[new_state]
+        token_ = cache.get(lexeme)
+        if token_ is None:
+            lexeme = bytes(lexeme)
+            token_ = self._get_token(new_state, lexeme.decode('ascii'))
+            cache[lexeme] = token_
+        return token_
 
     def _analyze_line(self, line):
         """Анализ строки файла """
+        self.tokens.extend(self._iter_line_tokens(line))
+
+    def _iter_line_tokens(self, line):
+        """Токены строки файла"""
         if line == 'end_prog':
-            self.tokens.append(END_PROG_TOKEN)
-        left, right = 0, 0
-        while right <= len(line) - 1:
-
-            symbol_ = line[right]
-            if symbol_ in const.DIGITS_STR:
-                table_key = 'digits'
-            elif symbol_ in const.LETTERS and not self.current_state == 10:
-                table_key = 'letters'
-            else:
-                table_key = symbol_
+            yield END_PROG_TOKEN
+        for new_state, lexeme in self._scan(line):
+            token_ = self._get_token(new_state, lexeme)
+            if token_:
+                yield token_
 
-            if table_key not in STATE_TRANSITION_TABLE:
-                table_key = 'another'
-            if self.current_state == 2 and table_key != '}':
-                right += 1
-                continue
-            elif self.current_state == 2 and table_key == '}':
-                self.current_state = 0
+    def _scan(self, line, codes=None, start=0, end=None):
+        """
+        Проход автомата по строке line[start:end].
+        Возвращает пары (конечное состояние, лексема). Состояние автомата сохраняется между строками.
+        codes - байты строки, по которым определяются классы символов. Для строки str не передаются
+        """
+        if codes is None:
+            # Символы с кодом больше 255 заменятся на '?', который, как и они, относится к классу 'another'
+            codes = line.encode('latin-1', 'replace')
+        transitions = TRANSITIONS
+        char_classes = CHAR_CLASSES
+        classes_count = CLASSES_COUNT
+
+        state = self.current_state
+        left, right = start, start
+        length = len(codes) if end is None else end
+        while right < length:
+            if state == COMMENT_STATE:
+                # Пропускаем тело комментария целиком
+                right = codes.find(b'}', right, length)
+                if right == -1:
+                    # Комментарий продолжается на следующей строке
+                    break
+                state = 0
                 right += 1
                 left = right
                 continue
-            new_state = STATE_TRANSITION_TABLE[table_key][self.current_state]
-            if new_state == const.INF:
-                raise WrongSymbolException(symbol_)
+            new_state = transitions[state * classes_count + char_classes[codes[right]]]
+            if new_state == ERROR_STATE:
+                self.current_state = state
+                if isinstance(line, str):
+                    raise WrongSymbolException(line[right])
+                raise WrongSymbolException(bytes(codes[right:right + 4]).decode(self.encoding, 'ignore')[:1])
             if new_state < 0:
                 # Пришли в конечное состояние
-                lexeme = line[left:right + (left == right)]
-                # print(new_state, self.current_state, lexeme)
-                # Проверим, является ли лексема ключевым словом
-                if lexeme in const.KEYWORDS:
-                    # Является, добавим соответствующий токен
-                    self.tokens.append(WORDS_TOKENS_MAPPING[lexeme])
-                else:
-                    # Не является
-                    # Проверим, является ли заранее определенный токеном
-                    if new_state in STATE_TOKEN_MAPPING:
-                        # Является
-                        self.tokens.append(STATE_TOKEN_MAPPING[new_state])
-                    else:
-                        # Не является, а значит это или числовая константа, или идентификатор
-                        # Числовую константу можно получить из конечных состояний -21 и -22
-                        if new_state in [-21, -22]:
-                            if new_state == -21:
-                                # Числовая константа целового типа
-                                token_type = const.INT
-                            else:
-                                # Числовая константа вещественного типа
-                                token_type = const.FLOAT
-                            self.tokens.append(DigitalConstToken.get_or_create(lexeme=lexeme, type=token_type))
-                        else:
-                            token_ = IdentifierToken.get_or_create(lexeme)
-                            if token_:
-                                self.tokens.append(token_)
-
-                if new_state in [-11, -12, -13, -16, -18, -20, -21, -22]:
-                    # Состояния с возвратом 1.
-                    left = right
-                else:
+                if new_state != WHITESPACE_STATE or right - left > 1:
+                    # Одиночный пробел токена не даёт, его можно не возвращать
+                    yield new_state, line[left:right + (left == right)]
+                if new_state not in STATES_WITH_RETURN:
                     # Состояния с возвратом 0
                     right += 1
-                    left = right
-                self.current_state = 0
+                # Состояния с возвратом 1 обрабатывают текущий символ заново
+                left = right
+                state = 0
             else:
                 right += 1
-                self.current_state = new_state
+                state = new_state
+        self.current_state = state
+
+    def _get_token(self, new_state, lexeme):
+        """Токен лексемы, распознанной в конечном состоянии new_state"""
+        # Проверим, является ли лексема ключевым словом
+        token_ = WORDS_TOKENS_MAPPING.get(lexeme)
+        if token_ is not None:
+            return token_
+        # Проверим, является ли заранее определенный токеном
+        token_ = STATE_TOKEN_MAPPING.get(new_state)
+        if token_ is not None:
+            return token_
+        # Не является, а значит это или числовая константа, или идентификатор
+        # Числовую константу можно получить из конечных состояний -21 и -22
+        if new_state in DIGITAL_CONST_STATES:
+            if new_state == -21:
+                # Числовая константа целового типа
+                token_type = const.INT
+            else:
+                # Числовая константа вещественного типа
+                token_type = const.FLOAT
+            return DigitalConstToken.get_or_create(lexeme=lexeme, type=token_type, table=self.digital_consts_table)
+        return IdentifierToken.get_or_create(lexeme, table=self.identifiers_table)
+
+
+def iter_tokens(path_or_fileobj, chunk_size=CHUNK_SIZE, context=None) -> Iterator[Token]:
+    """Потоковый анализ файла без загрузки его целиком в память"""
+    return LexicalAnalyzer(source_file=None, context=context).iter_tokens(path_or_fileobj, chunk_size)
+
+
+def iter_mmap_tokens(path, encoding='utf-8', context=None) -> Iterator[Token]:
+    """Анализ байтов файла, отображённого в память"""
+    return LexicalAnalyzer(source_file=None, context=context).iter_mmap_tokens(path, encoding)
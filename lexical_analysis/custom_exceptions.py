@@ -6,3 +6,8 @@ __all__ = [
 class WrongSymbolException(Exception):
     def __init__(self, symbol):
         super().__init__(f'Неожиданный символ {symbol}')
+        self.symbol = symbol
+
+    def __reduce__(self):
+        # Для передачи исключения между процессами
+        return self.__class__, (self.symbol,)
@@ -0,0 +1,139 @@
+import mmap
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from .analyzer import LexicalAnalyzer
+from .custom_exceptions import WrongSymbolException
+from .state_machine import COMMENT_STATE
+from tokens import TokenBuffer, IdentifierToken, DigitalConstToken, identifiers_table, digital_consts_table
+
+__all__ = [
+    'analyze_parallel',
+]
+
+# Примерный размер части файла, которую анализирует один процесс (в байтах)
+CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def analyze_parallel(path, max_workers=None, chunk_size=CHUNK_SIZE, encoding='utf-8', context=None) -> TokenBuffer:
+    """
+    Параллельный анализ файла в нескольких процессах.
+    Файл делится на части по границам строк. Состояние автомата в начале каждой части (внутри комментария
+    или нет) находится предварительным проходом по скобкам { }. Каждая часть анализируется над байтами
+    (как в iter_mmap_tokens) со своими таблицами идентификаторов и констант, затем значения токенов
+    переводятся в общую нумерацию таблиц контекста context. Результат совпадает с LexicalAnalyzer.analyze()
+    """
+    if context is None:
+        tables = identifiers_table, digital_consts_table
+    else:
+        tables = context.identifiers_table, context.digital_consts_table
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return TokenBuffer(identifiers=tables[0], digital_consts=tables[1])
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as codes:
+            bounds = _split(codes, chunk_size)
+            states = _comment_states(codes, bounds)
+
+    tasks = [
+        (path, start, end, state, encoding)
+        for (start, end), state in zip(zip(bounds, bounds[1:]), states)
+    ]
+    result = TokenBuffer(identifiers=tables[0], digital_consts=tables[1])
+    if len(tasks) == 1:
+        _merge(result, _analyze_chunk(*tasks[0]))
+        return result
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for chunk_result in executor.map(_analyze_chunk, *zip(*tasks)):
+            _merge(result, chunk_result)
+    return result
+
+
+def _split(codes, chunk_size):
+    """Границы частей файла. Каждая часть, кроме последней, заканчивается переводом строки"""
+    bounds = [0]
+    while bounds[-1] < len(codes):
+        end = codes.find(b'\n', bounds[-1] + chunk_size - 1)
+        bounds.append(len(codes) if end == -1 else end + 1)
+    return bounds
+
+
+def _comment_states(codes, bounds):
+    """
+    Состояние автомата в начале каждой части.
+    В начале строки автомат находится либо в состоянии 0, либо внутри комментария. Вне комментария любая {
+    его открывает, внутри - первая } закрывает
+    """
+    states = [0]
+    state = 0
+    position = 0
+    for bound in bounds[1:-1]:
+        while True:
+            position = codes.find(b'}' if state == COMMENT_STATE else b'{', position, bound)
+            if position == -1:
+                break
+            state = 0 if state == COMMENT_STATE else COMMENT_STATE
+            position += 1
+        states.append(state)
+        position = bound
+    return states
+
+
+def _analyze_chunk(path, start, end, state, encoding):
+    """
+    Анализ части файла в процессе-исполнителе.
+    Возвращает коды и значения токенов в локальной нумерации, а также локальные таблицы
+    """
+    # compilation импортирует lexical_analysis, поэтому импортируем здесь
+    from compilation import CompilationContext
+
+    # Для каждой части - свои таблицы
+    context = CompilationContext()
+    analyzer = LexicalAnalyzer(source_file=None, compact=True, context=context)
+    analyzer.current_state = state
+    analyzer.encoding = encoding
+    with open(path, 'rb') as f:
+        f.seek(start)
+        codes = f.read(end - start)
+    error = None
+    try:
+        analyzer.tokens.extend(analyzer._iter_bytes_tokens(codes, memoryview(codes), 0, len(codes)))
+    except WrongSymbolException as e:
+        # Таблицы к моменту ошибки передаём вместе с ней, чтобы они совпали с последовательным анализом
+        error = e
+    return (
+        analyzer.tokens.codes.tobytes(),
+        analyzer.tokens.values.tobytes(),
+        [token.attr_name for token in context.identifiers_table],
+        [(token.attr, token.type) for token in context.digital_consts_table],
+        error,
+    )
+
+
+def _merge(result, chunk_result):
+    """Перевод токенов части в общую нумерацию таблиц и добавление в result"""
+    codes_bytes, values_bytes, identifiers, digital_consts, error = chunk_result
+    # Локальный номер -> общий. Порядок первого появления внутри части сохраняется,
+    # поэтому общая нумерация совпадает с последовательным анализом
+    identifiers_mapping = [
+        IdentifierToken.get_or_create(name, table=result.identifiers).value for name in identifiers
+    ]
+    digital_consts_mapping = [
+        DigitalConstToken.get_or_create(lexeme=attr, type=type_, table=result.digital_consts).value
+        for attr, type_ in digital_consts
+    ]
+    if error is not None:
+        raise error
+
+    codes = array('H')
+    codes.frombytes(codes_bytes)
+    values = array('I')
+    values.frombytes(values_bytes)
+    result.codes.extend(codes)
+    result.values.extend(array('I', (
+        identifiers_mapping[value] if code == IdentifierToken.CODE else
+        digital_consts_mapping[value] if code == DigitalConstToken.CODE else
+        value
+        for code, value in zip(codes, values)
+    )))
@@ -1,9 +1,19 @@
-from lexical_analysis.const import INF
+from array import array
+
+from lexical_analysis.const import INF, DIGITS_STR, LETTERS
 from tokens import *
 
 __all__ = [
     'STATE_TRANSITION_TABLE',
     'STATE_TOKEN_MAPPING',
+    'STATES_WITH_RETURN',
+    'DIGITAL_CONST_STATES',
+    'COMMENT_STATE',
+    'WHITESPACE_STATE',
+    'ERROR_STATE',
+    'CHAR_CLASSES',
+    'CLASSES_COUNT',
+    'TRANSITIONS',
 ]
 
 STATE_TRANSITION_TABLE = {
@@ -51,3 +61,60 @@ STATE_TOKEN_MAPPING = {
     -19: LESS_EQUAL_TOKEN,
     -25: POINT_TOKEN,
 }
+
+# Конечные состояния с возвратом 1 (текущий символ не входит в лексему)
+STATES_WITH_RETURN = frozenset([-11, -12, -13, -16, -18, -20, -21, -22])
+# Конечные состояния числовых констант: целой и вещественной
+DIGITAL_CONST_STATES = (-21, -22)
+# Состояние внутри комментария { ... }
+COMMENT_STATE = 2
+# Конечное состояние для пробелов
+WHITESPACE_STATE = -11
+
+# region Скомпилированная таблица переходов
+# Вместо INF используется целое число, не совпадающее ни с одним состоянием.
+# Все состояния помещаются в signed char, поэтому таблица - array('b')
+ERROR_STATE = 127
+
+STATES_COUNT = len(STATE_TRANSITION_TABLE['another'])
+
+
+def _table_key(symbol, state):
+    """Ключ STATE_TRANSITION_TABLE для символа в состоянии state"""
+    if symbol in DIGITS_STR:
+        table_key = 'digits'
+    elif symbol in LETTERS and not state == 10:
+        table_key = 'letters'
+    else:
+        table_key = symbol
+    if table_key not in STATE_TRANSITION_TABLE:
+        table_key = 'another'
+    return table_key
+
+
+def _compile():
+    """
+    Компиляция STATE_TRANSITION_TABLE в плоскую таблицу.
+    Символы с одинаковыми переходами во всех состояниях объединяются в один класс.
+    Символы с кодом больше 255 ведут себя как 'another'
+    """
+    columns = {}  # Столбец переходов -> номер класса
+    char_classes = []
+    for code in range(256):
+        column = []
+        for state in range(STATES_COUNT):
+            new_state = STATE_TRANSITION_TABLE[_table_key(chr(code), state)][state]
+            column.append(ERROR_STATE if new_state == INF else new_state)
+        char_classes.append(columns.setdefault(tuple(column), len(columns)))
+
+    transitions = array('b', [ERROR_STATE]) * (STATES_COUNT * len(columns))
+    for column, class_ in columns.items():
+        for state, new_state in enumerate(column):
+            transitions[state * len(columns) + class_] = new_state
+    return bytes(char_classes), len(columns), transitions
+
+
+# Класс символа по его коду (256 байт) и плоский массив переходов (array('b')):
+# новое состояние = TRANSITIONS[state * CLASSES_COUNT + CHAR_CLASSES[code]]
+CHAR_CLASSES, CLASSES_COUNT, TRANSITIONS = _compile()
+# endregion
@@ -6,3 +6,12 @@ def change_prefix_to_tabs(str_: str) -> str:
     while str_.startswith(const.TAB_EQUIVALENT_SPACES):
         str_ = '\t' + str_.removeprefix(const.TAB_EQUIVALENT_SPACES)
     return str_
+
+
+def split_lines(text: str) -> list:
+    """Деление текста на строки вместе с переводом строки, как при чтении файла"""
+    lines = [line + '\n' for line in text.split('\n')]
+    lines[-1] = lines[-1][:-1]
+    if not lines[-1]:
+        lines.pop()
+    return lines
@@ -1,11 +1,27 @@
+import os
+
 from lexical_analysis import LexicalAnalyzer
 from syntactical_analysis import SyntacticalAnalyzer
+from compilation import CompilationContext
+from compilation.cache import CompilationCache
+
+SOURCE_FILE = 'tests/editable.txt'
+# Каталог кэша компиляции: повторный запуск с тем же исходником не вызывает анализаторы.
+# По умолчанию - ~/.cache/tac, TAC_CACHE_DIR задаёт другой каталог, пустое значение отключает кэш
+CACHE_DIR = os.environ.get('TAC_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'tac'))
+
 
+if CACHE_DIR:
+    cache = CompilationCache(CACHE_DIR)
+    result = cache.compile_file(SOURCE_FILE)
+    result.write('lexical_analysis_result.txt', 'syntactical_analysis_result.txt')
+else:
+    context = CompilationContext()
 
-lexical_analyzer = LexicalAnalyzer()
-lexical_analyzer.analyze()
-lexical_analyzer.write()
+    lexical_analyzer = LexicalAnalyzer(SOURCE_FILE, context=context)
+    lexical_analyzer.analyze()
+    lexical_analyzer.write()
 
-syntactical_analyzer = SyntacticalAnalyzer(lexical_analyzer.tokens)
-syntactical_analyzer.analyze()
-syntactical_analyzer.write()
+    syntactical_analyzer = SyntacticalAnalyzer(lexical_analyzer.tokens, context=context)
+    syntactical_analyzer.analyze()
+    syntactical_analyzer.write()
@@ -1 +1,2 @@
-from .analyzer import SyntacticalAnalyzer
\ No newline at end of file
+from .analyzer import SyntacticalAnalyzer
+from .binary_format import *
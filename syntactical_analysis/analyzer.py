@@ -1,15 +1,16 @@
 from copy import deepcopy
-from typing import List
+from typing import List, Union
 
+from compilation.context import CompilationContext, default_context
 from tokens import (
-    Token, IdentifierToken, DigitalConstToken,
+    Token, TokenBuffer, TokenView, IdentifierToken, DigitalConstToken,
     CLASS_TOKEN, COLON_TOKEN, NL_TOKEN, TAB_TOKEN, START_PROG_TOKEN, END_PROG_TOKEN,
     BLOCK_VAR_DEF_TOKEN, ENDBLOCK_VAR_DEF_TOKEN, MATCH_TOKEN, CASE_TOKEN, POINT_TOKEN,
     INT_TOKEN, FLOAT_TOKEN, BOOL_TOKEN, UNDERSCORE_TOKEN,
     PLUS_TOKEN, MINUS_TOKEN, DIV_TOKEN, MULT_TOKEN, AND_TOKEN, OR_TOKEN, NOT_TOKEN,
     EQUAL_TOKEN, NOT_EQUAL_TOKEN, LESS_TOKEN, MORE_TOKEN, LESS_EQUAL_TOKEN, MORE_EQUAL_TOKEN,
     ASSIGNMENT_TOKEN,
-    TRUE_TOKEN, FALSE_TOKEN,
+    TRUE_TOKEN, FALSE_TOKEN, OPEN_BRACKET_TOKEN, CLOSE_BRACKET_TOKEN,
 )
 from .custom_exceptions import (
     IdentifierRedeclarationException, TabExpectedException, NewLineExpectedException, TypeNameExpectedException,
@@ -18,19 +19,34 @@ from .custom_exceptions import (
     CaseExpectedError, DigitalConstExpectedError, ColonExpectedError
 )
 from .expression_analyzer import ExpressionAnalyzer
-from .commands import commands, fix_commands
+from .binary_format import dump_binary
+from .commands import NoopCommand, fix_commands, get_jump_targets, map_jump_targets
+from .optimizer import optimize
+from .temp_allocation import TempAllocation, allocate_temps
 from .match_case_data import MatchCaseData, CaseData
 
 
 class SyntacticalAnalyzer(object):
     """Синтаксический анализатор"""
 
-    def __init__(self, tokens: List[Token]):
+    def __init__(
+            self, tokens: Union[List[Token], TokenBuffer], context: CompilationContext = None, optimization=True
+    ):
         self.tokens = tokens
+        # Контекст компиляции, в который записываются команды. Должен совпадать с контекстом лексического анализа
+        self.context = default_context if context is None else context
+        # Оптимизировать ли команды после генерации и распределять ли временные переменные по ячейкам
+        self.optimization = optimization
+        # Результат распределения временных переменных (TempAllocation)
+        self.temp_allocation = None
 
     def write(self, filename='syntactical_analysis_result.txt'):
         with open(filename, 'w') as f:
-            f.write('\n'.join(map(str, commands)))
+            f.write('\n'.join(map(str, self.context.commands)))
+
+    def write_binary(self, filename='syntactical_analysis_result.tac'):
+        """Запись команд в двоичном формате (binary_format), загружаются load_binary"""
+        dump_binary(self.context.commands, filename)
 
     @staticmethod
     def _add_identifier_category(token: IdentifierToken, category, type_token=None):
@@ -45,16 +61,22 @@ class SyntacticalAnalyzer(object):
             # Объявляем переменную
             if type_token not in [INT_TOKEN, FLOAT_TOKEN, BOOL_TOKEN]:
                 # Значит имеем дело с классом.
-                # Скопируем поля
-                token.fields = deepcopy(type_token.fields)
-                print()
+                # Скопируем поля (без самого класса, на который они ссылаются), теперь они принадлежат переменной
+                token.fields = deepcopy(type_token.fields, {id(type_token): type_token})
+                for field in token.fields:
+                    field.parent = token
 
     def _clean_nl_tokens(self):
         """Очистка перевода строк"""
-        while len(self.tokens) and self.tokens[0] == NL_TOKEN:
-            self.tokens.pop(0)
+        self.tokens.skip(NL_TOKEN)
+
+    def _prev_token(self, index):
+        """Предыдущий токен. Перед блоком описания переменных считаем, что был перевод строки"""
+        return self.tokens[index - 1] if index else NL_TOKEN
 
     def analyze(self):
+        # Разбираем представление потока токенов: начало сдвигается по индексу, поток не копируется
+        self.tokens = TokenView(self.tokens)
         if self.tokens[0] != START_PROG_TOKEN:
             # Программа должна начинаться с start_prog
             raise StartProgExpectedError()
@@ -62,9 +84,8 @@ class SyntacticalAnalyzer(object):
             # И заканчиваться на end_prog
             raise EndProgExpectedError()
 
-        # Удалим start_prog и end_prog. Они нам больше не нужны
-        self.tokens.pop(0)  # Удаляем start_prog
-        self.tokens.pop(-1)  # Удаляем end_prog
+        # Отбросим start_prog и end_prog. Они нам больше не нужны
+        self.tokens = self.tokens[1:-1]
 
         # Если дошли сюда, значит ожидаем встретить перевод строки и блок объявления переменных
         self._clean_nl_tokens()  # Очистим от перевода строк
@@ -79,11 +100,10 @@ class SyntacticalAnalyzer(object):
             raise EndBlockVarDefExpectedError()
 
         # Дошли до сюда, значит есть блок описания идентификаторов
-        self.tokens.pop(0)  # Удалим block_var_def
+        self.tokens.advance()  # Пропустим block_var_def
         self._clean_nl_tokens()
-        self.tokens.insert(0, NL_TOKEN)  # Хак для удобства
         endblock_var_def_index = self._var_definition()
-        self.tokens = self.tokens[endblock_var_def_index + 1::]
+        self.tokens = self.tokens[endblock_var_def_index + 1:]
 
         # Очистим таблицу идентификатором от идентификаторов без категории.
         # Такие могли появиться из-за того, что поля класса вносились в таблицу идентификаторов
@@ -93,6 +113,86 @@ class SyntacticalAnalyzer(object):
 
         self._clean_nl_tokens()
 
+        self._analyze_statements()
+        fix_commands(self.context.commands)
+        if self.optimization:
+            self.context.commands[:] = optimize(self.context.commands)
+            self.temp_allocation = allocate_temps(self.context.commands)
+
+    def analyze_stream(self, output) -> int:
+        """
+        Потоковый анализ: self.tokens - поток токенов (например, LexicalAnalyzer.iter_tokens), output - текстовый
+        файл. Токены читаются по одному оператору (строке или блоку match). Команды оператора генерируются
+        в пустой context.commands с индексами от начала оператора, оптимизируются отдельно, сдвигаются
+        на количество уже записанных команд и записываются в output так же, как write().
+        Переходы из оператора ведут только внутрь него или на следующий оператор, поэтому в памяти
+        находятся только токены и команды текущего оператора (и таблицы идентификаторов и констант).
+        Ошибки проверяются по мере чтения: команды операторов до ошибки уже записаны.
+        Возвращает количество записанных команд
+        """
+        tokens = iter(self.tokens)
+        if next(tokens, None) != START_PROG_TOKEN:
+            raise StartProgExpectedError()
+        tokens = _without_end_prog(tokens)
+
+        # region Объявление переменных
+        token = next(tokens, None)
+        while token == NL_TOKEN:
+            token = next(tokens, None)
+        if token != BLOCK_VAR_DEF_TOKEN:
+            raise BlockVarDefExpectedError()
+        token = next(tokens, None)
+        while token == NL_TOKEN:
+            token = next(tokens, None)
+        var_definition_tokens = []
+        while token != ENDBLOCK_VAR_DEF_TOKEN:
+            if token is None:
+                raise EndBlockVarDefExpectedError()
+            var_definition_tokens.append(token)
+            token = next(tokens, None)
+        var_definition_tokens.append(token)
+        self.tokens = TokenView(var_definition_tokens)
+        self._var_definition()
+        # endregion
+
+        commands = self.context.commands
+        commands.clear()
+        commands_count = 0
+        # Наибольший индекс, на который есть переход, и добавлен ли noop в конец программы (fix_commands)
+        max_command_ind = -1
+        has_end_noop = False
+        allocation = TempAllocation() if self.optimization else None
+        for statement, is_last in _iter_statements(tokens):
+            self.tokens = TokenView(statement)
+            self._analyze_statements()
+            if is_last:
+                # Переход на конец программы может быть только из последнего оператора
+                fix_commands(commands)
+                has_end_noop = bool(commands) and isinstance(commands[-1], NoopCommand)
+            if self.optimization:
+                commands[:] = optimize(commands)
+                statement_allocation = allocate_temps(commands)
+                allocation.temps_count += statement_allocation.temps_count
+                allocation.slots_count = max(allocation.slots_count, statement_allocation.slots_count)
+                allocation.peak_live = max(allocation.peak_live, statement_allocation.peak_live)
+            first_command_ind = commands_count
+            for command in commands:
+                map_jump_targets(command, lambda command_ind: command_ind + first_command_ind)
+                max_command_ind = max(max_command_ind, *get_jump_targets(command), -1)
+                # Команды разделяются переводом строки, как в write()
+                output.write(f'\n{command}' if commands_count else str(command))
+                commands_count += 1
+            commands.clear()
+        if has_end_noop and max_command_ind == commands_count:
+            # Оптимизатор последнего оператора удалил noop, на который переходят предыдущие операторы.
+            # При оптимизации всей программы он остался бы
+            output.write(f'\n{NoopCommand()}' if commands_count else str(NoopCommand()))
+            commands_count += 1
+        self.temp_allocation = allocation
+        return commands_count
+
+    def _analyze_statements(self):
+        """Разбор операторов (выражений и блока match) из self.tokens с генерацией команд"""
         current_token_index = 0
         tokens_count = len(self.tokens)  # Количество оставшихся токенов
         while True:
@@ -130,11 +230,12 @@ class SyntacticalAnalyzer(object):
                         EQUAL_TOKEN, NOT_EQUAL_TOKEN, LESS_TOKEN, MORE_TOKEN, LESS_EQUAL_TOKEN, MORE_EQUAL_TOKEN
                     ]
                     true_false_cond = token in [TRUE_TOKEN, FALSE_TOKEN]
+                    bracket_cond = token in [OPEN_BRACKET_TOKEN, CLOSE_BRACKET_TOKEN]
                     assignment_token = (token == ASSIGNMENT_TOKEN)
                     point_cond = (token == POINT_TOKEN)
                     cond = any([
                         identifier_cond, digital_const_cond, operator_cond, true_false_cond,
-                        assignment_token, point_cond
+                        assignment_token, point_cond, bracket_cond
                     ])
 
                     # Пока просто проверим, что нам придут правильные токены. Все остальные проверки позже
@@ -145,9 +246,9 @@ class SyntacticalAnalyzer(object):
                         raise WrongTokenError()
 
                 # Собрали токены выражения. Надо обработать
-                expression_analyzer = ExpressionAnalyzer(tokens=expression_tokens)
+                expression_analyzer = ExpressionAnalyzer(tokens=expression_tokens, context=self.context)
             elif token == MATCH_TOKEN:
-                match_case_data = MatchCaseData()
+                match_case_data = MatchCaseData(context=self.context)
                 next_token = self.tokens[current_token_index + 1]
                 if not isinstance(next_token, IdentifierToken):
                     # После match может идти только идентификатор
@@ -232,11 +333,12 @@ class SyntacticalAnalyzer(object):
                                     MORE_EQUAL_TOKEN
                                 ]
                                 true_false_cond = token in [TRUE_TOKEN, FALSE_TOKEN]
+                                bracket_cond = token in [OPEN_BRACKET_TOKEN, CLOSE_BRACKET_TOKEN]
                                 assignment_token = (token == ASSIGNMENT_TOKEN)
                                 point_cond = (token == POINT_TOKEN)
                                 cond = any([
                                     identifier_cond, digital_const_cond, operator_cond, true_false_cond,
-                                    assignment_token, point_cond
+                                    assignment_token, point_cond, bracket_cond
                                 ])
 
                                 # Пока просто проверим, что нам придут правильные токены. Все остальные проверки позже
@@ -282,7 +384,6 @@ class SyntacticalAnalyzer(object):
                 match_case_data.analyze()
             else:
                 raise AnalysisException()
-        fix_commands()
 
     def _var_definition(self):
         """Разбор блока описания переменных"""
@@ -301,7 +402,7 @@ class SyntacticalAnalyzer(object):
                     if index:
                         # Пришёл перевод строки, а значит перед этим должна быть переменная
                         # Перевод строки после имени типа недопустим
-                        prev_token = self.tokens[index - 1]
+                        prev_token = self._prev_token(index)
                         if (not isinstance(prev_token, IdentifierToken) or
                                 prev_token.category == IdentifierToken.CATEGORY_TYPE):
                             raise VarNameExpectedError()
@@ -309,7 +410,7 @@ class SyntacticalAnalyzer(object):
                             # В противном случае всё хорошо. Продолжаем.
                             pass
                 elif token == ENDBLOCK_VAR_DEF_TOKEN:
-                    prev_token = self.tokens[index - 1]
+                    prev_token = self._prev_token(index)
                     if prev_token != NL_TOKEN:
                         # Перед endblock_var_def должен быть перевод строки
                         raise AnalysisException()
@@ -317,7 +418,7 @@ class SyntacticalAnalyzer(object):
                         # Всё хорошо. Вернём индекс
                         return index
                 elif token == CLASS_TOKEN:
-                    prev_token = self.tokens[index - 1]
+                    prev_token = self._prev_token(index)
                     if prev_token != NL_TOKEN:
                         # Перед class должен быть перевод строки
                         raise AnalysisException()
@@ -326,7 +427,7 @@ class SyntacticalAnalyzer(object):
                         pass
                 elif isinstance(token, IdentifierToken):
                     # Пришёл идентификатор
-                    prev_token = self.tokens[index - 1]
+                    prev_token = self._prev_token(index)
                     if prev_token == NL_TOKEN:
                         # После перевода строки, а значит текущий токен обязательно должен быть именем типа
                         if token.category != IdentifierToken.CATEGORY_TYPE:
@@ -347,7 +448,7 @@ class SyntacticalAnalyzer(object):
                         raise AnalysisException()
             elif in_class_declaration_state:
                 # Находимся в состоянии объявления класса
-                prev_token = self.tokens[index - 1]
+                prev_token = self._prev_token(index)
                 if token == COLON_TOKEN and prev_token == new_class_token:
                     # Двоеточие после имени класса. Всё хорошо
                     pass
@@ -374,7 +475,7 @@ class SyntacticalAnalyzer(object):
                         raise NewLineExpectedException()
                 elif isinstance(token, IdentifierToken):
                     # Встретили идентификатор
-                    prev_token = self.tokens[index - 1]
+                    prev_token = self._prev_token(index)
                     # Предыдущий токен - таб
                     if prev_token == TAB_TOKEN:
                         next_token = self.tokens[index + 1]
@@ -404,6 +505,7 @@ class SyntacticalAnalyzer(object):
                                 attr_value=None,
                                 type=prev_token.attr_name,
                                 category=IdentifierToken.CATEGORY_VAR,
+                                parent=new_class_token,
                             )
                             new_class_token.fields.append(identifier)
                         pass
@@ -411,3 +513,40 @@ class SyntacticalAnalyzer(object):
                         raise AnalysisException()
                 else:
                     raise AnalysisException()
+
+
+def _without_end_prog(tokens):
+    """Токены без последнего, который должен быть end_prog"""
+    previous = None
+    for token in tokens:
+        if previous is not None:
+            yield previous
+        previous = token
+    if previous != END_PROG_TOKEN:
+        # Программа должна заканчиваться на end_prog
+        raise EndProgExpectedError()
+
+
+def _iter_statements(tokens):
+    """
+    Токены операторов: строка вместе с переводом строки или блок match.
+    Блок match может быть только последним, поэтому он продолжается до конца потока.
+    Возвращает пары (токены оператора, последний ли это оператор)
+    """
+    previous = None
+    statement = []
+    for token in tokens:
+        if not statement and token == NL_TOKEN:
+            # Пустая строка
+            continue
+        if previous is not None:
+            yield previous, False
+            previous = None
+        statement.append(token)
+        if token == NL_TOKEN and statement[0] != MATCH_TOKEN:
+            previous = statement
+            statement = []
+    if statement:
+        yield statement, True
+    elif previous is not None:
+        yield previous, True
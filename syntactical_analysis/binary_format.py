@@ -0,0 +1,279 @@
+"""
+Двоичный формат команд (трёхадресного кода).
+
+Файл - заголовок и четыре раздела, перед каждым разделом - его длина в байтах (uint32):
+    заголовок: сигнатура TAC\\0, версия (uint16), флаги (uint16), количество команд, строк пула, целых
+        в разделе таблиц переходов (uint32);
+    пул: смещения строк в данных пула (uint32, строк + 1 смещение конца);
+    данные пула: строки UTF-8 подряд (имена переменных, константы, нижние границы таблиц переходов);
+    команды: записи одной длины - вид, операция, флаги (uint8), байт выравнивания и четыре поля (uint32);
+    таблицы переходов: для каждой таблицы количество целей и цели (uint32).
+Все числа - little-endian. Операнды команд - индексы строк пула, переходы - индексы команд.
+
+Поля записи по видам команд:
+    присваивание: цель, операнд, правый операнд (или NONE), тип операции (или NONE);
+    условие: условие, правый операнд (или NONE), индекс перехода;
+    goto: индекс перехода;
+    таблица переходов: значение, нижняя граница (строка пула), переход по умолчанию, начало таблицы.
+
+Загрузка (load_binary) отображает файл в память и не разбирает его: команда собирается из своей записи
+при обращении к ней, строки пула декодируются при первом использовании. Запись проверяется тогда же:
+неверный вид или операция, индекс строки за пределами пула, переход за конец программы -
+BinaryFormatError
+"""
+import mmap
+import struct
+from collections.abc import Sequence
+from typing import List
+
+from .commands import AssignmentCommand, ConditionCommand, GotoCommand, JumpTableCommand, NoopCommand
+from .custom_exceptions import BinaryFormatError, BinaryVersionError
+
+__all__ = [
+    'BinaryCommands',
+    'dump_binary',
+    'dumps_binary',
+    'load_binary',
+    'loads_binary',
+]
+
+MAGIC = b'TAC\0'
+VERSION = 2
+
+HEADER = struct.Struct('<4sHHIII')
+RECORD = struct.Struct('<BBBxIIII')
+LENGTH = struct.Struct('<I')
+UINT = struct.Struct('<I')
+
+# Отсутствующее поле записи
+NONE = 0xFFFFFFFF
+
+# region Виды команд
+ASSIGNMENT = 0
+CONDITION = 1
+GOTO = 2
+NOOP = 3
+JUMP_TABLE = 4
+# endregion
+
+# Флаги записи
+NEGATED = 1
+
+# Код операции -> знак. 0 - операции нет
+OPERATIONS = [None, '+', '-', '*', '/', '==', '!=', '<', '<=', '>', '>=']
+OPERATIONS_CODES = {operation: code for code, operation in enumerate(OPERATIONS)}
+
+
+def dumps_binary(commands: List) -> bytes:
+    """Команды в двоичном формате"""
+    pool = {}
+    targets = []
+    records = bytearray()
+
+    def index(string) -> int:
+        if string is None:
+            return NONE
+        if string not in pool:
+            pool[string] = len(pool)
+        return pool[string]
+
+    for command in commands:
+        kind, operation, flags, fields = NOOP, None, 0, ()
+        if isinstance(command, AssignmentCommand):
+            kind, operation = ASSIGNMENT, command.operation
+            fields = index(command.target), index(command.source), index(command.right), index(command.type)
+        elif isinstance(command, ConditionCommand):
+            kind, operation = CONDITION, command.operation
+            flags = NEGATED if command.negated else 0
+            fields = index(command.cond), index(command.right), command.goto_command_ind
+        elif isinstance(command, GotoCommand):
+            kind, fields = GOTO, (command.next_command_ind,)
+        elif isinstance(command, JumpTableCommand):
+            kind = JUMP_TABLE
+            fields = index(command.value), index(str(command.low)), command.default_command_ind, len(targets)
+            targets.append(len(command.targets))
+            targets.extend(command.targets)
+        elif not isinstance(command, NoopCommand):
+            raise TypeError(f'Неизвестная команда: {command}')
+        fields = tuple(fields) + (NONE,) * (4 - len(fields))
+        records += RECORD.pack(kind, OPERATIONS_CODES[operation], flags, *fields)
+
+    pool_data = bytearray()
+    pool_offsets = [0]
+    for string in pool:
+        pool_data += string.encode('utf-8')
+        pool_offsets.append(len(pool_data))
+
+    sections = [
+        HEADER.pack(MAGIC, VERSION, 0, len(commands), len(pool), len(targets)),
+        struct.pack(f'<{len(pool_offsets)}I', *pool_offsets),
+        bytes(pool_data),
+        bytes(records),
+        struct.pack(f'<{len(targets)}I', *targets),
+    ]
+    return b''.join(LENGTH.pack(len(section)) + section for section in sections)
+
+
+def dump_binary(commands: List, filename: str):
+    with open(filename, 'wb') as f:
+        f.write(dumps_binary(commands))
+
+
+def loads_binary(data: bytes) -> 'BinaryCommands':
+    return BinaryCommands(data)
+
+
+def load_binary(filename: str) -> 'BinaryCommands':
+    """Команды из файла, отображённого в память. Файл закрывается методом close() или после with"""
+    with open(filename, 'rb') as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Пустой файл отобразить нельзя
+            raise BinaryFormatError()
+    return BinaryCommands(data)
+
+
+class BinaryCommands(Sequence):
+    """
+    Последовательность команд над данными в двоичном формате.
+    Команда собирается при каждом обращении, изменения собранной команды в данные не попадают
+    """
+
+    def __init__(self, data):
+        self.data = data
+        offset = 0
+        sections = []
+        for _ in range(5):
+            if offset + LENGTH.size > len(data):
+                raise BinaryFormatError()
+            length, = LENGTH.unpack_from(data, offset)
+            offset += LENGTH.size
+            if offset + length > len(data):
+                raise BinaryFormatError()
+            sections.append((offset, length))
+            offset += length
+        (header_offset, header_length), pool_offsets, pool_data, records, targets = sections
+        if header_length != HEADER.size:
+            raise BinaryFormatError()
+        magic, version, _, commands_count, pool_count, targets_count = HEADER.unpack_from(data, header_offset)
+        if magic != MAGIC:
+            raise BinaryFormatError()
+        if version != VERSION:
+            raise BinaryVersionError()
+        if (
+                pool_offsets[1] != (pool_count + 1) * UINT.size or records[1] != commands_count * RECORD.size
+                or targets[1] != targets_count * UINT.size
+        ):
+            raise BinaryFormatError()
+        self.commands_count = commands_count
+        self.pool_offsets_start = pool_offsets[0]
+        self.pool_data_start = pool_data[0]
+        self.records_start = records[0]
+        self.targets_start = targets[0]
+        self.targets_count = targets_count
+        self.pool_data_length = pool_data[1]
+        self.pool = [None] * pool_count
+
+    def string(self, index: int):
+        """Строка пула. NONE - отсутствующий операнд"""
+        if index == NONE:
+            return None
+        if index >= len(self.pool):
+            raise BinaryFormatError()
+        string = self.pool[index]
+        if string is None:
+            start, end = struct.unpack_from('<2I', self.data, self.pool_offsets_start + index * UINT.size)
+            if not start <= end <= self.pool_data_length:
+                raise BinaryFormatError()
+            start += self.pool_data_start
+            end += self.pool_data_start
+            try:
+                string = self.pool[index] = str(self.data[start:end], 'utf-8')
+            except UnicodeDecodeError:
+                raise BinaryFormatError()
+        return string
+
+    def operand(self, index: int):
+        """Обязательный операнд: строка пула, NONE недопустим"""
+        if index == NONE:
+            raise BinaryFormatError()
+        return self.string(index)
+
+    def jump_target(self, command_ind: int):
+        """Индекс команды перехода: команда программы или её конец"""
+        if command_ind > self.commands_count:
+            raise BinaryFormatError()
+        return command_ind
+
+    def __len__(self):
+        return self.commands_count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.commands_count))]
+        if index < 0:
+            index += self.commands_count
+        if not 0 <= index < self.commands_count:
+            raise IndexError('Индекс команды за пределами программы')
+        kind, operation, flags, first, second, third, fourth = RECORD.unpack_from(
+            self.data, self.records_start + index * RECORD.size
+        )
+        if operation >= len(OPERATIONS):
+            raise BinaryFormatError()
+        operation = OPERATIONS[operation]
+        operand, jump_target = self.operand, self.jump_target
+        if kind == ASSIGNMENT:
+            return AssignmentCommand(
+                operand(first), operand(second), operation, self._right(operation, third), self.string(fourth)
+            )
+        if kind == CONDITION:
+            return ConditionCommand(
+                operand(first), jump_target(third), operation=operation, right=self._right(operation, second),
+                negated=bool(flags & NEGATED),
+            )
+        if operation is not None:
+            raise BinaryFormatError()
+        if kind == GOTO:
+            return GotoCommand(jump_target(first))
+        if kind == NOOP:
+            return NoopCommand()
+        if kind == JUMP_TABLE:
+            return JumpTableCommand(operand(first), self._low(second), self._targets(fourth), jump_target(third))
+        raise BinaryFormatError()
+
+    def _right(self, operation, index):
+        """Правый операнд: есть только у бинарной операции"""
+        if operation is None:
+            if index != NONE:
+                raise BinaryFormatError()
+            return None
+        return self.operand(index)
+
+    def _low(self, index):
+        """Нижняя граница таблицы переходов"""
+        try:
+            return int(self.operand(index))
+        except ValueError:
+            raise BinaryFormatError()
+
+    def _targets(self, start):
+        """Цели таблицы переходов, которая начинается с целого start раздела таблиц"""
+        if start >= self.targets_count:
+            raise BinaryFormatError()
+        targets_offset = self.targets_start + start * UINT.size
+        count, = UINT.unpack_from(self.data, targets_offset)
+        if count > self.targets_count - start - 1:
+            raise BinaryFormatError()
+        targets = struct.unpack_from(f'<{count}I', self.data, targets_offset + UINT.size)
+        return [self.jump_target(target) for target in targets]
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
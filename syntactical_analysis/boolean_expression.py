@@ -0,0 +1,153 @@
+"""
+Логические выражения, код для которых генерируется в виде переходов.
+Значение выражения не записывается во временные переменные: and, or, not и сравнения
+компилируются в условные переходы с сокращённым вычислением, а значение сохраняется,
+только когда оно присваивается (BoolExpressionHandler).
+Значения те же, что при вычислении по шагам; меняются только команды: r = not a - это
+r = False; if a goto <после>; r = True, а not not a - просто a
+"""
+from abc import ABC, abstractmethod
+from typing import List
+
+from lexical_analysis.const import BOOL
+from .commands import ConditionCommand, GotoCommand, set_jump_target
+from .folding import get_const
+
+__all__ = [
+    'BoolExpression',
+    'RelationExpression',
+    'NotExpression',
+    'LogicalExpression',
+    'AndExpression',
+    'OrExpression',
+    'backpatch',
+    'generate_jumps',
+]
+
+
+class BoolExpression(ABC):
+    """Логическое выражение, код которого ещё не сгенерирован"""
+    type = BOOL
+
+    def generate_jumps(self, sense: bool, context) -> List:
+        """
+        Генерация кода, который переходит, если значение выражения равно sense, иначе выполняется дальше.
+        Возвращает команды переходов, адрес которых нужно установить (backpatching)
+        """
+        return generate_jumps(self, sense, context)
+
+    @abstractmethod
+    def expand(self, sense: bool, jumps: List, tasks: List, context):
+        """
+        Шаг генерации переходов (generate_jumps) без рекурсии. Команды самого выражения генерируются сразу,
+        переходы добавляются в jumps. Части выражения добавляются в стек задач tasks (см. generate_jumps)
+        """
+
+
+class RelationExpression(BoolExpression):
+    """left operation right"""
+
+    def __init__(self, left: str, operation: str, right: str):
+        self.left = left
+        self.operation = operation
+        self.right = right
+
+    def expand(self, sense, jumps, tasks, context):
+        jumps.append(ConditionCommand.create(
+            cond=self.left, operation=self.operation, right=self.right, negated=not sense, context=context
+        ))
+
+
+class NotExpression(BoolExpression):
+    """
+    not operand - логическое отрицание. Собственных команд нет: генерируются переходы операнда
+    для противоположного значения
+    """
+
+    def __init__(self, operand):
+        self.operand = operand
+
+    @classmethod
+    def create(cls, operand):
+        """not operand. Двойное отрицание сокращается"""
+        if isinstance(operand, NotExpression):
+            return operand.operand
+        return cls(operand)
+
+    def expand(self, sense, jumps, tasks, context):
+        tasks.append((self.operand, not sense, jumps))
+
+
+class LogicalExpression(BoolExpression):
+    """
+    Цепочка and или or. Хранится списком, а не вложенными выражениями, чтобы генерация не зависела от её длины
+    """
+    # Значение части, при котором вычисление прекращается: для and - ложь, для or - истина
+    short_circuit_value = None
+
+    def __init__(self, operands: List):
+        self.operands = operands
+
+    @classmethod
+    def create(cls, left, right):
+        """left and right или left or right"""
+        if type(left) is cls:
+            # Левый операнд используется только здесь, поэтому его можно дополнить
+            left.operands.append(right)
+            return left
+        return cls([left, right])
+
+    def expand(self, sense, jumps, tasks, context):
+        # Задачи добавляются в обратном порядке: первой выполнится задача для первой части
+        if sense == self.short_circuit_value:
+            # Переход, как только одна из частей определила результат
+            tasks.extend((operand, sense, jumps) for operand in reversed(self.operands))
+            return
+        # Результат определяет последняя часть, если ни одна из предыдущих не прервала вычисление.
+        # Переходы предыдущих частей ведут на команду после кода последней
+        short_circuit_jumps = []
+        tasks.append((None, None, short_circuit_jumps))
+        tasks.append((self.operands[-1], sense, jumps))
+        tasks.extend(
+            (operand, self.short_circuit_value, short_circuit_jumps) for operand in reversed(self.operands[:-1])
+        )
+
+
+class AndExpression(LogicalExpression):
+    """operands[0] and operands[1] and ..."""
+    short_circuit_value = False
+
+
+class OrExpression(LogicalExpression):
+    """operands[0] or operands[1] or ..."""
+    short_circuit_value = True
+
+
+def generate_jumps(operand, sense: bool, context) -> List:
+    """
+    Переходы для операнда логической операции: выражения, переменной или константы.
+    Вложенные выражения обрабатываются через явный стек задач, а не рекурсией, поэтому, как и разбор
+    выражения, генерация не ограничена глубиной вложенности скобок.
+    Задача - (операнд, sense, список для его переходов) или (None, None, переходы), которым нужно
+    установить адрес следующей команды
+    """
+    jumps = []
+    tasks = [(operand, sense, jumps)]
+    while tasks:
+        operand, sense, operand_jumps = tasks.pop()
+        if operand is None:
+            backpatch(operand_jumps, len(context.commands))
+        elif isinstance(operand, BoolExpression):
+            operand.expand(sense, operand_jumps, tasks, context)
+        else:
+            value = get_const(operand)
+            if value is None:
+                operand_jumps.append(ConditionCommand.create(cond=operand.name, negated=not sense, context=context))
+            elif bool(value) == sense:
+                operand_jumps.append(GotoCommand.create(context=context))
+    return jumps
+
+
+def backpatch(jumps: List, command_ind: int):
+    for command in jumps:
+        set_jump_target(command, command_ind)
@@ -1,30 +1,99 @@
+from typing import Callable, List
+
+from compilation.context import default_context
+
+
 class AssignmentCommand(object):
-    def __init__(self, target: str, source: str):
+    """target = source или target = source operation right"""
+
+    def __init__(self, target: str, source: str, operation: str = None, right: str = None, type: str = None):
         self.target = target
         self.source = source
+        # Для бинарной операции - знак операции и правый операнд
+        self.operation = operation
+        self.right = right
+        # Для арифметической операции - тип операндов (int или float), известный при компиляции.
+        # По нему выбирается деление: целое или вещественное. В текст команды не выводится
+        self.type = type
 
     @classmethod
-    def create(cls, target: str, source: str):
-        command = cls(target=target, source=source)
-        commands.append(command)
+    def create(
+            cls, target: str, source: str, operation: str = None, right: str = None, type: str = None,
+            context=default_context
+    ):
+        command = cls(target=target, source=source, operation=operation, right=right, type=type)
+        context.commands.append(command)
+        return command
+
+    @property
+    def operands(self):
+        """Читаемые операнды"""
+        return [self.source] if self.operation is None else [self.source, self.right]
+
+    def replace_operand(self, old: str, new: str):
+        if self.source == old:
+            self.source = new
+        if self.right == old:
+            self.right = new
+
+    def rename(self, names: dict):
+        """Переименование цели и операндов по словарю старое имя -> новое"""
+        self.target = names.get(self.target, self.target)
+        self.source = names.get(self.source, self.source)
+        self.right = names.get(self.right, self.right)
 
     def __str__(self):
-        return f'{self.target} = {self.source}'
+        if self.operation is None:
+            return f'{self.target} = {self.source}'
+        return f'{self.target} = {self.source} {self.operation} {self.right}'
 
 
 class ConditionCommand(object):
-    def __init__(self, cond: str, goto_command_ind: int = None):
+    """
+    if cond goto goto_command_ind или if cond operation right goto goto_command_ind.
+    Если negated - переход выполняется, когда условие ложно: if not cond goto goto_command_ind
+    """
+
+    def __init__(
+            self, cond: str, goto_command_ind: int = None, operation: str = None, right: str = None, negated=False
+    ):
         self.cond = cond
         self.goto_command_ind = goto_command_ind
+        # Для сравнения - знак операции и правый операнд
+        self.operation = operation
+        self.right = right
+        self.negated = negated
 
     @classmethod
-    def create(cls, cond: str, goto_command_ind: int = None):
-        command = cls(cond, goto_command_ind)
-        commands.append(command)
+    def create(
+            cls, cond: str, goto_command_ind: int = None, operation: str = None, right: str = None, negated=False,
+            context=default_context
+    ):
+        command = cls(cond, goto_command_ind, operation=operation, right=right, negated=negated)
+        context.commands.append(command)
         return command
 
+    @property
+    def operands(self):
+        """Читаемые операнды"""
+        return [self.cond] if self.operation is None else [self.cond, self.right]
+
+    def replace_operand(self, old: str, new: str):
+        if self.cond == old:
+            self.cond = new
+        if self.right == old:
+            self.right = new
+
+    def rename(self, names: dict):
+        """Переименование операндов по словарю старое имя -> новое"""
+        self.cond = names.get(self.cond, self.cond)
+        self.right = names.get(self.right, self.right)
+
     def __str__(self):
-        return f'if {self.cond} goto {self.goto_command_ind}'
+        cond = self.cond if self.operation is None else f'{self.cond} {self.operation} {self.right}'
+        if self.negated:
+            cond = f'not {cond}'
+        return f'if {cond} goto {self.goto_command_ind}'
 
 
 class GotoCommand(object):
@@ -32,9 +101,9 @@ class GotoCommand(object):
         self.next_command_ind = next_command_ind
 
     @classmethod
-    def create(cls, next_command_ind: int = None):
+    def create(cls, next_command_ind: int = None, context=default_context):
         command = cls(next_command_ind)
-        commands.append(command)
+        context.commands.append(command)
         return command
 
     def __str__(self):
@@ -46,17 +115,87 @@ class NoopCommand(object):
         return 'noop'
 
 
-def fix_commands():
+class JumpTableCommand(object):
+    """
+    Переход по таблице: jump value - low [t0, t1, ...] else default_command_ind.
+    Если low <= value < low + len(targets), переход на targets[value - low], иначе - на default_command_ind
+    """
+
+    def __init__(self, value: str, low: int, targets: List[int] = None, default_command_ind: int = None):
+        self.value = value
+        self.low = low
+        self.targets = [] if targets is None else targets
+        self.default_command_ind = default_command_ind
+
+    @classmethod
+    def create(
+            cls, value: str, low: int, targets: List[int] = None, default_command_ind: int = None,
+            context=default_context
+    ):
+        command = cls(value, low, targets, default_command_ind)
+        context.commands.append(command)
+        return command
+
+    @property
+    def operands(self):
+        """Читаемые операнды"""
+        return [self.value]
+
+    def replace_operand(self, old: str, new: str):
+        if self.value == old:
+            self.value = new
+
+    def rename(self, names: dict):
+        """Переименование операндов по словарю старое имя -> новое"""
+        self.value = names.get(self.value, self.value)
+
+    def __str__(self):
+        targets = ', '.join(map(str, self.targets))
+        return f'jump {self.value} - {self.low} [{targets}] else {self.default_command_ind}'
+
+
+def get_jump_targets(command) -> List[int]:
+    """Индексы команд, на которые может перейти command"""
+    if isinstance(command, GotoCommand):
+        return [command.next_command_ind]
+    if isinstance(command, ConditionCommand):
+        return [command.goto_command_ind]
+    if isinstance(command, JumpTableCommand):
+        return command.targets + [command.default_command_ind]
+    return []
+
+
+def map_jump_targets(command, function: Callable[[int], int]):
+    """Замена каждого индекса перехода command на function(индекс)"""
+    if isinstance(command, GotoCommand):
+        command.next_command_ind = function(command.next_command_ind)
+    elif isinstance(command, ConditionCommand):
+        command.goto_command_ind = function(command.goto_command_ind)
+    elif isinstance(command, JumpTableCommand):
+        command.targets = [function(target) for target in command.targets]
+        command.default_command_ind = function(command.default_command_ind)
+
+
+def set_jump_target(command, command_ind: int):
+    """Установка единственного индекса перехода goto или условия"""
+    map_jump_targets(command, lambda _: command_ind)
+
+
+def falls_through(command) -> bool:
+    """Может ли после command выполниться следующая команда"""
+    return not isinstance(command, (GotoCommand, JumpTableCommand))
+
+
+def fix_commands(commands):
     """Исправление команд"""
     # Проблема: GotoCommand и ConditionCommand могут ссылать на несуществующий индекс команды
     max_command_ind = float('-inf')
     for command in commands:
-        if isinstance(command, GotoCommand):
-            max_command_ind = max(max_command_ind, command.next_command_ind)
-        elif isinstance(command, ConditionCommand):
-            max_command_ind = max(max_command_ind, command.goto_command_ind)
+        for command_ind in get_jump_targets(command):
+            max_command_ind = max(max_command_ind, command_ind)
     if max_command_ind == len(commands):
         commands.append(NoopCommand())
 
 
-commands = []
+# Команды контекста по умолчанию
+commands = default_context.commands
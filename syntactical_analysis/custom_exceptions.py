@@ -103,3 +103,15 @@ class TooManyDefaultCasesError(BaseAnalyzerException):
 
 class DefaultCaseWrongLocationError(BaseAnalyzerException):
     msg = 'Оператор по умолчанию должен быть последним'
+
+
+class BracketsMismatchError(BaseAnalyzerException):
+    msg = 'Непарные скобки'
+
+
+class BinaryFormatError(BaseAnalyzerException):
+    msg = 'Неверный формат двоичного файла команд'
+
+
+class BinaryVersionError(BinaryFormatError):
+    msg = 'Неподдерживаемая версия двоичного файла команд'
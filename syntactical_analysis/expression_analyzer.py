@@ -1,31 +1,67 @@
+from typing import Dict
+
+from compilation.context import default_context
 from lexical_analysis.const import BOOL, INT, FLOAT
 from tokens import (
-    IdentifierToken, DigitalConstToken,
-    ASSIGNMENT_TOKEN, POINT_TOKEN,
+    Token, IdentifierToken, DigitalConstToken,
+    ASSIGNMENT_TOKEN, OPEN_BRACKET_TOKEN, CLOSE_BRACKET_TOKEN,
     EQUAL_TOKEN, NOT_EQUAL_TOKEN, LESS_TOKEN, LESS_EQUAL_TOKEN, MORE_TOKEN, MORE_EQUAL_TOKEN,
     AND_TOKEN, OR_TOKEN, NOT_TOKEN, TRUE_TOKEN, FALSE_TOKEN, MULT_TOKEN, DIV_TOKEN, PLUS_TOKEN, MINUS_TOKEN,
 )
 from .custom_exceptions import (
-    WrongTokenError, AssignmentExpectedError, UnknownFieldError, WrongExpressionError, TypeIncompatibilityError,
-    RelationCountError, UnknownVarError, VarNameExpectedError, AnalysisException, WrongTypeForOperator
-)
-from .handlers import (
-    NotOperationHandler, AndOperationHandler, OrOperationHandler, ArithmeticOperationHandler, RelationOperationHandler,
-    AssignmentHandler
+    AssignmentExpectedError, WrongExpressionError, TypeIncompatibilityError, RelationCountError, AnalysisException,
+    WrongTypeForOperator, BracketsMismatchError
 )
+from .boolean_expression import BoolExpression, RelationExpression, NotExpression, AndExpression, OrExpression
+from .folding import ConstValue, Chain, get_const, fold_not, fold_logical, fold_arithmetic, fold_relation
+from .handlers import BoolExpressionHandler, ArithmeticOperationHandler, AssignmentHandler
 from .identifier_info import IdentifierInfo
 from .temp_var import TempVar
+from .utils import parse_identifiers
 
 __all__ = [
     'ExpressionAnalyzer',
 ]
 
-from .utils import parse_identifiers
+IDENTIFIERS_CLASSES = (IdentifierToken, IdentifierInfo, TempVar, BoolExpression)
+ARITHMETICAL_OPERANDS_CLASSES = (IdentifierToken, IdentifierInfo, TempVar, DigitalConstToken, ConstValue)
+ARITHMETIC_TYPES = [INT, FLOAT]
+BOOL_TOKENS = [TRUE_TOKEN, FALSE_TOKEN]
+
+LOGICAL_OPERATIONS = [AND_TOKEN, OR_TOKEN, NOT_TOKEN]
+ARITHMETIC_OPERATIONS = {
+    MULT_TOKEN: '*',
+    DIV_TOKEN: '/',
+    PLUS_TOKEN: '+',
+    MINUS_TOKEN: '-',
+}
+RELATION_OPERATIONS = {
+    EQUAL_TOKEN: '==',
+    NOT_EQUAL_TOKEN: '!=',
+    LESS_TOKEN: '<',
+    LESS_EQUAL_TOKEN: '<=',
+    MORE_TOKEN: '>',
+    MORE_EQUAL_TOKEN: '>=',
+}
+# Приоритеты операций: чем больше, тем раньше выполняется операция
+PRIORITIES = {
+    NOT_TOKEN: 5,
+    AND_TOKEN: 4,
+    OR_TOKEN: 3,
+    MULT_TOKEN: 2,
+    DIV_TOKEN: 2,
+    PLUS_TOKEN: 1,
+    MINUS_TOKEN: 1,
+    **{token: 0 for token in RELATION_OPERATIONS},
+}
 
 
 class ExpressionAnalyzer(object):
-    def __init__(self, tokens):
+    def __init__(self, tokens, context=default_context):
         self.tokens = parse_identifiers(tokens)
+        self.context = context
+        # Временные переменные вида base + const и base * const, с которыми можно объединить следующую операцию
+        self.chains = {}  # type: Dict[TempVar, Chain]
         self.analyze()
 
     def analyze(self):
@@ -40,6 +76,9 @@ class ExpressionAnalyzer(object):
         left_identifier = self.tokens[0]
         self.tokens = self.tokens[assignment_index::]
         right_part_identifier = self.analyze_right_part(type_=left_identifier.type)
+        if isinstance(right_part_identifier, BoolExpression):
+            # Логическое выражение вычисляется переходами, значение сохраняется только здесь
+            right_part_identifier = BoolExpressionHandler.handle(right_part_identifier, context=self.context)
 
         if right_part_identifier in [TRUE_TOKEN, FALSE_TOKEN]:
             right_part_type = BOOL
@@ -49,46 +88,42 @@ class ExpressionAnalyzer(object):
         if left_identifier.type != right_part_type:
             raise TypeIncompatibilityError()
 
-        if isinstance(right_part_identifier, DigitalConstToken):
-            right_part_identifier_name = str(right_part_identifier.attr)
-        else:
-            right_part_identifier_name = right_part_identifier.name
+        right_part_identifier_name = self._get_operand_name(right_part_identifier)
+        if right_part_identifier_name == left_identifier.name:
+            # Присвоение самой себе (например, после свёртки x = x + 0) ничего не меняет
+            return
         AssignmentHandler.handle(
-            left_identifier_name=left_identifier.name, right_identifier_name=right_part_identifier_name
+            left_identifier_name=left_identifier.name,
+            right_identifier_name=right_part_identifier_name,
+            context=self.context,
         )
 
     def analyze_right_part(self, type_):
-        """Анализ правой части выражения"""
+        """
+        Анализ правой части выражения.
+        Один проход по токенам с двумя стеками (операнды и операции), без рекурсии.
+        Операция выполняется, как только известно, что следующая операция не приоритетнее её,
+        поэтому на каждый токен приходится O(1) работы.
+        not - префиксная операция с наивысшим приоритетом. Её операнд - переменная, True/False, выражение
+        в скобках или другой not: not not a, not (a and b). not a == b - это (not a) == b
+        """
         assignment_index = self.tokens.index(ASSIGNMENT_TOKEN)
-        tokens = self.tokens[assignment_index::]
-
-        identifiers_classes = (IdentifierToken, IdentifierInfo, TempVar)
-        arithmetical_identifiers_classes = (IdentifierToken, IdentifierInfo, TempVar, DigitalConstToken)
-        arithmetic_types = [INT, FLOAT]
-        bool_tokens = [TRUE_TOKEN, FALSE_TOKEN]
+        tokens = self.tokens[assignment_index + 1::]
 
         # region Проверка 1: Операции сравнения, логические операции, true и false
         # допустимы, только если левая часть логического типа
-        relation_count = sum([
-            EQUAL_TOKEN in tokens,
-            NOT_EQUAL_TOKEN in tokens,
-            LESS_TOKEN in tokens,
-            LESS_EQUAL_TOKEN in tokens,
-            MORE_TOKEN in tokens,
-            MORE_EQUAL_TOKEN in tokens
-        ])
-        contains_logical_operators = any([
-            AND_TOKEN in tokens,
-            OR_TOKEN in tokens,
-            NOT_TOKEN in tokens,
-        ])
-
-        contains_true_false = any([
-            TRUE_TOKEN in tokens,
-            FALSE_TOKEN in tokens
-        ])
-
-        if (relation_count or contains_logical_operators or contains_true_false) and type_ != BOOL:
+        relation_count = 0
+        contains_bool_tokens = False
+        for token in tokens:
+            if not isinstance(token, Token):
+                # IdentifierInfo
+                continue
+            if token in RELATION_OPERATIONS:
+                relation_count += 1
+            elif token in LOGICAL_OPERATIONS or token in BOOL_TOKENS:
+                contains_bool_tokens = True
+
+        if (relation_count or contains_bool_tokens) and type_ != BOOL:
             raise TypeIncompatibilityError()
         # endregion
 
@@ -97,251 +132,163 @@ class ExpressionAnalyzer(object):
             raise RelationCountError()
         # endregion
 
-        while NOT_TOKEN in tokens:
-            not_token_index = tokens.index(NOT_TOKEN)
-            if not_token_index + 1 == len(tokens):
-                raise AnalysisException()
-            identifier = tokens[not_token_index + 1]  # Берем следующий
-            if not (isinstance(identifier, identifiers_classes) or identifier in bool_tokens):
-                raise WrongExpressionError()
-            if identifier in bool_tokens:
-                identifier_type = BOOL
-            else:
-                identifier_type = identifier.type
-            if identifier_type != BOOL:
-                raise WrongTypeForOperator()
-
-            identifier_name = identifier.name
-            temp_var = NotOperationHandler.handle(identifier_name)
-            if not_token_index + 1 == len(tokens) - 1:
-                # not a находится в конце
-                tokens = tokens[0:not_token_index] + [temp_var]
-            else:
-                tokens = tokens[0:not_token_index] + [temp_var] + tokens[not_token_index + 2::]
-
-        while AND_TOKEN in tokens:
-            and_token_index = tokens.index(AND_TOKEN)
-            left_identifier = tokens[and_token_index - 1]  # Берём предыдущий
-            if and_token_index + 1 == len(tokens):
-                raise AnalysisException()
-            right_identifier = tokens[and_token_index + 1]  # Берём следующий
-
-            if not (
-                    (isinstance(left_identifier, identifiers_classes) or left_identifier in bool_tokens) and
-                    (isinstance(right_identifier, identifiers_classes) or right_identifier in bool_tokens)
-            ):
-                raise WrongExpressionError()
-
-            if left_identifier in bool_tokens:
-                left_identifier_type = BOOL
-            else:
-                left_identifier_type = left_identifier.type
-
-            if right_identifier in bool_tokens:
-                right_identifier_type = BOOL
+        operands = []
+        operations = []
+        # Ожидается операнд (или not, или открывающая скобка), иначе - бинарная операция или закрывающая скобка
+        expect_operand = True
+        for token in tokens:
+            if expect_operand:
+                if token == NOT_TOKEN or token == OPEN_BRACKET_TOKEN:
+                    operations.append(token)
+                elif isinstance(token, ARITHMETICAL_OPERANDS_CLASSES) or token in BOOL_TOKENS:
+                    operands.append(token)
+                    expect_operand = False
+                else:
+                    raise WrongExpressionError()
+            elif token == CLOSE_BRACKET_TOKEN:
+                while operations and operations[-1] != OPEN_BRACKET_TOKEN:
+                    self._apply_operation(operations.pop(), operands)
+                if not operations:
+                    raise BracketsMismatchError()
+                operations.pop()
             else:
-                right_identifier_type = right_identifier.type
-
-            if not (left_identifier_type == BOOL and right_identifier_type == BOOL):
+                priority = PRIORITIES.get(token) if isinstance(token, Token) else None
+                if priority is None or token == NOT_TOKEN:
+                    # Два операнда подряд или not после операнда
+                    raise WrongExpressionError()
+                # Все операции левоассоциативны: выполняем предыдущие операции не ниже приоритетом
+                while (
+                        operations and operations[-1] != OPEN_BRACKET_TOKEN and
+                        PRIORITIES[operations[-1]] >= priority
+                ):
+                    self._apply_operation(operations.pop(), operands)
+                operations.append(token)
+                expect_operand = True
+
+        if expect_operand:
+            # Операции не хватает операнда
+            raise AnalysisException()
+        while operations:
+            operation = operations.pop()
+            if operation == OPEN_BRACKET_TOKEN:
+                raise BracketsMismatchError()
+            self._apply_operation(operation, operands)
+        # К этому моменту должен остаться только 1 операнд
+        return operands[0]
+
+    def _apply_operation(self, operation, operands):
+        """
+        Проверка типов и генерация команд операции над операндами с вершины стека.
+        Если результат известен при компиляции, команды не генерируются, в стек кладётся результат
+        """
+        if operation == NOT_TOKEN:
+            identifier = operands.pop()
+            if self._get_bool_operand_type(identifier) != BOOL:
                 raise WrongTypeForOperator()
-
-            temp_var = AndOperationHandler.handle(
-                left_identifier_name=left_identifier.name,
-                right_identifier_name=right_identifier.name
-            )
-            if and_token_index + 1 == len(tokens) - 1:
-                tokens = tokens[0:and_token_index - 1] + [temp_var]
-            else:
-                tokens = tokens[0:and_token_index - 1] + [temp_var] + tokens[and_token_index + 2::]
-
-        while OR_TOKEN in tokens:
-            or_token_index = tokens.index(OR_TOKEN)
-            left_identifier = tokens[or_token_index - 1]  # Берём предыдущий
-            if or_token_index + 1 == len(tokens):
-                raise AnalysisException()
-            right_identifier = tokens[or_token_index + 1]  # Берём следующий
-
-            if not (
-                    (isinstance(left_identifier, identifiers_classes) or left_identifier in bool_tokens) and
-                    (isinstance(right_identifier, identifiers_classes) or right_identifier in bool_tokens)
-            ):
-                raise WrongExpressionError()
-
-            if left_identifier in bool_tokens:
-                left_identifier_type = BOOL
-            else:
-                left_identifier_type = left_identifier.type
-
-            if right_identifier in bool_tokens:
-                right_identifier_type = BOOL
-            else:
-                right_identifier_type = right_identifier.type
-
+            folded = fold_not(identifier)
+            if folded is None:
+                folded = NotExpression.create(identifier)
+            operands.append(folded)
+            return
+
+        right_identifier = operands.pop()
+        left_identifier = operands.pop()
+        if operation in LOGICAL_OPERATIONS:
+            left_identifier_type = self._get_bool_operand_type(left_identifier)
+            right_identifier_type = self._get_bool_operand_type(right_identifier)
             if not (left_identifier_type == BOOL and right_identifier_type == BOOL):
                 raise WrongTypeForOperator()
-
-            temp_var = OrOperationHandler.handle(
-                left_identifier_name=left_identifier.name,
-                right_identifier_name=right_identifier.name
-            )
-            if or_token_index + 1 == len(tokens) - 1:
-                tokens = tokens[0:or_token_index - 1] + [temp_var]
-            else:
-                tokens = tokens[0:or_token_index - 1] + [temp_var] + tokens[or_token_index + 2::]
-
-        while (MULT_TOKEN in tokens) or (DIV_TOKEN in tokens):
-            mult_token_index = float('inf')
-            div_token_index = float('inf')
-
-            if MULT_TOKEN in tokens:
-                mult_token_index = tokens.index(MULT_TOKEN)
-            if DIV_TOKEN in tokens:
-                div_token_index = tokens.index(DIV_TOKEN)
-
-            token_index = min(mult_token_index, div_token_index)  # Операции равного приоритета. Возьмём самый первый
-            operation = '*' if token_index == mult_token_index else '/'
-            left_identifier = tokens[token_index - 1]  # Берём предыдущий
-            if token_index + 1 == len(tokens):
-                raise AnalysisException()
-            right_identifier = tokens[token_index + 1]  # Берём следующий
-
-            if not (
-                    isinstance(left_identifier, arithmetical_identifiers_classes) and
-                    isinstance(right_identifier, arithmetical_identifiers_classes)
-            ):
-                raise WrongExpressionError()
-            if not (left_identifier.type in arithmetic_types and right_identifier.type in arithmetic_types):
-                raise WrongTypeForOperator()
-
-            if left_identifier.type != right_identifier.type:
-                raise TypeIncompatibilityError()
-
-            if isinstance(left_identifier, DigitalConstToken):
-                left_identifier_name = str(left_identifier.attr)
-            else:
-                left_identifier_name = left_identifier.name
-
-            if isinstance(right_identifier, DigitalConstToken):
-                right_identifier_name = str(right_identifier.attr)
-            else:
-                right_identifier_name = right_identifier.name
-
-            temp_var = ArithmeticOperationHandler.handle(
-                left_identifier_name=left_identifier_name,
-                right_identifier_name=right_identifier_name,
-                operation=operation,
-                type_=left_identifier.type
-            )
-
-            if token_index + 1 == len(tokens) - 1:
-                tokens = tokens[0:token_index - 1] + [temp_var]
-            else:
-                tokens = tokens[0:token_index - 1] + [temp_var] + tokens[token_index + 2::]
-
-        while (PLUS_TOKEN in tokens) or (MINUS_TOKEN in tokens):
-            plus_token_index = float('inf')
-            minus_token_index = float('inf')
-
-            if PLUS_TOKEN in tokens:
-                plus_token_index = tokens.index(PLUS_TOKEN)
-            if MINUS_TOKEN in tokens:
-                minus_token_index = tokens.index(MINUS_TOKEN)
-
-            token_index = min(plus_token_index, minus_token_index)  # Операции равного приоритета. Возьмём самый первый
-            operation = '+' if token_index == plus_token_index else '-'
-            left_identifier = tokens[token_index - 1]  # Берём предыдущий
-            if token_index + 1 == len(tokens):
-                raise AnalysisException()
-            right_identifier = tokens[token_index + 1]  # Берём следующий
-
-            if not (
-                    isinstance(left_identifier, arithmetical_identifiers_classes) and
-                    isinstance(right_identifier, arithmetical_identifiers_classes)
-            ):
-                raise WrongExpressionError()
-            if not (left_identifier.type in arithmetic_types and right_identifier.type in arithmetic_types):
+            folded = fold_logical(operation == AND_TOKEN, left_identifier, right_identifier)
+            if folded is not None:
+                operands.append(folded)
+                return
+            expression_class = AndExpression if operation == AND_TOKEN else OrExpression
+            operands.append(expression_class.create(left_identifier, right_identifier))
+            return
+
+        # Операнды сравнения и арифметики - значения, поэтому логические выражения сохраняются
+        left_identifier = self._materialize(left_identifier)
+        right_identifier = self._materialize(right_identifier)
+        if not (
+                isinstance(left_identifier, ARITHMETICAL_OPERANDS_CLASSES) and
+                isinstance(right_identifier, ARITHMETICAL_OPERANDS_CLASSES)
+        ):
+            raise WrongExpressionError()
+        is_relation = operation in RELATION_OPERATIONS
+        if is_relation:
+            operation_sign = RELATION_OPERATIONS[operation]
+        else:
+            if not (left_identifier.type in ARITHMETIC_TYPES and right_identifier.type in ARITHMETIC_TYPES):
                 raise WrongTypeForOperator()
-
-            if left_identifier.type != right_identifier.type:
-                raise TypeIncompatibilityError()
-
-            if isinstance(left_identifier, DigitalConstToken):
-                left_identifier_name = str(left_identifier.attr)
-            else:
-                left_identifier_name = left_identifier.name
-
-            if isinstance(right_identifier, DigitalConstToken):
-                right_identifier_name = str(right_identifier.attr)
-            else:
-                right_identifier_name = right_identifier.name
-
-            temp_var = ArithmeticOperationHandler.handle(
-                left_identifier_name=left_identifier_name,
-                right_identifier_name=right_identifier_name,
-                operation=operation,
-                type_=left_identifier.type
-            )
-
-            if token_index + 1 == len(tokens) - 1:
-                tokens = tokens[0:token_index - 1] + [temp_var]
-            else:
-                tokens = tokens[0:token_index - 1] + [temp_var] + tokens[token_index + 2::]
-
-        if relation_count == 1:
-            token = None
-            operation = ''
-            if EQUAL_TOKEN in tokens:
-                token = EQUAL_TOKEN
-                operation = '=='
-            elif NOT_EQUAL_TOKEN in tokens:
-                token = NOT_EQUAL_TOKEN
-                operation = '!='
-            elif LESS_TOKEN in tokens:
-                token = LESS_TOKEN
-                operation = '<'
-            elif LESS_EQUAL_TOKEN in tokens:
-                token = LESS_EQUAL_TOKEN
-                operation = '<='
-            elif MORE_TOKEN in tokens:
-                token = MORE_TOKEN
-                operation = '>'
-            elif MORE_EQUAL_TOKEN in tokens:
-                token = MORE_EQUAL_TOKEN
-                operation = '>='
-
-            rel_token_index = tokens.index(token)
-
-            left_identifier = tokens[rel_token_index - 1]
-            if token_index + 1 == len(tokens):
-                raise AnalysisException()
-            right_identifier = tokens[rel_token_index + 1]
-
-            if not (
-                    isinstance(left_identifier, arithmetical_identifiers_classes) and
-                    isinstance(right_identifier, arithmetical_identifiers_classes)
-            ):
-                raise WrongExpressionError()
-
-            if left_identifier.type != right_identifier.type:
-                raise TypeIncompatibilityError()
-
-            temp_var = RelationOperationHandler.handle(
-                left_identifier_name=left_identifier.name,
-                right_identifier_name=right_identifier.name,
-                operation=operation,
-                type_=left_identifier.type
-            )
-            if rel_token_index + 1 == len(tokens) - 1:
-                tokens = tokens[0:rel_token_index - 1] + [temp_var]
-            else:
-                tokens = tokens[0:rel_token_index - 1] + [temp_var] + tokens[rel_token_index + 2::]
-
-        # Удалим токен присвоения, его обработаем потом
-        if len(tokens) and tokens[0] == ASSIGNMENT_TOKEN:
-            tokens.pop(0)
+            operation_sign = ARITHMETIC_OPERATIONS[operation]
+        if left_identifier.type != right_identifier.type:
+            raise TypeIncompatibilityError()
+        type_ = left_identifier.type
+
+        if is_relation:
+            folded = fold_relation(operation_sign, left_identifier, right_identifier)
+            if folded is None:
+                folded = RelationExpression(
+                    self._get_operand_name(left_identifier), operation_sign, self._get_operand_name(right_identifier)
+                )
+            operands.append(folded)
+            return
+
+        folded = fold_arithmetic(operation_sign, left_identifier, right_identifier, type_)
+        if folded is None:
+            folded = self._extend_chain(operation_sign, left_identifier, right_identifier)
+        if folded is not None:
+            operands.append(folded)
+            return
+
+        temp_var = ArithmeticOperationHandler.handle(
+            left_identifier_name=self._get_operand_name(left_identifier),
+            right_identifier_name=self._get_operand_name(right_identifier),
+            operation=operation_sign,
+            type_=type_,
+            context=self.context,
+        )
+        chain = Chain.create(self.context.commands[-1], operation_sign, left_identifier, right_identifier, type_)
+        if chain is not None:
+            self.chains[temp_var] = chain
+        operands.append(temp_var)
+
+    def _materialize(self, identifier):
+        """Временная переменная со значением логического выражения или сам операнд"""
+        if isinstance(identifier, BoolExpression):
+            return BoolExpressionHandler.handle(identifier, context=self.context)
+        return identifier
+
+    def _extend_chain(self, operation_sign, left_identifier, right_identifier):
+        """
+        Объединение операции с константой и временной переменной вида base + const (base * const).
+        Возвращает временную переменную или None, если объединить нельзя
+        """
+        if self._is_chain(left_identifier) and get_const(right_identifier) is not None:
+            temp_var, value, chain_is_left = left_identifier, get_const(right_identifier), True
+        elif self._is_chain(right_identifier) and get_const(left_identifier) is not None:
+            temp_var, value, chain_is_left = right_identifier, get_const(left_identifier), False
         else:
+            return None
+        if self.chains[temp_var].extend(operation_sign, value, chain_is_left):
+            return temp_var
+        return None
+
+    def _is_chain(self, identifier):
+        return isinstance(identifier, TempVar) and identifier in self.chains
+
+    @staticmethod
+    def _get_bool_operand_type(identifier):
+        """Тип операнда логической операции. Числовые константы в логических операциях недопустимы"""
+        if identifier in BOOL_TOKENS:
+            return BOOL
+        if not isinstance(identifier, IDENTIFIERS_CLASSES):
             raise WrongExpressionError()
-        # К этому моменту справа должен остаться только 1 токен
-        if len(tokens) != 1:
-            raise WrongExpressionError()
-        return tokens[0]
+        return identifier.type
+
+    @staticmethod
+    def _get_operand_name(identifier):
+        """Имя операнда в командах"""
+        if isinstance(identifier, (DigitalConstToken, ConstValue)):
+            return str(identifier.attr)
+        return identifier.name
@@ -0,0 +1,173 @@
+"""
+Вычисление операций над константами во время компиляции
+"""
+from dataclasses import dataclass
+from typing import Union
+
+from compilation.semantics import calculate, compare
+from lexical_analysis.const import INT
+from tokens import DigitalConstToken, TRUE_TOKEN, FALSE_TOKEN
+
+__all__ = [
+    'ConstValue',
+    'Chain',
+    'get_const',
+    'fold_not',
+    'fold_logical',
+    'fold_arithmetic',
+    'fold_relation',
+]
+
+
+@dataclass
+class ConstValue:
+    """Числовая константа, вычисленная при компиляции"""
+    attr: Union[int, float]
+    type: str
+
+    @property
+    def name(self):
+        return str(self.attr)
+
+
+def get_const(operand):
+    """Значение операнда-константы или None, если операнд не константа"""
+    if isinstance(operand, (DigitalConstToken, ConstValue)):
+        return operand.attr
+    if operand is TRUE_TOKEN:
+        return True
+    if operand is FALSE_TOKEN:
+        return False
+    return None
+
+
+def get_bool_token(value: bool):
+    return TRUE_TOKEN if value else FALSE_TOKEN
+
+
+def fold_not(operand):
+    """Результат not над константой или None"""
+    value = get_const(operand)
+    if value is None:
+        return None
+    return get_bool_token(not value)
+
+
+def fold_logical(is_and: bool, left, right):
+    """
+    Результат and (is_and) или or, если он известен при компиляции: обе части константы,
+    или одна константа определяет результат (x and False), или не влияет на него (x and True)
+    """
+    left_value, right_value = get_const(left), get_const(right)
+    if left_value is None and right_value is None:
+        return None
+    if left_value is not None and right_value is not None:
+        return get_bool_token(left_value and right_value if is_and else left_value or right_value)
+    value, other = (left_value, right) if left_value is not None else (right_value, left)
+    if is_and:
+        return other if value else FALSE_TOKEN
+    return TRUE_TOKEN if value else other
+
+
+def fold_arithmetic(operation: str, left, right, type_):
+    """
+    Результат арифметической операции, если он известен при компиляции: обе части константы
+    или тождество (x * 1, x - 0, x / 1; для целых также x + 0 и x * 0).
+    Деление на константный ноль не вычисляется и остаётся до выполнения
+    """
+    left_value, right_value = get_const(left), get_const(right)
+    if left_value is not None and right_value is not None:
+        try:
+            return ConstValue(attr=calculate(operation, left_value, right_value, type_), type=type_)
+        except ZeroDivisionError:
+            return None
+    if operation == '+' and type_ == INT:
+        # Для вещественных -0.0 + 0 == 0.0, поэтому тождество только для целых
+        if left_value == 0:
+            return right
+        if right_value == 0:
+            return left
+    elif operation == '-' and right_value == 0:
+        return left
+    elif operation == '*':
+        if left_value == 1:
+            return right
+        if right_value == 1:
+            return left
+        if type_ == INT and (left_value == 0 or right_value == 0):
+            return ConstValue(attr=0, type=INT)
+    elif operation == '/' and right_value == 1:
+        return left
+    return None
+
+
+def fold_relation(operation: str, left, right):
+    """Результат сравнения двух констант или None"""
+    left_value, right_value = get_const(left), get_const(right)
+    if left_value is None or right_value is None:
+        return None
+    return get_bool_token(compare(operation, left_value, right_value))
+
+
+class Chain(object):
+    """
+    Временная переменная вида base + const или base * const (целые) и команда, которая её вычисляет.
+    Следующая операция с константой объединяется с ней: (a + 1) + 2 -> a + 3.
+    Временная переменная используется один раз, поэтому её команду можно изменить
+    """
+    ADDITIVE = '+'
+    MULTIPLICATIVE = '*'
+
+    def __init__(self, command, base_name: str, kind: str, const: int):
+        self.command = command
+        self.base_name = base_name
+        self.kind = kind
+        self.const = const
+
+    @classmethod
+    def create(cls, command, operation: str, left, right, type_):
+        """Цепочка для только что созданной команды command = left operation right или None"""
+        if type_ != INT:
+            # Для вещественных (a + b) + c != a + (b + c)
+            return None
+        left_value, right_value = get_const(left), get_const(right)
+        if (left_value is None) == (right_value is None):
+            return None
+        if operation == '+':
+            if left_value is not None:
+                return cls(command, right.name, cls.ADDITIVE, left_value)
+            return cls(command, left.name, cls.ADDITIVE, right_value)
+        if operation == '-' and right_value is not None:
+            return cls(command, left.name, cls.ADDITIVE, -right_value)
+        if operation == '*':
+            if left_value is not None:
+                return cls(command, right.name, cls.MULTIPLICATIVE, left_value)
+            return cls(command, left.name, cls.MULTIPLICATIVE, right_value)
+        return None
+
+    def extend(self, operation: str, value: int, chain_is_left: bool) -> bool:
+        """Объединение операции operation с константой value. Возвращает, удалось ли"""
+        if self.kind == self.ADDITIVE and operation == '+':
+            self.const += value
+        elif self.kind == self.ADDITIVE and operation == '-' and chain_is_left:
+            self.const -= value
+        elif self.kind == self.MULTIPLICATIVE and operation == '*':
+            self.const *= value
+        else:
+            return False
+        self.command.source, self.command.operation, self.command.right = self._get_expression()
+        return True
+
+    def _get_expression(self):
+        """Левый операнд, операция и правый операнд команды"""
+        if self.kind == self.ADDITIVE:
+            if self.const > 0:
+                return self.base_name, '+', str(self.const)
+            if self.const < 0:
+                return self.base_name, '-', str(-self.const)
+            return self.base_name, None, None
+        if self.const == 1:
+            return self.base_name, None, None
+        if self.const == 0:
+            return '0', None, None
+        return self.base_name, '*', str(self.const)
@@ -1,96 +1,51 @@
+from compilation.context import default_context
 from lexical_analysis.const import BOOL
-from .commands import (
-    AssignmentCommand, ConditionCommand, GotoCommand, commands
-)
+from .boolean_expression import BoolExpression, backpatch
+from .commands import AssignmentCommand
 from .temp_var import TempVar
 
 
-class NotOperationHandler(object):
-    @classmethod
-    def handle(cls, identifier_name: str):
-        temp_var = TempVar(type_=BOOL)
-        cls.__generate_commands(temp_var.name, identifier_name)
-        return temp_var
-
-    @classmethod
-    def __generate_commands(cls, temp_var_name, identifier_name):
-        AssignmentCommand.create(temp_var_name, 'True')
-        ConditionCommand.create(cond=identifier_name, goto_command_ind=len(commands) + 2)
-        AssignmentCommand.create(temp_var_name, 'False')
-
-
-class AndOperationHandler(object):
-    @classmethod
-    def handle(cls, left_identifier_name: str, right_identifier_name: str):
-        temp_var = TempVar(type_=BOOL)
-        cls.__generate_commands(temp_var.name, left_identifier_name, right_identifier_name)
-        return temp_var
-
-    @classmethod
-    def __generate_commands(cls, temp_var_name: str, left_identifier_name: str, right_identifier_name: str):
-        commands_len = len(commands)
-
-        AssignmentCommand.create(temp_var_name, 'True')
-        ConditionCommand.create(cond=left_identifier_name, goto_command_ind=commands_len + 4)
-        AssignmentCommand.create(temp_var_name, 'False')
-        GotoCommand.create(next_command_ind=commands_len + 6)
-        ConditionCommand.create(cond=right_identifier_name, goto_command_ind=commands_len + 6)
-        AssignmentCommand.create(temp_var_name, 'False')
+class BoolExpressionHandler(object):
+    """Запись значения логического выражения во временную переменную"""
 
-
-class OrOperationHandler(object):
     @classmethod
-    def handle(cls, left_identifier_name: str, right_identifier_name: str):
-        temp_var = TempVar(type_=BOOL)
-        cls.__generate_commands(temp_var.name, left_identifier_name, right_identifier_name)
+    def handle(cls, expression: BoolExpression, context=default_context):
+        temp_var = TempVar(type_=BOOL, context=context)
+        cls.__generate_commands(temp_var.name, expression, context)
         return temp_var
 
     @classmethod
-    def __generate_commands(cls, temp_var_name: str, left_identifier_name: str, right_identifier_name: str):
-        commands_len = len(commands)
-
-        AssignmentCommand.create(temp_var_name, 'True')
-        ConditionCommand.create(cond=left_identifier_name, goto_command_ind=commands_len + 4)
-        ConditionCommand.create(cond=right_identifier_name, goto_command_ind=commands_len + 4)
-        AssignmentCommand.create(temp_var_name, 'False')
+    def __generate_commands(cls, temp_var_name: str, expression: BoolExpression, context):
+        AssignmentCommand.create(temp_var_name, 'False', context=context)
+        false_jumps = expression.generate_jumps(False, context)
+        AssignmentCommand.create(temp_var_name, 'True', context=context)
+        backpatch(false_jumps, len(context.commands))
 
 
 class ArithmeticOperationHandler(object):
     @classmethod
-    def handle(cls, left_identifier_name: str, right_identifier_name: str, operation: str, type_: str):
-        temp_var = TempVar(type_=type_)
-        cls.__generate_commands(temp_var.name, left_identifier_name, right_identifier_name, operation)
-        return temp_var
-
-    @classmethod
-    def __generate_commands(
-            cls, temp_var_name: str, left_identifier_name: str, right_identifier_name: str, operation: str
+    def handle(
+            cls, left_identifier_name: str, right_identifier_name: str, operation: str, type_: str,
+            context=default_context
     ):
-        source = f'{left_identifier_name} {operation} {right_identifier_name}'
-        AssignmentCommand.create(temp_var_name, source)
-
-
-class RelationOperationHandler(object):
-    @classmethod
-    def handle(cls, left_identifier_name: str, right_identifier_name: str, operation: str, type_: str):
-        temp_var = TempVar(type_=BOOL)
-        cls.__generate_commands(temp_var.name, left_identifier_name, right_identifier_name, operation)
+        temp_var = TempVar(type_=type_, context=context)
+        cls.__generate_commands(
+            temp_var.name, left_identifier_name, right_identifier_name, operation, type_, context
+        )
         return temp_var
 
     @classmethod
     def __generate_commands(
-            cls, temp_var_name: str, left_identifier_name: str, right_identifier_name: str, operation: str
+            cls, temp_var_name: str, left_identifier_name: str, right_identifier_name: str, operation: str,
+            type_: str, context
     ):
-        commands_len = len(commands)
-
-        AssignmentCommand.create(temp_var_name, 'True')
-        ConditionCommand.create(
-            cond=f'{left_identifier_name}{operation}{right_identifier_name}', goto_command_ind=commands_len + 3
+        AssignmentCommand.create(
+            temp_var_name, left_identifier_name, operation=operation, right=right_identifier_name, type=type_,
+            context=context
         )
-        AssignmentCommand.create(temp_var_name, 'False')
 
 
 class AssignmentHandler(object):
     @classmethod
-    def handle(cls, left_identifier_name: str, right_identifier_name: str):
-        AssignmentCommand.create(left_identifier_name, right_identifier_name)
+    def handle(cls, left_identifier_name: str, right_identifier_name: str, context=default_context):
+        AssignmentCommand.create(left_identifier_name, right_identifier_name, context=context)
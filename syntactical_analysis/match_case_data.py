@@ -1,17 +1,36 @@
 from typing import List
 
+from compilation.context import default_context
+from lexical_analysis.const import INT
+from .boolean_expression import backpatch
 from .custom_exceptions import TooManyDefaultCasesError, DefaultCaseWrongLocationError
 from .expression_analyzer import ExpressionAnalyzer
 from .utils import parse_identifiers
-from .commands import ConditionCommand, GotoCommand, commands
+from .commands import AssignmentCommand, ConditionCommand, GotoCommand, JumpTableCommand
 from .custom_exceptions import TypeIncompatibilityError
+from .temp_var import TempVar
+
+# Не больше стольких кейсов проверяются по очереди. Для большего количества целых - таблица или двоичный поиск
+LINEAR_MAX_CASES = 4
+# Таблица переходов строится, если занято не меньше этой доли значений от минимального до максимального
+JUMP_TABLE_MIN_DENSITY = 0.5
 
 
 class MatchCaseData(object):
-    def __init__(self):
+    # Способы выбора кейса
+    LINEAR = 'linear'
+    BINARY_SEARCH = 'binary_search'
+    JUMP_TABLE = 'jump_table'
+
+    def __init__(self, context=default_context):
+        self.context = context
         self.target_tokens = []
         self.cases = []  # type: List[CaseData]
         self.has_default = False
+        # Кейсы с уже встречавшимся значением. Они недостижимы, команды для них не генерируются
+        self.duplicate_cases = []  # type: List[CaseData]
+        # Выбранный способ выбора кейса
+        self.dispatch = None
 
     def check_cases(self):
         cases_count = len(self.cases)
@@ -24,31 +43,105 @@ class MatchCaseData(object):
                 self.has_default = True
 
     def analyze(self):
+        """
+        Значение target вычисляется один раз во временную переменную, затем выполняется переход на нужный кейс:
+        $t = target; <выбор кейса>; case1: ...; goto end; case2: ...; goto end; default: ...; end:
+        """
         self.check_cases()
         target = parse_identifiers(self.target_tokens)[0]
 
-        cond_commands = []
-        goto_commands = []
+        # Кейсы со значениями: значение -> кейс (первый из одинаковых)
+        value_cases = {}
+        for case in self.cases:
+            if case.const_token is None:
+                continue
+            if case.const_token.type != target.type:
+                raise TypeIncompatibilityError()
+            if case.const_token.attr in value_cases:
+                self.duplicate_cases.append(case)
+            else:
+                value_cases[case.const_token.attr] = case
+
+        temp_var = TempVar(type_=target.type, context=self.context)
+        AssignmentCommand.create(temp_var.name, target.name, context=self.context)
+        # Переходы на каждый кейс и на default (или конец), адреса которых станут известны позже
+        case_jumps = {value: [] for value in value_cases}
+        default_jumps = []
+        jump_table = None
 
+        values = sorted(value_cases)
+        self.dispatch = self._choose_dispatch(target.type, values)
+        if self.dispatch == self.JUMP_TABLE:
+            jump_table = JumpTableCommand.create(temp_var.name, low=values[0], context=self.context)
+        elif self.dispatch == self.BINARY_SEARCH:
+            self._generate_binary_search(temp_var.name, values, case_jumps, default_jumps)
+        else:
+            self._generate_linear(temp_var.name, list(value_cases), case_jumps, default_jumps)
+
+        # Значение -> индекс первой команды кейса. Для default - ключ None
+        case_indices = {}
+        end_jumps = []
+        duplicate_cases = set(self.duplicate_cases)
         for case in self.cases:
-            if case.const_token:
-                if case.const_token.type != target.type:
-                    raise TypeIncompatibilityError()
-                # Метку следующей команды поставим позже
-                cond_command = ConditionCommand.create(f'{target.name} != {case.const_token.attr}')
-                cond_commands.append(cond_command)
-
-            ExpressionAnalyzer(tokens=case.expression_tokens)
-            if case.const_token:
-                goto_command = GotoCommand.create()
-                goto_commands.append(goto_command)
-
-        commands_count = len(commands)
-        for cond_command in cond_commands:
-            cond_command.goto_command_ind = commands_count
-
-        for goto_command in goto_commands:
-            goto_command.next_command_ind = commands_count
+            if case in duplicate_cases:
+                # Выражение проверяется, но его команды не нужны
+                commands_count = len(self.context.commands)
+                ExpressionAnalyzer(tokens=case.expression_tokens, context=self.context)
+                del self.context.commands[commands_count:]
+                continue
+            value = None if case.const_token is None else case.const_token.attr
+            case_indices[value] = len(self.context.commands)
+            backpatch(default_jumps if value is None else case_jumps[value], case_indices[value])
+            ExpressionAnalyzer(tokens=case.expression_tokens, context=self.context)
+            if case.const_token is not None:
+                end_jumps.append(GotoCommand.create(context=self.context))
+
+        commands_count = len(self.context.commands)
+        backpatch(end_jumps, commands_count)
+        default_command_ind = case_indices.get(None, commands_count)
+        backpatch(default_jumps, default_command_ind)
+        if jump_table is not None:
+            jump_table.default_command_ind = default_command_ind
+            jump_table.targets = [
+                case_indices.get(value, default_command_ind) for value in range(values[0], values[-1] + 1)
+            ]
+
+    @classmethod
+    def _choose_dispatch(cls, type_, values):
+        if type_ != INT or len(values) <= LINEAR_MAX_CASES:
+            return cls.LINEAR
+        if len(values) >= JUMP_TABLE_MIN_DENSITY * (values[-1] - values[0] + 1):
+            return cls.JUMP_TABLE
+        return cls.BINARY_SEARCH
+
+    def _generate_linear(self, value_name, values, case_jumps, default_jumps):
+        """if $t == value1 goto case1; if $t == value2 goto case2; ...; goto default"""
+        for value in values:
+            case_jumps[value].append(ConditionCommand.create(
+                value_name, operation='==', right=str(value), context=self.context
+            ))
+        default_jumps.append(GotoCommand.create(context=self.context))
+
+    def _generate_binary_search(self, value_name, values, case_jumps, default_jumps):
+        """
+        Дерево сравнений по отсортированным values: if $t >= middle goto <правая половина>; <левая половина>.
+        Диапазоны из нескольких значений проверяются по очереди. Глубина дерева - log2(len(values))
+        """
+        # Диапазоны, для которых ещё нужно сгенерировать код, и переходы на их начало
+        stack = [(0, len(values), [])]
+        while stack:
+            start, end, jumps = stack.pop()
+            backpatch(jumps, len(self.context.commands))
+            if end - start <= LINEAR_MAX_CASES:
+                self._generate_linear(value_name, values[start:end], case_jumps, default_jumps)
+                continue
+            middle = (start + end) // 2
+            right_jump = ConditionCommand.create(
+                value_name, operation='>=', right=str(values[middle]), context=self.context
+            )
+            # Левая половина генерируется сразу после сравнения, правая - после левой
+            stack.append((middle, end, [right_jump]))
+            stack.append((start, middle, []))
 
 
 class CaseData(object):
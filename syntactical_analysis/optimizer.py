@@ -0,0 +1,284 @@
+"""
+Оптимизация сгенерированных команд
+"""
+from collections import defaultdict
+from typing import List, Set
+
+from .commands import (
+    AssignmentCommand,
+    ConditionCommand,
+    GotoCommand,
+    NoopCommand,
+    falls_through,
+    get_jump_targets,
+    map_jump_targets,
+)
+from .temp_var import is_temp_name
+
+__all__ = [
+    'optimize',
+    'propagate_copies',
+    'remove_commands',
+    'simplify_jumps',
+]
+
+
+def optimize(commands: List) -> List:
+    """
+    Оптимизированный список команд. Команды исходного списка могут измениться.
+    Упрощение переходов объединяет линейные участки, после чего снова можно распространять копии
+    """
+    while True:
+        commands_count = len(commands)
+        commands = simplify_jumps(propagate_copies(commands))
+        if len(commands) == commands_count:
+            return commands
+
+
+def remove_commands(commands: List, removed: Set[int]) -> List:
+    """
+    Список команд без команд с индексами из removed.
+    Переход на удалённую команду становится переходом на следующую оставшуюся
+    """
+    if not removed:
+        return commands
+    # Новый индекс каждой команды (и конца списка)
+    new_indices = []
+    count = 0
+    for command_ind in range(len(commands)):
+        new_indices.append(count)
+        if command_ind not in removed:
+            count += 1
+    new_indices.append(count)
+
+    result = []
+    for command_ind, command in enumerate(commands):
+        if command_ind in removed:
+            continue
+        map_jump_targets(command, new_indices.__getitem__)
+        result.append(command)
+    return result
+
+
+def propagate_copies(commands: List) -> List:
+    """
+    Распространение копий и удаление лишних временных переменных. Повторяется, пока что-то меняется:
+    - $1 = a; x = $1 + b  ->  x = a + b
+    - $1 = a + b; x = $1  ->  x = a + b (результат сразу пишется в x)
+    - временные переменные, которые не читаются, не вычисляются (кроме деления, которое может
+      остановить выполнение делением на ноль)
+    """
+    while True:
+        removed = _CopyPropagation(commands).run()
+        if not removed:
+            return commands
+        commands = remove_commands(commands, removed)
+
+
+class _CopyPropagation(object):
+    """Один проход распространения копий"""
+
+    def __init__(self, commands):
+        self.commands = commands
+        # Временная переменная -> индексы присвоений ей и индексы команд, которые её читают
+        self.defs = defaultdict(list)
+        self.uses = defaultdict(list)
+        # Индекс команды -> индексы команд, которые на неё переходят
+        self.jumps_to = defaultdict(list)
+        # Номер линейного участка каждой команды: внутрь участка переходов нет, переходы - только в конце
+        self.blocks = []
+        self.removed = set()
+        # Команды, изменённые в этом проходе. Каждая команда участвует не больше чем в одной замене,
+        # иначе замены могут противоречить друг другу
+        self.touched = set()
+
+        block = 0
+        for command_ind, command in enumerate(commands):
+            for target in get_jump_targets(command):
+                self.jumps_to[target].append(command_ind)
+        for command_ind, command in enumerate(commands):
+            if command_ind in self.jumps_to:
+                block += 1
+            self.blocks.append(block)
+            if get_jump_targets(command):
+                block += 1
+            if isinstance(command, AssignmentCommand) and is_temp_name(command.target):
+                self.defs[command.target].append(command_ind)
+            for operand in getattr(command, 'operands', ()):
+                if is_temp_name(operand):
+                    self.uses[operand].append(command_ind)
+
+    def run(self) -> Set[int]:
+        for temp_name, def_indices in self.defs.items():
+            use_indices = self.uses[temp_name]
+            if not use_indices:
+                # Значение не читается
+                self.removed.update(
+                    def_ind for def_ind in def_indices if not _may_divide_by_zero(self.commands[def_ind])
+                )
+            elif len(use_indices) == 1 and not self.removed.intersection(def_indices):
+                if not self._propagate(def_indices, use_indices[0]):
+                    self._forward(temp_name, def_indices, use_indices[0])
+        return self.removed
+
+    def _is_untouched(self, first_ind, last_ind) -> bool:
+        return self.touched.isdisjoint(range(first_ind, last_ind + 1))
+
+    def _touch(self, first_ind, last_ind):
+        self.touched.update(range(first_ind, last_ind + 1))
+
+    def _propagate(self, def_indices, use_ind) -> bool:
+        """$1 = a; ... $1 ... -> ... a ... в пределах линейного участка"""
+        if len(def_indices) != 1:
+            return False
+        def_ind = def_indices[0]
+        command = self.commands[def_ind]
+        if (
+                command.operation is not None or def_ind > use_ind or use_ind in self.removed or
+                self.blocks[def_ind] != self.blocks[use_ind] or not self._is_untouched(def_ind, use_ind)
+        ):
+            return False
+        source = command.source
+        for command_ind in range(def_ind + 1, use_ind):
+            if getattr(self.commands[command_ind], 'target', None) == source:
+                # Между присвоением и использованием source изменилась
+                return False
+        self.commands[use_ind].replace_operand(command.target, source)
+        self.removed.add(def_ind)
+        self._touch(def_ind, use_ind)
+        return True
+
+    def _forward(self, temp_name, def_indices, use_ind) -> bool:
+        """
+        $1 = ...; ...; x = $1  ->  x = ...; ...
+        Допустимо, если между первым присвоением $1 и копированием x не изменяется и не читается
+        (кроме самого первого присвоения: x = x + 1),
+        а переходы не выходят из этого участка и не входят в его середину
+        """
+        command = self.commands[use_ind]
+        if not isinstance(command, AssignmentCommand) or command.operation is not None or use_ind in self.removed:
+            return False
+        first_ind = def_indices[0]
+        if def_indices[-1] > use_ind or not self._is_untouched(first_ind, use_ind):
+            return False
+        target = command.target
+        for command_ind in range(first_ind, use_ind):
+            other = self.commands[command_ind]
+            if command_ind in self.removed:
+                return False
+            if command_ind > first_ind and target in getattr(other, 'operands', ()):
+                # Первая команда читает x до записи в него (x = x + 1), следующие прочитали бы новое значение
+                return False
+            if getattr(other, 'target', None) == target:
+                return False
+            if any(not first_ind <= jump_target <= use_ind for jump_target in get_jump_targets(other)):
+                return False
+            if command_ind > first_ind and any(
+                    not first_ind <= source_ind <= use_ind for source_ind in self.jumps_to.get(command_ind, ())
+            ):
+                return False
+        if any(not first_ind <= source_ind <= use_ind for source_ind in self.jumps_to.get(use_ind, ())):
+            return False
+        for def_ind in def_indices:
+            self.commands[def_ind].target = target
+        self.removed.add(use_ind)
+        self._touch(first_ind, use_ind)
+        return True
+
+
+def simplify_jumps(commands: List) -> List:
+    """
+    Упрощение переходов. Повторяется, пока что-то меняется:
+    - переход на goto или noop заменяется переходом туда, куда они ведут;
+    - переход на следующую команду удаляется;
+    - if c goto L1; goto L2; L1: ...  ->  if not c goto L2; L1: ...
+    - недостижимые команды и noop, на которые нет переходов, удаляются
+    """
+    while True:
+        _thread_jumps(commands)
+        removed = _find_redundant_jumps(commands) or _find_unreachable(commands) or _find_noops(commands)
+        if not removed:
+            return commands
+        commands = remove_commands(commands, removed)
+
+
+def _resolve(commands, command_ind: int) -> int:
+    """Индекс первой команды, которая что-то делает, при переходе на command_ind"""
+    visited = set()
+    while command_ind < len(commands) and command_ind not in visited:
+        visited.add(command_ind)
+        command = commands[command_ind]
+        if isinstance(command, GotoCommand):
+            command_ind = command.next_command_ind
+        elif isinstance(command, NoopCommand) and command_ind + 1 < len(commands):
+            command_ind += 1
+        else:
+            break
+    return command_ind
+
+
+def _thread_jumps(commands):
+    for command in commands:
+        map_jump_targets(command, lambda target: _resolve(commands, target))
+
+
+def _find_redundant_jumps(commands) -> Set[int]:
+    """Переходы на следующую команду и goto, которые можно убрать инверсией предыдущего условия"""
+    jumps_to = defaultdict(int)
+    for command in commands:
+        for target in get_jump_targets(command):
+            jumps_to[target] += 1
+
+    removed = set()
+    command_ind = 0
+    while command_ind < len(commands):
+        command = commands[command_ind]
+        # Таблицы переходов не удаляются: у них несколько целей
+        target = get_jump_targets(command)[0] if isinstance(command, (GotoCommand, ConditionCommand)) else None
+        if target is not None and target == _resolve(commands, command_ind + 1):
+            # Переход и без него ведёт туда же, а условие не имеет побочных эффектов
+            removed.add(command_ind)
+        elif (
+                isinstance(command, ConditionCommand) and target == command_ind + 2 and
+                isinstance(commands[command_ind + 1], GotoCommand) and not jumps_to[command_ind + 1]
+        ):
+            command.negated = not command.negated
+            command.goto_command_ind = commands[command_ind + 1].next_command_ind
+            removed.add(command_ind + 1)
+            command_ind += 1
+        command_ind += 1
+    return removed
+
+
+def _find_unreachable(commands) -> Set[int]:
+    reachable = set()
+    stack = [0]
+    while stack:
+        command_ind = stack.pop()
+        if command_ind >= len(commands) or command_ind in reachable:
+            continue
+        reachable.add(command_ind)
+        command = commands[command_ind]
+        stack.extend(get_jump_targets(command))
+        if falls_through(command):
+            stack.append(command_ind + 1)
+    return set(range(len(commands))) - reachable
+
+
+def _find_noops(commands) -> Set[int]:
+    """noop, кроме последней команды, на которую есть переход: без неё переход вёл бы за конец программы"""
+    removed = {command_ind for command_ind, command in enumerate(commands) if isinstance(command, NoopCommand)}
+    last_ind = len(commands) - 1
+    if last_ind in removed and any(last_ind in get_jump_targets(command) for command in commands):
+        removed.remove(last_ind)
+    return removed
+
+
+def _may_divide_by_zero(command) -> bool:
+    """Деление, делитель которого - не ненулевая константа"""
+    if command.operation != '/':
+        return False
+    right = command.right
+    if right[0].isdigit() or right[0] in '-.':
+        return float(right) == 0
+    return True
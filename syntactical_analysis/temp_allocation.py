@@ -0,0 +1,145 @@
+"""
+Распределение временных переменных по небольшому набору ячеек.
+Временные переменные, которые не живы одновременно, получают одно имя $n
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Set
+
+from .commands import AssignmentCommand, falls_through, get_jump_targets
+from .temp_var import TEMP_PREFIX, is_temp_name
+
+__all__ = [
+    'TempAllocation',
+    'allocate_temps',
+]
+
+
+@dataclass
+class TempAllocation:
+    """Результат распределения временных переменных"""
+    # Количество временных переменных до и после распределения
+    temps_count: int = 0
+    slots_count: int = 0
+    # Наибольшее количество одновременно живых временных переменных
+    peak_live: int = 0
+
+    def __str__(self):
+        return (
+            f'Временные переменные: {self.temps_count}, ячейки: {self.slots_count}, '
+            f'одновременно живы: {self.peak_live}'
+        )
+
+
+def allocate_temps(commands: List) -> TempAllocation:
+    """Переименование временных переменных в командах: каждой назначается ячейка $1, $2, ..."""
+    live_out = _get_live_out(commands)
+    # Граф конфликтов: временные переменные, которые не могут занимать одну ячейку
+    conflicts = defaultdict(set)  # type: Dict[str, Set[str]]
+    # Временные переменные в порядке первого присвоения
+    temps = {}
+    peak_live = 0
+    for command_ind, command in enumerate(commands):
+        live = live_out[command_ind]
+        peak_live = max(peak_live, len(live))
+        target = _get_temp_target(command)
+        if target is None:
+            continue
+        temps.setdefault(target, None)
+        # Присвоение портит ячейку, поэтому она не должна быть занята живыми после команды переменными
+        for temp_name in live:
+            if temp_name != target:
+                conflicts[target].add(temp_name)
+                conflicts[temp_name].add(target)
+
+    slots = {}
+    for temp_name in temps:
+        busy = {slots[other] for other in conflicts[temp_name] if other in slots}
+        slot = 1
+        while slot in busy:
+            slot += 1
+        slots[temp_name] = slot
+
+    names = {temp_name: f'{TEMP_PREFIX}{slot}' for temp_name, slot in slots.items()}
+    for command in commands:
+        if hasattr(command, 'rename'):
+            command.rename(names)
+    return TempAllocation(temps_count=len(slots), slots_count=max(slots.values(), default=0), peak_live=peak_live)
+
+
+def _get_temp_target(command):
+    if isinstance(command, AssignmentCommand) and is_temp_name(command.target):
+        return command.target
+    return None
+
+
+def _get_temp_operands(command):
+    return {operand for operand in getattr(command, 'operands', ()) if is_temp_name(operand)}
+
+
+def _get_live_out(commands) -> List[Set[str]]:
+    """
+    Временные переменные, живые после каждой команды (значение может быть прочитано позже).
+    Анализ потока данных по линейным участкам до неподвижной точки
+    """
+    commands_count = len(commands)
+    # Начала линейных участков: первая команда, цели переходов и команды после переходов
+    leaders = {0}
+    for command_ind, command in enumerate(commands):
+        targets = get_jump_targets(command)
+        if targets:
+            leaders.update(targets)
+            leaders.add(command_ind + 1)
+    leaders = sorted(leader for leader in leaders if leader < commands_count)
+    blocks = list(zip(leaders, leaders[1:] + [commands_count]))
+    block_by_start = {start: block_ind for block_ind, (start, _) in enumerate(blocks)}
+
+    successors = []
+    uses = []
+    definitions = []
+    for start, end in blocks:
+        last = commands[end - 1]
+        block_successors = []
+        for target in set(get_jump_targets(last)):
+            if target < commands_count:
+                block_successors.append(block_by_start[target])
+        if falls_through(last) and end < commands_count:
+            block_successors.append(block_by_start[end])
+        successors.append(block_successors)
+        # Читаемые до присвоения в участке и присваиваемые в участке
+        block_uses, block_definitions = set(), set()
+        for command in commands[start:end]:
+            block_uses.update(_get_temp_operands(command) - block_definitions)
+            target = _get_temp_target(command)
+            if target is not None:
+                block_definitions.add(target)
+        uses.append(block_uses)
+        definitions.append(block_definitions)
+
+    block_live_in = [set() for _ in blocks]
+    block_live_out = [set() for _ in blocks]
+    changed = True
+    while changed:
+        changed = False
+        # Переходы в основном вперёд, поэтому обратный порядок сходится за один-два прохода
+        for block_ind in reversed(range(len(blocks))):
+            live = set()
+            for successor in successors[block_ind]:
+                live |= block_live_in[successor]
+            block_live_out[block_ind] = live
+            live_in = uses[block_ind] | (live - definitions[block_ind])
+            if live_in != block_live_in[block_ind]:
+                block_live_in[block_ind] = live_in
+                changed = True
+
+    live_out = [set() for _ in commands]
+    for block_ind, (start, end) in enumerate(blocks):
+        live = set(block_live_out[block_ind])
+        for command_ind in reversed(range(start, end)):
+            command = commands[command_ind]
+            live_out[command_ind] = set(live)
+            target = _get_temp_target(command)
+            if target is not None:
+                live.discard(target)
+            live |= _get_temp_operands(command)
+    return live_out
@@ -1,16 +1,23 @@
-temp_vars_count = 0
+from compilation.context import default_context
+
+# Имена временных переменных начинаются с этого символа
+TEMP_PREFIX = '$'
 
 
 class TempVar(object):
-    def __init__(self, type_):
-        global temp_vars_count
+    def __init__(self, type_, context=default_context):
         self.type = type_
-        self.code = temp_vars_count + 1
-        temp_vars_count += 1
+        context.temp_vars_count += 1
+        self.code = context.temp_vars_count
 
     def __str__(self):
         return self.name
 
     @property
     def name(self):
-        return f'${self.code}'
+        return f'{TEMP_PREFIX}{self.code}'
+
+
+def is_temp_name(name: str) -> bool:
+    """Является ли операнд команды временной переменной"""
+    return name.startswith(TEMP_PREFIX)
@@ -0,0 +1,2 @@
+# Исходники для анализаторов, а не doctest (pytest по умолчанию собирает test*.txt)
+collect_ignore_glob = ['*.txt']
@@ -0,0 +1,106 @@
+"""
+Случайные программы и входные данные для сравнения способов компиляции и выполнения.
+Программа определяется номером seed, поэтому упавший тест воспроизводится по номеру
+"""
+import random
+
+from .utils import make_program
+
+INT_NAMES = ['a', 'b', 'c']
+FLOAT_NAMES = ['x', 'y']
+BOOL_NAMES = ['p', 'q']
+DECLARATIONS = (
+    [f'int {name}' for name in INT_NAMES] + [f'float {name}' for name in FLOAT_NAMES]
+    + [f'bool {name}' for name in BOOL_NAMES]
+)
+INT_CONSTS = ['1', '2', '3', '7']
+FLOAT_CONSTS = ['0.5', '1.5', '2.0']
+RELATIONS = ['==', '!=', '<', '<=', '>', '>=']
+
+
+def generate_program(seed: int, statements_count: int = 8, with_match: bool = True) -> str:
+    """Текст программы: присваивания целых, вещественных и логических выражений и, возможно, match в конце"""
+    generator = _Generator(random.Random(seed))
+    statements = [generator.statement() for _ in range(statements_count)]
+    if with_match and generator.random.random() < 0.5:
+        statements += generator.match()
+    return make_program(DECLARATIONS, statements)
+
+
+def generate_inputs(seed: int, nonzero: bool = False) -> dict:
+    """Значения всех переменных программы. nonzero - без нулевых целых"""
+    rng = random.Random(seed)
+    # Значения из case тоже встречаются
+    ints = [value for value in [*range(-9, 10), 20, 40, 60] if value or not nonzero]
+    inputs = {name: rng.choice(ints) for name in INT_NAMES}
+    inputs.update({name: rng.choice([-3.0, -0.5, 0.25, 1.5, 4.0]) for name in FLOAT_NAMES})
+    inputs.update({name: rng.random() < 0.5 for name in BOOL_NAMES})
+    return inputs
+
+
+class _Generator(object):
+    def __init__(self, rng: random.Random):
+        self.random = rng
+
+    def statement(self):
+        kind = self.random.random()
+        if kind < 0.35:
+            return f'{self.random.choice(INT_NAMES)} = {self.arithmetic(INT_NAMES, INT_CONSTS)}'
+        if kind < 0.55:
+            return f'{self.random.choice(FLOAT_NAMES)} = {self.arithmetic(FLOAT_NAMES, FLOAT_CONSTS)}'
+        return f'{self.random.choice(BOOL_NAMES)} = {self.boolean()}'
+
+    def arithmetic(self, names, consts, length=None):
+        """Арифметическое выражение со скобками"""
+        if length is None:
+            length = self.random.randint(1, 5)
+        parts = []
+        depth = 0
+        for ind in range(length):
+            if ind:
+                parts.append(self.random.choice('+-*/'))
+            if self.random.random() < 0.2:
+                parts.append('(')
+                depth += 1
+            parts.append(self.random.choice(names) if self.random.random() < 0.7 else self.random.choice(consts))
+            if depth and self.random.random() < 0.3:
+                parts.append(')')
+                depth -= 1
+        parts += [')'] * depth
+        return ' '.join(parts)
+
+    def boolean(self):
+        """Логическое выражение: and, or, not и не больше одного (так требует язык) сравнения в скобках"""
+        parts = []
+        has_relation = False
+        for ind in range(self.random.randint(1, 5)):
+            if ind:
+                parts.append(self.random.choice(['and', 'or']))
+            if self.random.random() < 0.3:
+                parts.append('not')
+            kind = self.random.random()
+            if kind < 0.4 and not has_relation:
+                has_relation = True
+                names, consts = (INT_NAMES, INT_CONSTS) if self.random.random() < 0.7 else (FLOAT_NAMES, FLOAT_CONSTS)
+                relation = self.random.choice(RELATIONS)
+                parts.append(
+                    f'({self.arithmetic(names, consts, 2)} {relation} {self.arithmetic(names, consts, 1)})'
+                )
+            elif kind < 0.9:
+                parts.append(self.random.choice(BOOL_NAMES))
+            else:
+                parts.append(self.random.choice(['True', 'False']))
+        return ' '.join(parts)
+
+    def match(self):
+        """match по целой переменной: плотные или редкие неотрицательные значения, возможно с case _"""
+        count = self.random.choice([1, 3, 6, 12])
+        spread = self.random.choice([1, 3, 20])
+        values = sorted(self.random.sample(range(count * spread), count))
+        lines = [f'match {self.random.choice(INT_NAMES)}:']
+        for value in values:
+            target, source = self.random.choice(INT_NAMES), self.random.choice(INT_NAMES)
+            lines += [f'\tcase {value}:', f'\t\t{target} = {value} + {source}']
+        if self.random.random() < 0.5:
+            lines += ['\tcase _:', f'\t\t{self.random.choice(BOOL_NAMES)} = {self.boolean()}']
+        return lines
@@ -0,0 +1,63 @@
+"""
+Эталонный интерпретатор команд для тестов.
+Выполняет команды по одной, как они записаны, без компиляции и оптимизаций. С ним сравниваются
+оптимизатор и все способы выполнения (execution)
+"""
+from compilation.semantics import calculate, compare
+from syntactical_analysis.commands import (
+    AssignmentCommand, ConditionCommand, GotoCommand, JumpTableCommand, NoopCommand,
+)
+from syntactical_analysis.temp_var import is_temp_name
+
+# Наибольшее количество выполненных команд: программы компилятора не содержат циклов
+MAX_STEPS = 10 ** 6
+
+
+def run_commands(commands, inputs):
+    """Значения всех переменных (и временных) после выполнения команд"""
+    values = dict(inputs)
+
+    def get(operand):
+        if operand in ('True', 'False'):
+            return operand == 'True'
+        if operand[0].isdigit() or operand[0] in '-.':
+            try:
+                return int(operand)
+            except ValueError:
+                return float(operand)
+        return values[operand]
+
+    command_ind = 0
+    for _ in range(MAX_STEPS):
+        if command_ind >= len(commands):
+            return values
+        command = commands[command_ind]
+        command_ind += 1
+        if isinstance(command, AssignmentCommand):
+            value = get(command.source)
+            if command.operation is not None:
+                # Тип операции записан в команде при компиляции
+                value = calculate(command.operation, value, get(command.right), command.type)
+            values[command.target] = value
+        elif isinstance(command, ConditionCommand):
+            value = get(command.cond)
+            if command.operation is not None:
+                value = compare(command.operation, value, get(command.right))
+            if bool(value) != command.negated:
+                command_ind = command.goto_command_ind
+        elif isinstance(command, GotoCommand):
+            command_ind = command.next_command_ind
+        elif isinstance(command, JumpTableCommand):
+            offset = get(command.value) - command.low
+            if 0 <= offset < len(command.targets):
+                command_ind = command.targets[offset]
+            else:
+                command_ind = command.default_command_ind
+        elif not isinstance(command, NoopCommand):
+            raise TypeError(f'Неизвестная команда: {command}')
+    raise RuntimeError('Слишком много выполненных команд')
+
+
+def user_values(values):
+    """Значения переменных программы, без временных"""
+    return {name: value for name, value in values.items() if not is_temp_name(name)}
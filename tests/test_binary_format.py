@@ -0,0 +1,117 @@
+"""Двоичный формат команд: сохранение без потерь и проверка повреждённых данных"""
+import pytest
+
+from syntactical_analysis.binary_format import (
+    ASSIGNMENT, GOTO, NONE, RECORD, dump_binary, dumps_binary, load_binary, loads_binary,
+)
+from syntactical_analysis.commands import AssignmentCommand, GotoCommand, JumpTableCommand
+from syntactical_analysis.custom_exceptions import BinaryFormatError, BinaryVersionError
+from .utils import compile_text, make_program
+
+
+def match_statements(values):
+    statements = ['match a:']
+    for value in values:
+        statements += [f'\tcase {value}:', f'\t\tb = {value} + a']
+    return statements + ['\tcase _:', '\t\tb = 0']
+
+
+PROGRAMS = {
+    'arithmetic': make_program(
+        ['int a', 'int b', 'float c', 'float d', 'bool e'],
+        ['c = c / d', 'b = (a + 3) * b / 2', 'e = (a > b) and not e'],
+    ),
+    'jump_table': make_program(['int a', 'int b'], match_statements(range(10))),
+    'binary_search': make_program(['int a', 'int b'], match_statements(range(0, 1000, 50))),
+}
+
+
+def fields(command):
+    """Всё, что хранит команда, включая тип операции, которого нет в тексте"""
+    return type(command), str(command), getattr(command, 'type', None)
+
+
+@pytest.mark.parametrize('name', PROGRAMS)
+def test_round_trip(name, tmp_path):
+    commands = compile_text(PROGRAMS[name])
+    assert list(map(fields, loads_binary(dumps_binary(commands)))) == list(map(fields, commands))
+    path = str(tmp_path / 'program.tac')
+    dump_binary(commands, path)
+    with load_binary(path) as loaded:
+        assert list(map(fields, loaded)) == list(map(fields, commands))
+
+
+def test_jump_table_in_programs():
+    commands = compile_text(PROGRAMS['jump_table'])
+    assert any(isinstance(command, JumpTableCommand) for command in commands)
+
+
+@pytest.mark.parametrize('name', PROGRAMS)
+def test_corrupted_bytes(name):
+    """После изменения любого байта - те же команды, другие команды или BinaryFormatError"""
+    data = dumps_binary(compile_text(PROGRAMS[name]))
+    for position in range(len(data)):
+        for value in (0, 0xFF, data[position] ^ 0x01, data[position] ^ 0x80):
+            corrupted = bytearray(data)
+            corrupted[position] = value
+            try:
+                list(loads_binary(bytes(corrupted)))
+            except BinaryFormatError:
+                pass
+
+
+@pytest.mark.parametrize('length', [0, 3, 10, 40])
+def test_truncated(length):
+    data = dumps_binary(compile_text(PROGRAMS['arithmetic']))
+    with pytest.raises(BinaryFormatError):
+        list(loads_binary(data[:length]))
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / 'empty.tac'
+    path.write_bytes(b'')
+    with pytest.raises(BinaryFormatError):
+        load_binary(str(path))
+
+
+def test_unsupported_version():
+    data = bytearray(dumps_binary([]))
+    # Версия - после длины заголовка и сигнатуры
+    data[8] += 1
+    with pytest.raises(BinaryVersionError):
+        loads_binary(bytes(data))
+
+
+def replace_record(commands, command_ind, *record):
+    """Данные команд, в которых запись command_ind заменена"""
+    data = bytearray(dumps_binary(commands))
+    offset = loads_binary(bytes(data)).records_start + command_ind * RECORD.size
+    data[offset:offset + RECORD.size] = RECORD.pack(*record)
+    return loads_binary(bytes(data))
+
+
+@pytest.mark.parametrize('record', [
+    # Индекс строки за пределами пула
+    (ASSIGNMENT, 0, 0, 0, 100, NONE, NONE),
+    # Нет обязательного операнда
+    (ASSIGNMENT, 0, 0, NONE, 0, NONE, NONE),
+    # Правый операнд без операции и операция без правого операнда
+    (ASSIGNMENT, 0, 0, 0, 0, 0, NONE),
+    (ASSIGNMENT, 1, 0, 0, 0, NONE, NONE),
+    # Неизвестная операция и неизвестный вид команды
+    (ASSIGNMENT, 100, 0, 0, 0, NONE, NONE),
+    (100, 0, 0, NONE, NONE, NONE, NONE),
+    # Переход за конец программы
+    (GOTO, 0, 0, 3, NONE, NONE, NONE),
+])
+def test_invalid_record(record):
+    commands = [AssignmentCommand('a', '1'), GotoCommand(2)]
+    loaded = replace_record(commands, 1, *record)
+    assert str(loaded[0]) == 'a = 1'
+    with pytest.raises(BinaryFormatError):
+        loaded[1]
+
+
+def test_jump_to_end():
+    commands = [AssignmentCommand('a', '1'), GotoCommand(2)]
+    assert str(loads_binary(dumps_binary(commands))[1]) == 'goto 2'
@@ -0,0 +1,59 @@
+"""Генерация переходов для логических выражений (boolean_expression)"""
+import itertools
+
+import pytest
+
+from .tac_interpreter import run_commands
+from .utils import compile_text, make_program
+
+DECLARATIONS = ['bool a', 'bool b', 'bool r']
+
+
+def nested_expression(depth):
+    """
+    Выражение с чередующимися and, or, not и скобками глубины depth и функция его значения.
+    Значение считается без рекурсии и без eval: вложенность больше, чем допускает парсер Python
+    """
+    expression = 'a'
+    levels = []
+    for level in range(depth):
+        operation = 'and' if level % 2 else 'or'
+        negated = level % 3 == 0
+        expression = f'b {operation} ({expression})'
+        if negated:
+            expression = f'not ({expression})'
+        levels.append((operation, negated))
+
+    def evaluate(a, b):
+        value = a
+        for operation, negated in levels:
+            value = (b and value) if operation == 'and' else (b or value)
+            if negated:
+                value = not value
+        return value
+
+    return expression, evaluate
+
+
+@pytest.mark.parametrize('optimization', [True, False])
+@pytest.mark.parametrize('depth', [1, 2, 7, 50, 3000])
+def test_nested_expression(depth, optimization):
+    expression, evaluate = nested_expression(depth)
+    commands = compile_text(make_program(DECLARATIONS, [f'r = {expression}']), optimization)
+    for a, b in itertools.product([False, True], repeat=2):
+        assert run_commands(commands, {'a': a, 'b': b})['r'] is evaluate(a, b)
+
+
+@pytest.mark.parametrize('statement, expected', [
+    ('r = not a', lambda a, b: not a),
+    ('r = not not a', lambda a, b: a),
+    ('r = not (a and b)', lambda a, b: not (a and b)),
+    ('r = not a and b', lambda a, b: (not a) and b),
+    ('r = a or not b', lambda a, b: a or not b),
+    ('r = not a == b', lambda a, b: (not a) == b),
+    ('r = not True or a', lambda a, b: a),
+])
+def test_not(statement, expected):
+    commands = compile_text(make_program(DECLARATIONS, [statement]))
+    for a, b in itertools.product([False, True], repeat=2):
+        assert run_commands(commands, {'a': a, 'b': b})['r'] is expected(a, b)
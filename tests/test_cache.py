@@ -0,0 +1,132 @@
+"""Кэш результатов компиляции: попадания, файлы на диске, повреждённые записи и вытеснение"""
+import os
+
+import pytest
+
+from compilation.cache import CompilationCache, _decode_entry, _encode_entry, compile_data
+from syntactical_analysis.custom_exceptions import BinaryFormatError
+from .utils import make_program
+
+ENCODING = 'utf-8'
+
+
+def make_source(number):
+    """
+    Исходник с идентификаторами, целыми и вещественными константами, делением и match.
+    Для number от 10 до 99 размеры результатов одинаковы
+    """
+    return make_program(
+        ['int a', 'int b', 'float c', 'bool e'],
+        [
+            f'a = {number} + b * 2', 'c = c / 2.5', 'e = (a > b) and not e',
+            'match a:', '\tcase 1:', '\t\tb = 1', '\tcase 2:', '\t\tb = 2',
+        ],
+    ).encode(ENCODING)
+
+
+def snapshot(result):
+    """Всё, что записывается и восстанавливается из кэша"""
+    tokens = [(str(token), getattr(token, 'attr_name', None), getattr(token, 'attr', None)) for token in result.tokens]
+    commands = [(type(command), str(command), getattr(command, 'type', None)) for command in result.commands]
+    return tokens, commands
+
+
+def entry_paths(directory):
+    return sorted(str(path) for path in directory.iterdir() if path.name.endswith('.entry'))
+
+
+def test_memory_hit():
+    cache = CompilationCache()
+    first = cache.compile(make_source(11), ENCODING)
+    assert cache.compile(make_source(11), ENCODING) is first
+    assert (cache.stats.memory_hits, cache.stats.misses) == (1, 1)
+
+
+def test_disk_round_trip(tmp_path):
+    data = make_source(11)
+    CompilationCache(str(tmp_path)).compile(data, ENCODING)
+    cache = CompilationCache(str(tmp_path))
+    result = cache.compile(data, ENCODING)
+    assert (cache.stats.disk_hits, cache.stats.misses) == (1, 0)
+    assert snapshot(result) == snapshot(compile_data(data, ENCODING))
+
+
+def test_write_matches_analyzers(tmp_path):
+    data = make_source(13)
+    CompilationCache(str(tmp_path / 'cache')).compile(data, ENCODING)
+    result = CompilationCache(str(tmp_path / 'cache')).compile(data, ENCODING)
+    tokens_path, tac_path = tmp_path / 'tokens.txt', tmp_path / 'tac.txt'
+    result.write(str(tokens_path), str(tac_path))
+    expected = compile_data(data, ENCODING)
+    assert tokens_path.read_text() == ''.join(map(str, expected.tokens))
+    assert tac_path.read_text() == '\n'.join(map(str, expected.commands))
+
+
+@pytest.mark.parametrize('corrupt', [
+    lambda data: b'',
+    lambda data: data[:7],
+    lambda data: data[:len(data) // 2],
+    lambda data: b'\xff' * len(data),
+    lambda data: data[:20] + bytes(b ^ 0x55 for b in data[20:40]) + data[40:],
+])
+def test_corrupted_entry(tmp_path, corrupt):
+    data = make_source(11)
+    CompilationCache(str(tmp_path)).compile(data, ENCODING)
+    path, = entry_paths(tmp_path)
+    with open(path, 'rb') as f:
+        entry = f.read()
+    with open(path, 'wb') as f:
+        f.write(corrupt(entry))
+    cache = CompilationCache(str(tmp_path))
+    result = cache.compile(data, ENCODING)
+    assert cache.stats.misses == 1
+    assert snapshot(result) == snapshot(compile_data(data, ENCODING))
+    # Повреждённый файл заменён новым
+    assert CompilationCache(str(tmp_path)).get(CompilationCache.key(data, ENCODING)) is not None
+
+
+def test_corrupted_bytes():
+    """После изменения любого байта файла - результат или BinaryFormatError"""
+    entry = _encode_entry(compile_data(make_source(11), ENCODING))
+    for position in range(len(entry)):
+        for value in (0xFF, entry[position] ^ 0x01):
+            corrupted = bytearray(entry)
+            corrupted[position] = value
+            try:
+                result = _decode_entry(bytes(corrupted))
+            except BinaryFormatError:
+                continue
+            list(map(str, result.tokens))
+
+
+def test_eviction(tmp_path):
+    entry_size = len(_encode_entry(compile_data(make_source(10), ENCODING)))
+    cache = CompilationCache(str(tmp_path), disk_size=3 * entry_size)
+    for number in range(6):
+        cache.compile(make_source(10 + number), ENCODING)
+    assert len(entry_paths(tmp_path)) == 3
+    assert cache.stats.disk_evictions == 3
+    # Первая запись вытеснена с диска, но осталась в памяти. На диске - последние записи
+    assert cache.get(CompilationCache.key(make_source(10), ENCODING)) is not None
+    assert CompilationCache(str(tmp_path)).get(CompilationCache.key(make_source(10), ENCODING)) is None
+    assert CompilationCache(str(tmp_path)).get(CompilationCache.key(make_source(15), ENCODING)) is not None
+
+
+def test_directory_scanned_only_over_limit(tmp_path, monkeypatch):
+    scans = []
+    list_files = CompilationCache._list_files
+
+    def counting_list_files(self):
+        scans.append(1)
+        return list_files(self)
+
+    monkeypatch.setattr(CompilationCache, '_list_files', counting_list_files)
+    cache = CompilationCache(str(tmp_path))
+    for number in range(5):
+        cache.compile(make_source(10 + number), ENCODING)
+    assert len(scans) == 1
+
+    cache.disk_size = sum(os.path.getsize(path) for path in entry_paths(tmp_path))
+    cache.compile(make_source(15), ENCODING)
+    assert len(scans) == 2
+    assert len(entry_paths(tmp_path)) == 5
@@ -0,0 +1,59 @@
+"""Независимость контекстов компиляции (CompilationContext)"""
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from compilation import CompilationContext
+from lexical_analysis import LexicalAnalyzer
+from syntactical_analysis import SyntacticalAnalyzer
+from tokens import INT_TOKEN, FLOAT_TOKEN, BOOL_TOKEN, identifiers_table, digital_consts_table
+
+SOURCE_PATH = os.path.join(os.path.dirname(__file__), 'editable.txt')
+
+
+def compile_source(context):
+    lexical_analyzer = LexicalAnalyzer(source_file=None, context=context)
+    with open(SOURCE_PATH, encoding='utf-8') as f:
+        lexical_analyzer.read_file(f)
+    lexical_analyzer.analyze()
+    SyntacticalAnalyzer(lexical_analyzer.tokens, context=context).analyze()
+    return '\n'.join(map(str, context.commands))
+
+
+def test_contexts_do_not_touch_global_tables():
+    identifiers_count, digital_consts_count = len(identifiers_table), len(digital_consts_table)
+    first, second = CompilationContext(), CompilationContext()
+    assert compile_source(first) == compile_source(second)
+    assert len(identifiers_table) == identifiers_count
+    assert len(digital_consts_table) == digital_consts_count
+    assert not set(map(id, first.identifiers_table[3:])) & set(map(id, second.identifiers_table[3:]))
+
+
+def test_concurrent_compiles():
+    expected = compile_source(CompilationContext())
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(lambda _: compile_source(CompilationContext()), range(32)))
+    assert results == [expected] * 32
+
+
+def test_field_parent_is_record_of_its_context():
+    context = CompilationContext()
+    compile_source(context)
+    table = context.identifiers_table
+    my_class = table.find('MyClass')
+    class_var = table.find('class_var1')
+    assert [field.parent for field in my_class.fields] == [my_class] * 3
+    assert [field.parent_identifier_token for field in class_var.fields] == [class_var] * 3
+    # Поля переменной - копии полей класса
+    assert class_var.fields[0] is not my_class.fields[0]
+
+
+@pytest.mark.parametrize('token', [INT_TOKEN, FLOAT_TOKEN, BOOL_TOKEN])
+def test_builtin_type_tokens_are_immutable(token):
+    with pytest.raises(AttributeError):
+        token.category = None
+    with pytest.raises(AttributeError):
+        token.fields = []
+    assert pickle.loads(pickle.dumps(token)) is token
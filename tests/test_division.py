@@ -0,0 +1,79 @@
+"""Деление выбирается по типу, известному при компиляции, а не по значениям операндов"""
+import pytest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from execution import compile_bytecode, compile_python, run_bytecode, run_python, run_vectorized
+from syntactical_analysis.binary_format import dumps_binary, loads_binary
+from syntactical_analysis.commands import AssignmentCommand
+from .tac_interpreter import run_commands
+from .utils import compile_text, make_program
+
+
+def run_binary(commands, inputs):
+    """Выполнение команд, прочитанных из двоичного формата"""
+    return run_bytecode(loads_binary(dumps_binary(commands)), inputs)
+
+
+def run_vectorized_record(commands, inputs):
+    """Векторное выполнение для одной записи. Переменные без значения не передаются"""
+    columns = {name: np.array([value]) for name, value in inputs.items() if value is not None}
+    return {name: column[0].item() for name, column in run_vectorized(commands, columns).items()}
+
+
+RUNNERS = {
+    'reference': run_commands,
+    'vm': run_bytecode,
+    'binary': run_binary,
+    'python': run_python,
+}
+if np is not None:
+    RUNNERS['vectorized'] = run_vectorized_record
+
+
+def compile_division(type_):
+    return compile_text(make_program([f'{type_} a', f'{type_} b', f'{type_} c'], ['c = a / b']))
+
+
+@pytest.mark.parametrize('runner', RUNNERS.values(), ids=RUNNERS.keys())
+@pytest.mark.parametrize('type_, a, b, expected', [
+    ('int', 7, 2, 3),
+    ('int', -7, 2, -3),
+    ('int', 7, -2, -3),
+    ('int', -7, -2, 3),
+    # Вещественные переменные могут получить целые значения: деление всё равно вещественное
+    ('float', 7, 2, 3.5),
+    ('float', -7, 2, -3.5),
+    ('float', 7.5, 2.5, 3.0),
+])
+def test_division(runner, type_, a, b, expected):
+    result = runner(compile_division(type_), {'a': a, 'b': b, 'c': None})
+    assert result['c'] == expected
+    assert type(result['c']) is type(expected)
+
+
+@pytest.mark.parametrize('runner', RUNNERS.values(), ids=RUNNERS.keys())
+@pytest.mark.parametrize('type_', ['int', 'float'])
+def test_division_by_zero(runner, type_):
+    with pytest.raises(ZeroDivisionError):
+        runner(compile_division(type_), {'a': 1, 'b': 0, 'c': None})
+
+
+def test_division_type_in_binary_format():
+    commands = compile_division('float')
+    assert [command.type for command in loads_binary(dumps_binary(commands))] == [command.type for command in commands]
+
+
+@pytest.mark.parametrize('compile_', [compile_bytecode, compile_python])
+def test_division_without_type(compile_):
+    with pytest.raises(ValueError):
+        compile_([AssignmentCommand('c', 'a', operation='/', right='b')])
+
+
+def test_python_cache_distinguishes_division_type():
+    """Текст команд int и float программ одинаков, скомпилированные функции - нет"""
+    assert run_python(compile_division('int'), {'a': 7, 'b': 2})['c'] == 3
+    assert run_python(compile_division('float'), {'a': 7, 'b': 2})['c'] == 3.5
@@ -0,0 +1,102 @@
+"""Способы выполнения (execution) против эталонного интерпретатора на случайных программах"""
+import pytest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from execution import clear_python_cache, compile_python, run_bytecode, run_python, run_sharded, run_vectorized
+from lexical_analysis.const import INT
+from syntactical_analysis.commands import AssignmentCommand, ConditionCommand, GotoCommand
+from .programs import generate_inputs, generate_program
+from .tac_interpreter import run_commands
+from .utils import assert_same, compile_text, outcome
+
+SEEDS = range(120)
+# Входные данные для каждой программы
+INPUTS_COUNT = 5
+# Записи для векторного выполнения
+RECORDS_COUNT = 30
+# Программы для выполнения в нескольких процессах: каждый запуск создаёт свой пул
+SHARDED_SEEDS = range(12)
+
+requires_numpy = pytest.mark.skipif(np is None, reason='Для векторного выполнения нужен numpy')
+
+
+def check_runner(run, seed, optimization=True):
+    commands = compile_text(generate_program(seed), optimization=optimization)
+    for inputs_seed in range(INPUTS_COUNT):
+        inputs = generate_inputs(seed * INPUTS_COUNT + inputs_seed)
+        assert_same(outcome(run, commands, inputs), outcome(run_commands, commands, inputs))
+
+
+def check_columns(run, seed):
+    """
+    Выполнение run(commands, columns) сразу для многих записей. Если хотя бы одна запись делит на ноль,
+    ZeroDivisionError ожидается для всего выполнения
+    """
+    commands = compile_text(generate_program(seed))
+    # Без нулевых входных значений деление на ноль реже останавливает выполнение всех записей
+    records = [
+        generate_inputs(seed * RECORDS_COUNT + record_ind, nonzero=True) for record_ind in range(RECORDS_COUNT)
+    ]
+    expected = [outcome(run_commands, commands, inputs) for inputs in records]
+    columns = {name: np.array([inputs[name] for inputs in records]) for name in records[0]}
+    try:
+        result = run(commands, columns)
+    except ZeroDivisionError:
+        assert ZeroDivisionError in expected
+        return
+    assert ZeroDivisionError not in expected
+    for record_ind, values in enumerate(expected):
+        assert_same({name: result[name][record_ind].item() for name in values}, values)
+
+
+@pytest.mark.parametrize('optimization', [True, False])
+@pytest.mark.parametrize('seed', SEEDS)
+def test_vm(seed, optimization):
+    check_runner(run_bytecode, seed, optimization)
+
+
+@pytest.mark.parametrize('optimization', [True, False])
+@pytest.mark.parametrize('seed', SEEDS)
+def test_python(seed, optimization):
+    check_runner(run_python, seed, optimization)
+
+
+@pytest.mark.parametrize('run', [run_bytecode, run_python])
+def test_backward_jumps(run):
+    """Компилятор не создаёт переходов назад, но команды с ними тоже выполняются (в Python - в цикле)"""
+    commands = [
+        AssignmentCommand('s', '0'),
+        AssignmentCommand('i', '0'),
+        ConditionCommand('i', 6, operation='>=', right='n'),
+        AssignmentCommand('s', 's', operation='+', right='i', type=INT),
+        AssignmentCommand('i', 'i', operation='+', right='1', type=INT),
+        GotoCommand(2),
+    ]
+    inputs = {'n': 5}
+    assert_same(outcome(run, commands, inputs), outcome(run_commands, commands, inputs))
+    assert run(commands, inputs)['s'] == 10
+
+
+def test_python_cache():
+    """Одинаковые программы компилируются один раз, кэш можно очистить"""
+    commands = compile_text(generate_program(0))
+    assert compile_python(compile_text(generate_program(0))) is compile_python(commands)
+    clear_python_cache()
+    assert compile_python(commands, use_cache=False) is not compile_python(commands)
+
+
+@requires_numpy
+@pytest.mark.parametrize('seed', SEEDS)
+def test_vectorized(seed):
+    check_columns(run_vectorized, seed)
+
+
+@requires_numpy
+@pytest.mark.parametrize('seed', SHARDED_SEEDS)
+def test_sharded(seed):
+    """Части по 7 записей: последняя часть неполная, у процессов больше одной части"""
+    check_columns(lambda commands, columns: run_sharded(commands, columns, max_workers=2, shard_size=7), seed)
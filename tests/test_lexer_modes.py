@@ -0,0 +1,88 @@
+"""Потоковый анализ и анализ байтов (mmap) против полного анализа LexicalAnalyzer.analyze()"""
+import io
+import os
+
+import pytest
+
+from compilation import CompilationContext
+from lexical_analysis import LexicalAnalyzer, iter_mmap_tokens, iter_tokens
+from lexical_analysis.custom_exceptions import WrongSymbolException
+from .programs import generate_program
+
+SOURCE_PATH = os.path.join(os.path.dirname(__file__), 'editable.txt')
+
+
+def read_source():
+    with open(SOURCE_PATH, encoding='utf-8') as f:
+        return f.read()
+
+
+SOURCES = {
+    'editable': read_source(),
+    'programs': '\n'.join(generate_program(seed) for seed in range(10)),
+    'comments': '\n'.join([
+        'start_prog', '{ комментарий', 'на { несколько', 'строк }', 'block_var_def', 'int a { короткий } float b',
+        'endblock_var_def', 'a = 1 + 2.5{', '}', 'end_prog',
+    ]),
+}
+
+
+def snapshot(tokens, context):
+    """Токены и таблицы контекста после анализа"""
+    return (
+        [(str(token), token.code, token.value) for token in tokens],
+        [token.attr_name for token in context.identifiers_table],
+        [(token.attr, token.type) for token in context.digital_consts_table],
+    )
+
+
+def analyze(text):
+    context = CompilationContext()
+    analyzer = LexicalAnalyzer(source_file=None, context=context)
+    analyzer.read_file(io.StringIO(text))
+    analyzer.analyze()
+    return snapshot(analyzer.tokens, context)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 64, 10 ** 6])
+@pytest.mark.parametrize('name', SOURCES)
+def test_iter_tokens(name, chunk_size):
+    context = CompilationContext()
+    tokens = list(iter_tokens(io.StringIO(SOURCES[name]), chunk_size=chunk_size, context=context))
+    assert snapshot(tokens, context) == analyze(SOURCES[name])
+
+
+def test_iter_tokens_stops_at_wrong_symbol():
+    """Токены строк до ошибки уже возвращены"""
+    context = CompilationContext()
+    tokens = []
+    with pytest.raises(WrongSymbolException):
+        for token in iter_tokens(io.StringIO('start_prog\nint a\na = b $ c\n'), chunk_size=4, context=context):
+            tokens.append(token)
+    expected = analyze('start_prog\nint a\n')[0]
+    assert snapshot(tokens, context)[0][:len(expected)] == expected
+
+
+@pytest.mark.parametrize('encoding', ['utf-8', 'cp1251'])
+@pytest.mark.parametrize('name', SOURCES)
+def test_iter_mmap_tokens(name, encoding, tmp_path):
+    path = tmp_path / 'source.txt'
+    path.write_bytes(SOURCES[name].encode(encoding))
+    context = CompilationContext()
+    tokens = list(iter_mmap_tokens(str(path), encoding=encoding, context=context))
+    assert snapshot(tokens, context) == analyze(SOURCES[name])
+
+
+def test_iter_mmap_tokens_empty_file(tmp_path):
+    path = tmp_path / 'empty.txt'
+    path.write_bytes(b'')
+    assert list(iter_mmap_tokens(str(path), context=CompilationContext())) == []
+
+
+def test_iter_mmap_tokens_wrong_symbol(tmp_path):
+    """Сообщение об ошибке содержит символ целиком, даже если он занимает несколько байтов"""
+    path = tmp_path / 'source.txt'
+    path.write_bytes('start_prog\na = b ж c\n'.encode('utf-8'))
+    with pytest.raises(WrongSymbolException) as error:
+        list(iter_mmap_tokens(str(path), context=CompilationContext()))
+    assert 'ж' in str(error.value)
@@ -0,0 +1,82 @@
+"""match: выбор способа перехода на кейс и переход на тот же кейс, что при проверке кейсов по очереди"""
+import pytest
+
+from execution import run_bytecode, run_python
+from syntactical_analysis.commands import ConditionCommand, JumpTableCommand
+from .tac_interpreter import run_commands
+from .utils import compile_text, make_program
+
+RUNNERS = {
+    'reference': run_commands,
+    'vm': run_bytecode,
+    'python': run_python,
+}
+
+# Значения кейсов по способу выбора, который для них ожидается
+VALUES = {
+    'linear': [[5], [3, 1, 4, 2], [40, 0, 20]],
+    'jump_table': [[0, 1, 2, 3, 4], [10, 12, 14, 16, 18], [7, 3, 5, 4, 6, 8, 9, 12]],
+    'binary_search': [[0, 2, 5, 9, 30], [100, 0, 50, 250, 400, 350, 200, 150, 300], list(range(0, 1000, 37))],
+}
+
+
+def match_program(values, has_default):
+    """Кейс номер ind присваивает b = ind + 1, default - b = 0. Без подходящего кейса b не меняется"""
+    statements = ['match a:']
+    for ind, value in enumerate(values):
+        statements += [f'\tcase {value}:', f'\t\tb = {ind + 1}']
+    if has_default:
+        statements += ['\tcase _:', '\t\tb = 0']
+    return make_program(['int a', 'int b'], statements)
+
+
+def expected_case(values, has_default, target):
+    """Значение b после match: первый кейс с таким значением, иначе default"""
+    if target in values:
+        return values.index(target) + 1
+    return 0 if has_default else -1
+
+
+def targets(values):
+    """Все значения от минимального до максимального кейса и значения за их пределами"""
+    return [-1000, -1, *range(min(values) - 2, max(values) + 3), 10 ** 6]
+
+
+def dispatch(commands):
+    if any(isinstance(command, JumpTableCommand) for command in commands):
+        return 'jump_table'
+    if any(isinstance(command, ConditionCommand) and command.operation == '>=' for command in commands):
+        return 'binary_search'
+    return 'linear'
+
+
+@pytest.mark.parametrize('kind, values', [(kind, values) for kind in VALUES for values in VALUES[kind]])
+@pytest.mark.parametrize('has_default', [True, False])
+@pytest.mark.parametrize('optimization', [True, False])
+def test_dispatch(kind, values, has_default, optimization):
+    commands = compile_text(match_program(values, has_default), optimization=optimization)
+    assert dispatch(commands) == kind
+    for name, run in RUNNERS.items():
+        for target in targets(values):
+            result = run(commands, {'a': target, 'b': -1})
+            assert result['b'] == expected_case(values, has_default, target), (name, target)
+
+
+@pytest.mark.parametrize('values', [[1, 2, 1, 3, 4, 5, 2], [0, 40, 0, 20, 60, 80, 40]])
+def test_duplicate_cases(values):
+    """Повторяющееся значение недостижимо, выбирается первый кейс с ним"""
+    commands = compile_text(match_program(values, True))
+    for run in RUNNERS.values():
+        for target in targets(values):
+            assert run(commands, {'a': target, 'b': -1})['b'] == expected_case(values, True, target)
+
+
+def test_float_match_is_linear():
+    statements = ['match x:']
+    for ind in range(8):
+        statements += [f'\tcase {ind}.5:', f'\t\tb = {ind + 1}']
+    commands = compile_text(make_program(['float x', 'int b'], statements))
+    assert dispatch(commands) == 'linear'
+    for run in RUNNERS.values():
+        assert run(commands, {'x': 3.5, 'b': -1})['b'] == 4
+        assert run(commands, {'x': 3.0, 'b': -1})['b'] == -1
@@ -0,0 +1,63 @@
+"""Оптимизированные команды против неоптимизированных на эталонном интерпретаторе"""
+import pytest
+
+from lexical_analysis.const import INT
+from syntactical_analysis.commands import AssignmentCommand, ConditionCommand, GotoCommand, NoopCommand
+from syntactical_analysis.optimizer import optimize
+from .programs import generate_inputs, generate_program
+from .tac_interpreter import run_commands
+from .utils import assert_same, compile_text, make_program, outcome
+
+SEEDS = range(200)
+INPUTS_COUNT = 5
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_same_values(seed):
+    text = generate_program(seed)
+    optimized, plain = compile_text(text), compile_text(text, optimization=False)
+    assert len(optimized) <= len(plain)
+    for inputs_seed in range(INPUTS_COUNT):
+        inputs = generate_inputs(seed * INPUTS_COUNT + inputs_seed)
+        assert_same(outcome(run_commands, optimized, inputs), outcome(run_commands, plain, inputs))
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_no_jumps_to_jumps(seed):
+    """После упрощения переходов нет переходов на goto и на следующую команду"""
+    commands = compile_text(generate_program(seed))
+    for command_ind, command in enumerate(commands):
+        if isinstance(command, GotoCommand):
+            assert command.next_command_ind != command_ind + 1
+        target = getattr(command, 'next_command_ind', getattr(command, 'goto_command_ind', None))
+        if target is not None and target < len(commands):
+            assert not isinstance(commands[target], GotoCommand)
+
+
+def test_copies_propagated():
+    commands = compile_text(make_program(['int a', 'int b', 'int c'], ['a = (b + c) * 2', 'c = a']))
+    assert list(map(str, commands)) == ['$1 = b + c', 'a = $1 * 2', 'c = a']
+
+
+def test_unread_division_kept():
+    """Непрочитанное деление остаётся, если может делить на ноль"""
+    commands = optimize([
+        AssignmentCommand('$1', 'b', operation='/', right='c', type=INT),
+        AssignmentCommand('$2', 'b', operation='/', right='2', type=INT),
+        AssignmentCommand('$3', 'b', operation='/', right='0', type=INT),
+        AssignmentCommand('$4', 'b', operation='*', right='c', type=INT),
+    ])
+    assert list(map(str, commands)) == ['$1 = b / c', '$3 = b / 0']
+
+
+def test_optimize_is_stable():
+    """Повторная оптимизация ничего не меняет"""
+    for seed in range(20):
+        commands = compile_text(generate_program(seed))
+        text = list(map(str, commands))
+        assert list(map(str, optimize(list(commands)))) == text
+
+
+def test_unreachable_commands_removed():
+    commands = [GotoCommand(2), NoopCommand(), ConditionCommand('p', 3), NoopCommand()]
+    assert not any(isinstance(command, GotoCommand) for command in optimize(commands))
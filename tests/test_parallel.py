@@ -0,0 +1,95 @@
+"""Анализ файла в нескольких процессах (analyze_parallel) против полного анализа LexicalAnalyzer.analyze()"""
+import io
+import os
+
+import pytest
+
+from compilation import CompilationContext
+from lexical_analysis import LexicalAnalyzer, analyze_parallel
+from lexical_analysis.custom_exceptions import WrongSymbolException
+from .programs import generate_program
+
+SOURCE_PATH = os.path.join(os.path.dirname(__file__), 'editable.txt')
+
+
+def read_source():
+    with open(SOURCE_PATH, encoding='utf-8') as f:
+        return f.read()
+
+
+# Комментарии на несколько строк: границы частей внутри них, { внутри комментария, код сразу после }
+COMMENTS = '\n'.join([
+    'start_prog',
+    '{ комментарий',
+    'на несколько { строк',
+    '}',
+    'block_var_def',
+    'int a { короткий } int b',
+    'endblock_var_def',
+    '{',
+    '',
+    '}a = 1 + 2.5',
+    'end_prog',
+    '',
+])
+
+SOURCES = {
+    'editable': read_source(),
+    'programs': '\n'.join(generate_program(seed) for seed in range(10)),
+    'comments': COMMENTS,
+    'without_last_newline': COMMENTS.rstrip('\n'),
+}
+
+
+def tables(context):
+    return (
+        [token.attr_name for token in context.identifiers_table],
+        [(token.attr, token.type) for token in context.digital_consts_table],
+    )
+
+
+def analyze(text):
+    """Токены (код, значение) и таблицы после полного анализа"""
+    context = CompilationContext()
+    analyzer = LexicalAnalyzer(source_file=None, context=context)
+    analyzer.read_file(io.StringIO(text))
+    analyzer.analyze()
+    return [(token.code, token.value) for token in analyzer.tokens], tables(context)
+
+
+def write_source(tmp_path, text):
+    path = tmp_path / 'source.txt'
+    path.write_bytes(text.encode('utf-8'))
+    return str(path)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 10, 100, 10 ** 6])
+@pytest.mark.parametrize('name', SOURCES)
+def test_same_as_analyze(name, chunk_size, tmp_path):
+    path = write_source(tmp_path, SOURCES[name])
+    context = CompilationContext()
+    tokens = analyze_parallel(path, max_workers=2, chunk_size=chunk_size, context=context)
+    assert (list(zip(tokens.codes, tokens.values)), tables(context)) == analyze(SOURCES[name])
+
+
+def test_empty_file(tmp_path):
+    context = CompilationContext()
+    assert len(analyze_parallel(write_source(tmp_path, ''), context=context)) == 0
+    assert tables(context) == analyze('')[1]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 10 ** 6])
+def test_wrong_symbol(chunk_size, tmp_path):
+    """Ошибка в середине файла; таблицы к её моменту - как при полном анализе"""
+    lines = read_source().splitlines(keepends=True)
+    text = ''.join(lines[:20] + ['res_add = c $ d\n'] + lines[20:])
+    context = CompilationContext()
+    with pytest.raises(WrongSymbolException):
+        analyze_parallel(write_source(tmp_path, text), max_workers=2, chunk_size=chunk_size, context=context)
+
+    full_context = CompilationContext()
+    analyzer = LexicalAnalyzer(source_file=None, context=full_context)
+    analyzer.read_file(io.StringIO(text))
+    with pytest.raises(WrongSymbolException):
+        analyzer.analyze()
+    assert tables(context) == tables(full_context)
@@ -0,0 +1,103 @@
+"""Повторный анализ изменённых строк (LexicalAnalyzer.relex) против полного анализа изменённого текста"""
+import io
+import os
+
+import pytest
+
+from compilation import CompilationContext
+from lexical_analysis import LexicalAnalyzer
+from lexical_analysis.custom_exceptions import WrongSymbolException
+from lexical_analysis.utils import split_lines
+
+SOURCE_PATH = os.path.join(os.path.dirname(__file__), 'editable.txt')
+
+
+def read_source():
+    with open(SOURCE_PATH, encoding='utf-8') as f:
+        return f.read()
+
+
+def analyze(text, context, compact=False):
+    analyzer = LexicalAnalyzer(source_file=None, compact=compact, context=context)
+    analyzer.read_file(io.StringIO(text))
+    analyzer.analyze()
+    return analyzer
+
+
+def apply_edit(text, edit):
+    """Текст после замены строк [start, end) на new_lines"""
+    start, end, new_lines = edit
+    lines = split_lines(text)
+    return ''.join(lines[:start] + new_lines + lines[end:])
+
+
+def line_index(prefix):
+    """Номер строки исходника, начинающейся с prefix"""
+    return next(ind for ind, line in enumerate(split_lines(read_source())) if line.startswith(prefix))
+
+
+def assert_same(relexed, full):
+    assert relexed.data == full.data
+    assert list(relexed.tokens) == list(full.tokens)
+    assert list(relexed.line_states) == list(full.line_states)
+    assert list(relexed.line_tokens_counts) == list(full.line_tokens_counts)
+    assert relexed.current_state == full.current_state
+
+
+LAST_LINE = len(split_lines(read_source()))
+RES_ADD = line_index('res_add')
+COMMENT = line_index('{ А это')
+
+EDITS = {
+    # Замена строк в середине
+    'middle': [(line_index('b = 5'), line_index('b = 5') + 1, ['b = 6\n', 'c = 1.25\n'])],
+    # Удаление строки
+    'delete': [(RES_ADD, RES_ADD + 1, [])],
+    # Вставка после последней строки: end_prog без перевода строки сливается с первой новой строкой
+    'append_glued': [(LAST_LINE, LAST_LINE, ['x = 1\n'])],
+    'append_new_line': [(LAST_LINE, LAST_LINE, ['\n', 'a = 1'])],
+    'replace_last': [(LAST_LINE - 1, LAST_LINE, ['a = 1\n', 'end_prog'])],
+    # Открытие комментария: следующие строки до } становятся комментарием, затем он закрывается
+    'open_and_close_comment': [
+        (RES_ADD, RES_ADD + 1, ['{ res_add = c + d\n']),
+        (RES_ADD, RES_ADD + 1, ['{ res_add = c + d }\n']),
+    ],
+    # Удаление начала многострочного комментария и его закрытие раньше
+    'close_comment_early': [
+        (COMMENT, COMMENT + 2, ['{ А это }\n', '{ многострочный комментарий }\n']),
+    ],
+}
+
+
+@pytest.mark.parametrize('compact', [False, True])
+@pytest.mark.parametrize('name', EDITS)
+def test_relex_matches_full_analysis(name, compact):
+    # Общий контекст: нумерация идентификаторов и констант одна и та же, токены можно сравнивать как объекты
+    context = CompilationContext()
+    text = read_source()
+    relexed = analyze(text, context, compact)
+    for edit in EDITS[name]:
+        relexed.relex(*edit)
+        text = apply_edit(text, edit)
+        assert_same(relexed, analyze(text, context, compact))
+
+
+def test_relex_error_keeps_tokens():
+    context = CompilationContext()
+    text = read_source()
+    relexed = analyze(text, context)
+    tokens = list(relexed.tokens)
+    with pytest.raises(WrongSymbolException):
+        analyze(apply_edit(text, (RES_ADD, RES_ADD + 1, ['res_add = c $ d\n'])), context)
+    with pytest.raises(WrongSymbolException):
+        relexed.relex(RES_ADD, RES_ADD + 1, ['res_add = c $ d\n'])
+    assert list(relexed.tokens) == tokens
+    assert relexed.current_state == analyze(text, context).current_state
+
+
+def test_relex_rejects_unterminated_line_in_middle():
+    relexed = analyze(read_source(), CompilationContext())
+    data = list(relexed.data)
+    with pytest.raises(ValueError):
+        relexed.relex(RES_ADD, RES_ADD + 1, ['res_add = c'])
+    assert relexed.data == data
@@ -0,0 +1,57 @@
+"""Потоковая компиляция (compile_streaming) против записи результатов полного анализа"""
+import io
+import os
+
+import pytest
+
+from compilation import CompilationContext
+from compilation.streaming import compile_streaming
+from lexical_analysis import LexicalAnalyzer
+from syntactical_analysis import SyntacticalAnalyzer
+from .programs import generate_program
+
+SOURCE_PATH = os.path.join(os.path.dirname(__file__), 'editable.txt')
+SEEDS = range(150)
+
+
+def compile_full(text, optimization):
+    """Токены и команды так, как их записывают LexicalAnalyzer.write и SyntacticalAnalyzer.write"""
+    context = CompilationContext()
+    lexical_analyzer = LexicalAnalyzer(source_file=None, context=context)
+    lexical_analyzer.read_file(io.StringIO(text))
+    lexical_analyzer.analyze()
+    SyntacticalAnalyzer(lexical_analyzer.tokens, context=context, optimization=optimization).analyze()
+    return ''.join(map(str, lexical_analyzer.tokens)), '\n'.join(map(str, context.commands))
+
+
+def check_streaming(text, optimization, tmp_path):
+    source_path, tac_path, tokens_path = tmp_path / 'source.txt', tmp_path / 'tac.txt', tmp_path / 'tokens.txt'
+    source_path.write_text(text, encoding='utf-8')
+    commands_count = compile_streaming(
+        str(source_path), str(tac_path), str(tokens_path), encoding='utf-8', optimization=optimization
+    )
+    tokens, commands = compile_full(text, optimization)
+    assert (tokens_path.read_text(), tac_path.read_text()) == (tokens, commands)
+    assert commands_count == len(commands.split('\n'))
+
+
+@pytest.mark.parametrize('optimization', [True, False])
+@pytest.mark.parametrize('seed', SEEDS)
+def test_same_as_full(seed, optimization, tmp_path):
+    check_streaming(generate_program(seed, statements_count=12), optimization, tmp_path)
+
+
+@pytest.mark.parametrize('optimization', [True, False])
+def test_editable(optimization, tmp_path):
+    with open(SOURCE_PATH, encoding='utf-8') as f:
+        check_streaming(f.read(), optimization, tmp_path)
+
+
+def test_jump_over_empty_match(tmp_path):
+    """match без действий исчезает при оптимизации, переходы предыдущего оператора ведут на noop в конце"""
+    text = '\n'.join([
+        'start_prog', 'block_var_def', 'int a', 'bool p', 'bool q', 'endblock_var_def',
+        'p = q or (a > 3)', 'match a:', '\tcase 0:', '\t\ta = a', 'end_prog',
+    ])
+    check_streaming(text, True, tmp_path)
+    assert compile_full(text, True)[1].endswith('noop')
@@ -0,0 +1,60 @@
+"""Таблицы токенов с хэш-индексом: числовые константы и идентификаторы"""
+from array import array
+
+from lexical_analysis.const import FLOAT, INT
+from tokens import DigitalConstToken, DigitalConstsTable, IdentifiersTable, IdentifierToken
+
+
+def test_digital_consts_are_unique_by_type_and_value():
+    table = DigitalConstsTable()
+    two = DigitalConstToken.get_or_create('2', INT, table=table)
+    two_float = DigitalConstToken.get_or_create('2.0', FLOAT, table=table)
+    assert two is not two_float
+    assert (two.attr, type(two.attr), two_float.attr, type(two_float.attr)) == (2, int, 2.0, float)
+    assert DigitalConstToken.get_or_create('2', INT, table=table) is two
+    # Та же константа в другой записи
+    assert DigitalConstToken.get_or_create('2.00', FLOAT, table=table) is two_float
+    assert table.find(2, INT) is two
+    assert table.find(2.0, FLOAT) is two_float
+    assert table.find(3, INT) is None
+    # Значение токена - его индекс в таблице
+    assert [token.value for token in table] == [0, 1]
+
+
+def test_digital_consts_as_array():
+    table = DigitalConstsTable()
+    for lexeme, type_ in [('7', INT), ('0.5', FLOAT), ('3', INT), ('7', INT), ('1.5', FLOAT)]:
+        DigitalConstToken.get_or_create(lexeme, type_, table=table)
+    assert table.as_array(INT) == array('q', [7, 3])
+    assert table.as_array(FLOAT) == array('d', [0.5, 1.5])
+
+
+def test_index_follows_changes():
+    """Индекс перестраивается при любом изменении таблицы, а не только при добавлении"""
+    table = DigitalConstsTable()
+    tokens = [DigitalConstToken.get_or_create(str(value), INT, table=table) for value in range(4)]
+    del table[1]
+    assert table.find(1, INT) is None
+    table.insert(0, tokens[1])
+    assert table.find(1, INT) is tokens[1]
+    table[0] = tokens[3]
+    assert table.find(1, INT) is None and table.find(3, INT) is tokens[3]
+    table.pop()
+    table.remove(tokens[0])
+    assert list(table) == [tokens[3], tokens[2]]
+    assert table.find(0, INT) is None and table.find(2, INT) is tokens[2]
+    table += tokens[:1]
+    assert table.find(0, INT) is tokens[0]
+    table.clear()
+    assert table.find(3, INT) is None
+    # Таблица, созданная из токенов, индексирует их, при повторах - первый
+    assert DigitalConstsTable(tokens + tokens[:1]).find(0, INT) is tokens[0]
+
+
+def test_identifiers_table():
+    table = IdentifiersTable()
+    first = IdentifierToken.get_or_create('first', table=table)
+    second = IdentifierToken.get_or_create('second', table=table)
+    assert IdentifierToken.get_or_create('first', table=table) is first
+    assert (table.find('first'), table.find('second'), table.find('third')) == (first, second, None)
+    assert [token.value for token in table] == [0, 1]
@@ -0,0 +1,98 @@
+"""Распределение временных переменных по ячейкам"""
+import pytest
+
+from lexical_analysis.const import INT
+from syntactical_analysis.commands import AssignmentCommand, ConditionCommand, GotoCommand
+from syntactical_analysis.temp_allocation import allocate_temps
+from syntactical_analysis.temp_var import is_temp_name
+from .programs import generate_inputs, generate_program
+from .tac_interpreter import run_commands
+from .utils import assert_same, compile_text, outcome
+
+SEEDS = range(100)
+INPUTS_COUNT = 5
+
+
+def temp_names(commands):
+    names = set()
+    for command in commands:
+        names.update(name for name in getattr(command, 'operands', ()) if is_temp_name(name))
+        if is_temp_name(getattr(command, 'target', '')):
+            names.add(command.target)
+    return names
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_same_values(seed):
+    """Распределение без оптимизации: в неоптимизированных командах временных переменных больше всего"""
+    plain = compile_text(generate_program(seed), optimization=False)
+    allocated = compile_text(generate_program(seed), optimization=False)
+    allocation = allocate_temps(allocated)
+    assert allocation.temps_count == len(temp_names(plain))
+    assert temp_names(allocated) == {f'${slot}' for slot in range(1, allocation.slots_count + 1)}
+    assert allocation.peak_live <= allocation.slots_count <= allocation.temps_count
+    for inputs_seed in range(INPUTS_COUNT):
+        inputs = generate_inputs(seed * INPUTS_COUNT + inputs_seed)
+        assert_same(outcome(run_commands, allocated, inputs), outcome(run_commands, plain, inputs))
+
+
+def test_sequential_temps_share_slot():
+    commands = [
+        AssignmentCommand('$1', 'a', operation='+', right='1', type=INT),
+        AssignmentCommand('x', '$1'),
+        AssignmentCommand('$2', 'b', operation='+', right='1', type=INT),
+        AssignmentCommand('y', '$2'),
+    ]
+    allocation = allocate_temps(commands)
+    assert (allocation.temps_count, allocation.slots_count, allocation.peak_live) == (2, 1, 1)
+    assert list(map(str, commands)) == ['$1 = a + 1', 'x = $1', '$1 = b + 1', 'y = $1']
+
+
+def test_live_temps_get_different_slots():
+    commands = [
+        AssignmentCommand('$1', 'a', operation='+', right='1', type=INT),
+        AssignmentCommand('$2', 'b', operation='+', right='1', type=INT),
+        AssignmentCommand('x', '$1', operation='*', right='$2', type=INT),
+    ]
+    assert allocate_temps(commands).slots_count == 2
+
+
+def test_live_across_jump():
+    """$5 жива на обеих ветках, поэтому $6 на одной из них не может занять её ячейку"""
+    commands = [
+        AssignmentCommand('$5', 'a'),
+        ConditionCommand('p', 4),
+        AssignmentCommand('$6', 'b'),
+        AssignmentCommand('y', '$6'),
+        AssignmentCommand('x', '$5'),
+    ]
+    allocate_temps(commands)
+    assert list(map(str, commands)) == ['$1 = a', 'if p goto 4', '$2 = b', 'y = $2', 'x = $1']
+    assert run_commands(commands, {'a': 1, 'b': 2, 'p': False})['x'] == 1
+
+
+def test_live_through_goto():
+    """$5 читается только после goto, поэтому $6 не может занять её ячейку"""
+    commands = [
+        AssignmentCommand('$5', 'a'),
+        AssignmentCommand('$6', 'b'),
+        AssignmentCommand('y', '$6'),
+        GotoCommand(5),
+        AssignmentCommand('y', 'a'),
+        AssignmentCommand('x', '$5'),
+    ]
+    assert allocate_temps(commands).slots_count == 2
+    assert run_commands(commands, {'a': 1, 'b': 2})['x'] == 1
+
+
+def test_dead_after_jump():
+    """После перехода на конец $5 не читается, и ячейка свободна"""
+    commands = [
+        AssignmentCommand('$5', 'a'),
+        AssignmentCommand('x', '$5'),
+        GotoCommand(4),
+        AssignmentCommand('y', '$5'),
+        AssignmentCommand('$6', 'b'),
+        AssignmentCommand('z', '$6'),
+    ]
+    assert allocate_temps(commands).slots_count == 1
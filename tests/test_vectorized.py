@@ -0,0 +1,86 @@
+"""Отличия векторного выполнения от выполнения по одной записи: неприсвоенные переменные и int64"""
+import itertools
+
+import pytest
+
+from compilation.semantics import divide
+from execution import run_vectorized
+from lexical_analysis.const import INT
+from syntactical_analysis.commands import AssignmentCommand, ConditionCommand
+from .utils import compile_text, make_program
+
+np = pytest.importorskip('numpy')
+
+INT64_MIN = np.iinfo(np.int64).min
+INT64_MAX = np.iinfo(np.int64).max
+
+# b присваивается только в записях с a == 1
+ASSIGN_IF_ONE = [
+    ConditionCommand('a', 2, operation='==', right='1', negated=True),
+    AssignmentCommand('b', '5'),
+]
+
+
+def run(statements, **columns):
+    commands = compile_text(make_program(['int a', 'int b', 'int c'], statements))
+    return run_vectorized(commands, {name: np.array(column, dtype=np.int64) for name, column in columns.items()})
+
+
+def test_read_in_assigned_records():
+    commands = ASSIGN_IF_ONE + [
+        ConditionCommand('a', 4, operation='==', right='1', negated=True),
+        AssignmentCommand('c', 'b', operation='+', right='1', type=INT),
+    ]
+    result = run_vectorized(commands, {'a': np.array([1, 3]), 'c': np.array([0, 0])})
+    assert result['c'].tolist() == [6, 0]
+
+
+def test_read_before_assignment():
+    commands = ASSIGN_IF_ONE + [AssignmentCommand('c', 'b', operation='+', right='1', type=INT)]
+    with pytest.raises(ValueError):
+        run_vectorized(commands, {'a': np.array([1, 3])})
+
+
+@pytest.mark.parametrize('statement, b, c', [
+    ('a = b + c', INT64_MAX, 1),
+    ('a = b - c', INT64_MIN, 1),
+    ('a = b * c', 2 ** 62, 2),
+    ('a = b * c', -1, INT64_MIN),
+    ('a = b / c', INT64_MIN, -1),
+    ('a = b + 1', INT64_MAX, 0),
+    ('a = b - 1', INT64_MIN, 0),
+    ('a = 3 * b', 2 ** 62, 0),
+    ('a = b * (0 - 2)', -2 ** 62, 0),
+])
+def test_overflow(statement, b, c):
+    with pytest.raises(OverflowError):
+        run([statement], b=[0, b], c=[1, c])
+
+
+@pytest.mark.parametrize('statement, b, c, expected', [
+    ('a = b + c', INT64_MAX - 1, 1, INT64_MAX),
+    ('a = b - c', INT64_MIN + 1, 1, INT64_MIN),
+    ('a = b * c', 2 ** 62, -2, INT64_MIN),
+    ('a = b * c', -1, INT64_MAX, -INT64_MAX),
+    ('a = b / c', INT64_MIN, 2, INT64_MIN // 2),
+    ('a = b + 1', INT64_MAX - 1, 0, INT64_MAX),
+    ('a = b - 1', INT64_MIN + 1, 0, INT64_MIN),
+    ('a = 2 * b', 2 ** 62 - 1, 0, 2 ** 63 - 2),
+    ('a = b * (0 - 2)', 2 ** 62, 0, INT64_MIN),
+])
+def test_no_overflow_at_bounds(statement, b, c, expected):
+    assert run([statement], b=[b], c=[c])['a'].tolist() == [expected]
+
+
+def test_overflow_outside_mask():
+    """Переполнение в записях, которые не выполняют команду, не ошибка"""
+    result = run(['match a:', '\tcase 1:', '\t\tc = b * b'], a=[1, 2], b=[3, 2 ** 40], c=[0, 0])
+    assert result['c'].tolist() == [9, 0]
+
+
+def test_integer_division():
+    values = [INT64_MIN, INT64_MIN + 1, -7, -2, -1, 0, 1, 2, 7, INT64_MAX]
+    pairs = [(b, c) for b, c in itertools.product(values, repeat=2) if c != 0 and (b, c) != (INT64_MIN, -1)]
+    b, c = zip(*pairs)
+    result = run(['a = b / c'], b=b, c=c)
+    assert result['a'].tolist() == [divide(b, c, INT) for b, c in pairs]
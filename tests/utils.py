@@ -0,0 +1,41 @@
+"""Общие функции тестов"""
+from compilation import CompilationContext
+from lexical_analysis import LexicalAnalyzer
+from lexical_analysis.utils import split_lines
+from syntactical_analysis import SyntacticalAnalyzer
+from .tac_interpreter import user_values
+
+
+def compile_text(text, optimization=True, context=None):
+    """Команды программы text"""
+    if context is None:
+        context = CompilationContext()
+    lexical_analyzer = LexicalAnalyzer(source_file=None, context=context)
+    lexical_analyzer.data = split_lines(text)
+    lexical_analyzer.analyze()
+    SyntacticalAnalyzer(lexical_analyzer.tokens, context=context, optimization=optimization).analyze()
+    return context.commands
+
+
+def make_program(declarations, statements):
+    """Текст программы: объявления вида 'int a' и операторы"""
+    return '\n'.join(['start_prog', 'block_var_def', *declarations, 'endblock_var_def', *statements, 'end_prog'])
+
+
+def outcome(run, commands, inputs):
+    """Значения переменных программы или ZeroDivisionError, если выполнение на нём остановилось"""
+    try:
+        return user_values(run(commands, inputs))
+    except ZeroDivisionError:
+        return ZeroDivisionError
+
+
+def assert_same(result, expected):
+    """Те же значения тех же типов (True и 1, 2.0 и 2 различаются)"""
+    if expected is ZeroDivisionError:
+        assert result is ZeroDivisionError
+        return
+    assert result is not ZeroDivisionError
+    assert {name: (type(value), value) for name, value in result.items()} == {
+        name: (type(value), value) for name, value in expected.items()
+    }
@@ -1,7 +1,10 @@
 from .addition import *
+from .buffer import *
 from .digital import *
 from .identifier import *
 from .keywords import *
 from .multiplication import *
 from .relation import *
+from .table import *
 from .token import *
+from .view import *
@@ -0,0 +1,157 @@
+from array import array
+from collections.abc import MutableSequence
+
+from tokens.addition import PLUS_TOKEN, MINUS_TOKEN
+from tokens.digital import DigitalConstToken, digital_consts_table
+from tokens.identifier import IdentifierToken, identifiers_table
+from tokens.keywords import WORDS_TOKENS_MAPPING
+from tokens.multiplication import MULT_TOKEN, DIV_TOKEN
+from tokens.relation import (
+    EQUAL_TOKEN, NOT_EQUAL_TOKEN, MORE_TOKEN, MORE_EQUAL_TOKEN, LESS_TOKEN, LESS_EQUAL_TOKEN,
+)
+from tokens.token import (
+    Token, OPEN_BRACKET_TOKEN, CLOSE_BRACKET_TOKEN, ASSIGNMENT_TOKEN, COLON_TOKEN, COMMA_TOKEN, UNDERSCORE_TOKEN,
+    POINT_TOKEN,
+)
+
+__all__ = [
+    'TokenBuffer',
+]
+
+# Токены, однозначно определяемые парой (код, значение)
+FIXED_TOKENS = {
+    (token.code, token.value): token
+    for token in [
+        *WORDS_TOKENS_MAPPING.values(),
+        OPEN_BRACKET_TOKEN, CLOSE_BRACKET_TOKEN, ASSIGNMENT_TOKEN, COLON_TOKEN, COMMA_TOKEN, UNDERSCORE_TOKEN,
+        POINT_TOKEN,
+        PLUS_TOKEN, MINUS_TOKEN, MULT_TOKEN, DIV_TOKEN,
+        EQUAL_TOKEN, NOT_EQUAL_TOKEN, MORE_TOKEN, MORE_EQUAL_TOKEN, LESS_TOKEN, LESS_EQUAL_TOKEN,
+    ]
+}
+
+
+class TokenBuffer(MutableSequence):
+    """
+    Компактный поток токенов.
+    Хранит два параллельных массива: коды токенов array('H') и значения атрибутов array('I').
+    Объекты Token получаются по запросу: идентификаторы и числовые константы берутся из таблиц по значению,
+    остальные токены - по паре (код, значение).
+    Поэтому в буфер можно добавить только токен, который по паре (код, значение) восстанавливается сам:
+    идентификатор или константу из таблиц буфера (значение - индекс в таблице) или токен из FIXED_TOKENS.
+    Для остальных (например, поля записей, идентификаторы из другой таблицы) - ValueError
+    """
+
+    def __init__(self, tokens=(), identifiers=None, digital_consts=None):
+        self.codes = array('H')
+        self.values = array('I')
+        self.identifiers = identifiers_table if identifiers is None else identifiers
+        self.digital_consts = digital_consts_table if digital_consts is None else digital_consts
+        self.extend(tokens)
+
+    def _copy_empty(self):
+        """Пустой буфер с теми же таблицами"""
+        return TokenBuffer(identifiers=self.identifiers, digital_consts=self.digital_consts)
+
+    def materialize(self, code, value) -> Token:
+        """Токен по коду и значению"""
+        if code == IdentifierToken.CODE:
+            return self.identifiers[value]
+        if code == DigitalConstToken.CODE:
+            return self.digital_consts[value]
+        return FIXED_TOKENS[code, value]
+
+    def check(self, token: Token):
+        """Проверка, что токен восстанавливается из буфера по коду и значению"""
+        code = token.code
+        value = token.value
+        if code == IdentifierToken.CODE:
+            table = self.identifiers
+        elif code == DigitalConstToken.CODE:
+            table = self.digital_consts
+        else:
+            if FIXED_TOKENS.get((code, value)) is not token:
+                raise ValueError(f'Токен {token} нельзя хранить в TokenBuffer')
+            return
+        if type(value) is not int or not 0 <= value < len(table) or table[value] is not token:
+            raise ValueError(f'Токен {token} нельзя хранить в TokenBuffer')
+
+    def append(self, token: Token):
+        self.check(token)
+        self.codes.append(token.code)
+        self.values.append(token.value)
+
+    def extend(self, tokens):
+        if self._same_tables(tokens):
+            self.codes.extend(tokens.codes)
+            self.values.extend(tokens.values)
+        else:
+            check = self.check
+            append_code = self.codes.append
+            append_value = self.values.append
+            for token in tokens:
+                check(token)
+                append_code(token.code)
+                append_value(token.value)
+
+    def validate(self):
+        """
+        Проверка кодов и значений, записанных в массивы напрямую (например, прочитанных из файла):
+        каждая пара должна восстанавливаться в токен. Иначе - ValueError
+        """
+        identifiers_count = len(self.identifiers)
+        digital_consts_count = len(self.digital_consts)
+        for code, value in set(zip(self.codes, self.values)):
+            if code == IdentifierToken.CODE:
+                valid = value < identifiers_count
+            elif code == DigitalConstToken.CODE:
+                valid = value < digital_consts_count
+            else:
+                valid = (code, value) in FIXED_TOKENS
+            if not valid:
+                raise ValueError(f'Неверный токен в TokenBuffer: код {code}, значение {value}')
+
+    def _same_tables(self, tokens):
+        """tokens - буфер с теми же таблицами: коды и значения можно копировать без проверки"""
+        return (
+            isinstance(tokens, TokenBuffer)
+            and tokens.identifiers is self.identifiers and tokens.digital_consts is self.digital_consts
+        )
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __iter__(self):
+        materialize = self.materialize
+        for code, value in zip(self.codes, self.values):
+            yield materialize(code, value)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            result = self._copy_empty()
+            result.codes = self.codes[index]
+            result.values = self.values[index]
+            return result
+        return self.materialize(self.codes[index], self.values[index])
+
+    def __setitem__(self, index, token):
+        if isinstance(index, slice):
+            tokens = token
+            if not self._same_tables(tokens):
+                tokens = self._copy_empty()
+                tokens.extend(token)
+            self.codes[index] = tokens.codes
+            self.values[index] = tokens.values
+        else:
+            self.check(token)
+            self.codes[index] = token.code
+            self.values[index] = token.value
+
+    def __delitem__(self, index):
+        del self.codes[index]
+        del self.values[index]
+
+    def insert(self, index, token: Token):
+        self.check(token)
+        self.codes.insert(index, token.code)
+        self.values.insert(index, token.value)
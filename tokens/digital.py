@@ -1,8 +1,13 @@
+from array import array
+from operator import attrgetter
+
 from lexical_analysis import const
+from tokens.table import IndexedTable
 from tokens.token import Token
 
 __all__ = [
     'DigitalConstToken',
+    'DigitalConstsTable',
     'digital_consts_table',
 ]
 
@@ -10,27 +15,60 @@ __all__ = [
 class DigitalConstToken(Token):
     """Токен для числовых констант"""
 
+    __slots__ = ('attr', 'type')
+
+    CODE = 26
+
     def __init__(self, value, attr, type):
-        super().__init__(name='num', code=26, value=value)
+        super().__init__(name='num', code=self.CODE, value=value)
         # Само числовое значение
         self.attr = attr
         self.type = type
 
     @classmethod
-    def get_or_create(cls, lexeme, type):
-        """Находим в таблице числовых констант токен с attr==attr или создаём его"""
+    def get_or_create(cls, lexeme, type, table=None):
+        """
+        Находим в таблице числовых констант table токен с attr==attr или создаём его.
+        Без table - общая таблица модуля (таблица контекста по умолчанию)
+        """
         attr = float(lexeme)
         if type == const.INT:
             attr = int(attr)
 
-        found = list(filter(lambda x: x.attr == attr and x.type == type, digital_consts_table))
-        if found:
-            return found[0]
-        token_value = len(digital_consts_table)
+        if table is None:
+            table = digital_consts_table
+        found = table.find(attr, type)
+        if found is not None:
+            return found
+        token_value = len(table)
         new_token = DigitalConstToken(value=token_value, attr=attr, type=type)
-        digital_consts_table.append(new_token)
+        table.append(new_token)
         return new_token
 
 
+class DigitalConstsTable(IndexedTable):
+    """
+    Таблица (пул) числовых констант.
+    Значение токена - его индекс в таблице. Для поиска поддерживается индекс (тип, значение) -> токен
+    """
+
+    # Коды типов array для значений констант
+    ARRAY_TYPECODES = {
+        const.INT: 'q',
+        const.FLOAT: 'd',
+    }
+
+    def __init__(self, tokens=()):
+        super().__init__(tokens, key=attrgetter('type', 'attr'))
+
+    def find(self, attr, type):
+        """Поиск константы по значению и типу"""
+        return self.index.get((type, attr))
+
+    def as_array(self, type):
+        """Значения констант типа type в порядке нумерации: array('q') для int, array('d') для float"""
+        return array(self.ARRAY_TYPECODES[type], (token.attr for token in self if token.type == type))
+
+
 # Таблица числовых констант
-digital_consts_table = []
+digital_consts_table = DigitalConstsTable()
@@ -1,10 +1,13 @@
-from collections.abc import Iterable
+from operator import attrgetter
 
 from lexical_analysis import const
+from tokens.table import IndexedTable
 from tokens.token import Token
 
 __all__ = [
     'IdentifierToken',
+    'IdentifiersTable',
+    'BuiltinTypeToken',
     'identifiers_table',
     'INT_TOKEN',
     'FLOAT_TOKEN',
@@ -15,11 +18,15 @@ __all__ = [
 class IdentifierToken(Token):
     """Токен идентификатора"""
 
+    __slots__ = ('attr_name', 'attr_value', 'type', 'fields', 'category', 'parent')
+
+    CODE = 25
+
     CATEGORY_VAR = 'var'  # Переменная
     CATEGORY_TYPE = 'type'  # Тип
 
-    def __init__(self, value, attr_name, attr_value, type, category=None):
-        super().__init__(name='id', code=25, value=value)
+    def __init__(self, value, attr_name, attr_value, type, category=None, parent=None):
+        super().__init__(name='id', code=self.CODE, value=value)
         # Обозначение идентификатора
         self.attr_name = attr_name
         # Значение идентификатора
@@ -30,39 +37,86 @@ class IdentifierToken(Token):
 
         # Категория идентификатора
         self.category = category
+        # Для поля записи - идентификатор записи (типа или переменной), которой принадлежит поле.
+        # Хранится ссылкой, а не номером: поле не зависит от таблицы, в которой находится запись
+        self.parent = parent
 
     @property
     def parent_identifier_token(self):
-        if not isinstance(self.value, Iterable):
-            return None
-        return identifiers_table[self.value[0]]
+        return self.parent
 
     @classmethod
-    def get_or_create(cls, lexeme):
-        """Находим в таблице идентификаторов токен с attr_name==lexeme или создаём его"""
+    def get_or_create(cls, lexeme, table=None):
+        """
+        Находим в таблице идентификаторов table токен с attr_name==lexeme или создаём его.
+        Анализаторы передают таблицу своего контекста компиляции. Без table - общая таблица модуля,
+        то есть таблица контекста по умолчанию (compilation.default_context)
+        """
         if not lexeme or lexeme == ' ':
             return
-        found = list(filter(lambda x: x.attr_name == lexeme, identifiers_table))
-        if found:
-            return found[0]
-        token_value = len(identifiers_table)
+        if table is None:
+            table = identifiers_table
+        found = table.find(lexeme)
+        if found is not None:
+            return found
+        token_value = len(table)
         new_token = IdentifierToken(value=token_value, attr_name=lexeme, attr_value=None, type=None)
-        identifiers_table.append(new_token)
+        table.append(new_token)
         return new_token
 
 
-INT_TOKEN = IdentifierToken(
-    value=0, attr_name=const.INT, attr_value=const.INT, type=None, category=IdentifierToken.CATEGORY_TYPE
-)
-FLOAT_TOKEN = IdentifierToken(
-    value=1, attr_name=const.FLOAT, attr_value=const.FLOAT, type=None, category=IdentifierToken.CATEGORY_TYPE
-)
-BOOL_TOKEN = IdentifierToken(
-    value=2, attr_name=const.BOOL, attr_value=const.BOOL, type=None, category=IdentifierToken.CATEGORY_TYPE
-)
+class IdentifiersTable(IndexedTable):
+    """
+    Таблица идентификаторов.
+    Значение токена - его индекс в таблице. Для поиска по имени поддерживается индекс имя -> токен
+    """
+
+    def __init__(self, tokens=()):
+        super().__init__(tokens, key=attrgetter('attr_name'))
+
+    def find(self, name):
+        """Поиск токена по имени идентификатора"""
+        return self.index.get(name)
+
+
+class BuiltinTypeToken(IdentifierToken):
+    """
+    Токен встроенного типа. Один объект входит в таблицы идентификаторов всех контекстов компиляции,
+    поэтому он неизменяемый: присваивание атрибута - AttributeError, полей нет.
+    При pickle передаётся по имени, поэтому и в другом процессе это тот же объект
+    """
+
+    __slots__ = ('_global_name',)
+
+    def __init__(self, value, attr_name, global_name):
+        super().__init__(
+            value=value, attr_name=attr_name, attr_value=attr_name, type=None, category=self.CATEGORY_TYPE
+        )
+        self.fields = ()
+        # Имя объекта в модуле, по нему объект находится при unpickle. Присваивается последним
+        self._global_name = global_name
 
-identifiers_table = [
+    def __setattr__(self, name, value):
+        if hasattr(self, '_global_name'):
+            raise AttributeError(f'Токен встроенного типа {self.attr_name} нельзя изменить')
+        super().__setattr__(name, value)
+
+    def __reduce__(self):
+        return self._global_name
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+INT_TOKEN = BuiltinTypeToken(value=0, attr_name=const.INT, global_name='INT_TOKEN')
+FLOAT_TOKEN = BuiltinTypeToken(value=1, attr_name=const.FLOAT, global_name='FLOAT_TOKEN')
+BOOL_TOKEN = BuiltinTypeToken(value=2, attr_name=const.BOOL, global_name='BOOL_TOKEN')
+
+identifiers_table = IdentifiersTable([
     INT_TOKEN,
     FLOAT_TOKEN,
     BOOL_TOKEN,
-]
+])
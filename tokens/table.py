@@ -0,0 +1,62 @@
+from typing import Callable
+
+__all__ = [
+    'IndexedTable',
+]
+
+
+class IndexedTable(list):
+    """
+    Таблица токенов с хэш-индексом.
+    Значение токена - его индекс в таблице, индекс ключ -> токен поддерживается при любом изменении таблицы
+    """
+
+    def __init__(self, tokens=(), key: Callable = None):
+        super().__init__(tokens)
+        # Ключ токена в индексе
+        self.get_key = key
+        self.index = {}
+        self._reindex()
+
+    def _reindex(self):
+        """Перестроение индекса после изменения таблицы"""
+        self.index.clear()
+        for token in self:
+            self.index.setdefault(self.get_key(token), token)
+
+    def append(self, token):
+        super().append(token)
+        self.index.setdefault(self.get_key(token), token)
+
+    def extend(self, tokens):
+        for token in tokens:
+            self.append(token)
+
+    def __iadd__(self, tokens):
+        self.extend(tokens)
+        return self
+
+    def insert(self, index, token):
+        super().insert(index, token)
+        self._reindex()
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._reindex()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._reindex()
+
+    def pop(self, index=-1):
+        token = super().pop(index)
+        self._reindex()
+        return token
+
+    def remove(self, token):
+        super().remove(token)
+        self._reindex()
+
+    def clear(self):
+        super().clear()
+        self.index.clear()
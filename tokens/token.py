@@ -13,6 +13,8 @@ __all__ = [
 class Token:
     """Токен"""
 
+    __slots__ = ('name', 'code', 'value')
+
     def __init__(self, name: str, code: int, value):
         # Имя токена
         self.name = name
@@ -0,0 +1,67 @@
+from collections.abc import Sequence
+
+__all__ = [
+    'TokenView',
+]
+
+
+class TokenView(Sequence):
+    """
+    Представление части потока токенов tokens[start:end] без копирования.
+    Индексы отсчитываются от start, отрицательные - от end, как у списка.
+    Срез представления - тоже представление того же потока
+    """
+
+    __slots__ = ('tokens', 'start', 'end')
+
+    def __init__(self, tokens, start=0, end=None):
+        # Исходный поток: список токенов или TokenBuffer
+        self.tokens = tokens
+        self.start = start
+        self.end = len(tokens) if end is None else end
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, end, step = index.indices(self.end - self.start)
+            if step != 1:
+                raise ValueError('Шаг среза представления должен быть равен 1')
+            return TokenView(self.tokens, self.start + start, self.start + max(start, end))
+        if index < 0:
+            index += self.end - self.start
+            if index < 0:
+                raise IndexError('Индекс за пределами представления')
+        elif index >= self.end - self.start:
+            raise IndexError('Индекс за пределами представления')
+        return self.tokens[self.start + index]
+
+    def __iter__(self):
+        tokens = self.tokens
+        for index in range(self.start, self.end):
+            yield tokens[index]
+
+    def __contains__(self, token):
+        return self.find(token) != -1
+
+    def find(self, token, start=0) -> int:
+        """Индекс первого вхождения token, начиная с start, или -1"""
+        try:
+            return self.index(token, start)
+        except ValueError:
+            return -1
+
+    def index(self, token, start=0, stop=None) -> int:
+        start, stop, _ = slice(start, stop).indices(self.end - self.start)
+        return self.tokens.index(token, self.start + start, self.start + stop) - self.start
+
+    def advance(self, count=1):
+        """Сдвиг начала представления на count токенов"""
+        self.start = min(self.start + count, self.end)
+
+    def skip(self, token):
+        """Пропуск идущих подряд в начале представления токенов token"""
+        tokens = self.tokens
+        while self.start < self.end and tokens[self.start] == token:
+            self.start += 1